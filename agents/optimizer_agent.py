@@ -1,9 +1,42 @@
 import json
 import time
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 from core.llm_client import LLMClient
 
+_RESTRUCTURE_PROMPT_TEMPLATE = (
+    "Restructure the following learning plan based on performance analysis:\n"
+    "\n"
+    "CURRENT PLAN:\n"
+    "%s\n"
+    "\n"
+    "PERFORMANCE ANALYSIS:\n"
+    "- Completion Rate: %s%%\n"
+    "- Efficiency Score: %s/100\n"
+    "- Performance Gap: %s%%\n"
+    "- Plan Difficulty: %s\n"
+    "\n"
+    "OPTIMIZATION STRATEGY: %s\n"
+    "RATIONALE: %s\n"
+    "\n"
+    "Restructure the plan to:\n"
+    "1. Simplify complex tasks\n"
+    "2. Break down large tasks into smaller steps\n"
+    "3. Reduce daily workload while maintaining learning objectives\n"
+    "4. Add more practice and review sessions\n"
+    "5. Improve task sequencing for better learning flow\n"
+    "\n"
+    "Return the restructured plan in the same JSON format as the input, but with:\n"
+    "- Simplified task descriptions\n"
+    "- Shorter task durations\n"
+    "- More granular task breakdown\n"
+    "- Added review and practice sessions\n"
+    "\n"
+    "Return ONLY valid JSON, no additional text.\n"
+)
+
 class OptimizerAgent:
     """
     Intelligent Optimizer Agent for adapting and improving plans based on progress
@@ -13,6 +46,9 @@ class OptimizerAgent:
     def __init__(self, llm_client: LLMClient):
         self.llm = llm_client
         self.optimization_history: List[Dict[str, Any]] = []
+        self.max_prompt_plan_chars = 12000  # Above this, only task summaries go into the prompt
+        self.max_workers = 8  # Upper bound on concurrent LLM calls in optimize_many
+        self.history_lock = Lock()
         
         logger.info("OptimizerAgent initialized")
 
@@ -51,7 +87,8 @@ class OptimizerAgent:
                 "optimization_duration": time.time() - start_time
             }
             
-            self.optimization_history.append(optimization_record)
+            with self.history_lock:
+                self.optimization_history.append(optimization_record)
             
             logger.info(f"Plan optimization completed in {time.time() - start_time:.2f}s")
             
@@ -72,6 +109,24 @@ class OptimizerAgent:
                 "adjustment_rationale": "Failed to optimize - using original plan"
             }
 
+    def optimize_many(self, items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Optimize several independent plans concurrently
+        
+        Args:
+            items: List of (user_id, current_plan, metrics) tuples
+            
+        Returns:
+            Optimization results in the same order as items
+        """
+        if not items:
+            return []
+        
+        logger.info(f"OptimizerAgent optimizing {len(items)} plans concurrently")
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(lambda item: self.optimize(*item), items))
+
     def _analyze_performance(self, metrics: Dict[str, Any], current_plan: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze user performance against plan expectations"""
         
@@ -111,15 +166,17 @@ class OptimizerAgent:
         total_tasks = 0
         total_duration = 0
         
-        for week_data in weekly_structure.values():
-            if isinstance(week_data, list):
-                for day_data in week_data:
-                    tasks = day_data.get("tasks", [])
-                    total_tasks += len(tasks)
-                    total_duration += sum(task.get("duration_minutes", 0) for task in tasks)
-            elif isinstance(week_data, dict):
-                tasks = week_data.get("daily_tasks", [])
-                total_tasks += len(tasks) * 7
+        schema = self._plan_schema(weekly_structure)
+        if schema != "list-days":
+            # dict-days plans, and the week-summary weeks of a mixed plan
+            for week_data in weekly_structure.values():
+                if isinstance(week_data, dict):
+                    total_tasks += len(week_data.get("daily_tasks", [])) * 7
+        if schema != "dict-days":
+            for tasks in self._iter_day_tasks(weekly_structure, schema):
+                total_tasks += len(tasks)
+                for task in tasks:
+                    total_duration += task.get("duration_minutes", 0)
         
         if total_tasks == 0:
             return "medium"
@@ -134,6 +191,33 @@ class OptimizerAgent:
         else:
             return "medium"
 
+    def _plan_schema(self, weekly_structure: Dict[str, Any]) -> str:
+        """
+        Detect the week layout once per plan, checking that every week follows it
+        
+        Returns:
+            "list-days" or "dict-days" when all weeks share that layout, otherwise
+            "mixed" (LLM output can mix layouts or contain malformed weeks)
+        """
+        weeks = weekly_structure.values()
+        if all(isinstance(week_data, list) for week_data in weeks):
+            return "list-days"
+        if all(isinstance(week_data, dict) for week_data in weeks):
+            return "dict-days"
+        return "mixed"
+
+    def _iter_day_tasks(self, weekly_structure: Dict[str, Any], schema: Optional[str] = None):
+        """Yield the task list of every day in the list-days weeks of a plan"""
+        schema = schema or self._plan_schema(weekly_structure)
+        if schema == "dict-days":
+            return
+        for week_data in weekly_structure.values():
+            # Only a mixed plan needs the per-week guard
+            if schema == "mixed" and not isinstance(week_data, list):
+                continue
+            for day_data in week_data:
+                yield day_data.get("tasks", [])
+
     def _get_expected_completion_rate(self, difficulty: str) -> float:
         """Get expected completion rate based on plan difficulty"""
         expectations = {
@@ -221,49 +305,55 @@ class OptimizerAgent:
     def _build_restructure_prompt(self, plan: Dict, analysis: Dict, strategy: Dict) -> str:
         """Build prompt for LLM-powered plan restructure"""
         
-        return f"""
-        Restructure the following learning plan based on performance analysis:
-        
-        CURRENT PLAN:
-        {json.dumps(plan, indent=2)}
-        
-        PERFORMANCE ANALYSIS:
-        - Completion Rate: {analysis['completion_rate']}%
-        - Efficiency Score: {analysis['efficiency_score']}/100
-        - Performance Gap: {analysis['performance_gap']}%
-        - Plan Difficulty: {analysis['plan_difficulty']}
-        
-        OPTIMIZATION STRATEGY: {strategy['type']}
-        RATIONALE: {strategy['rationale']}
-        
-        Restructure the plan to:
-        1. Simplify complex tasks
-        2. Break down large tasks into smaller steps
-        3. Reduce daily workload while maintaining learning objectives
-        4. Add more practice and review sessions
-        5. Improve task sequencing for better learning flow
+        plan_json = json.dumps(plan, separators=(",", ":"))
+        if len(plan_json) > self.max_prompt_plan_chars:
+            plan_json = json.dumps(self._summarize_plan_for_prompt(plan), separators=(",", ":"))
+        
+        return _RESTRUCTURE_PROMPT_TEMPLATE % (
+            plan_json,
+            analysis['completion_rate'],
+            analysis['efficiency_score'],
+            analysis['performance_gap'],
+            analysis['plan_difficulty'],
+            strategy['type'],
+            strategy['rationale']
+        )
+
+    def _summarize_plan_for_prompt(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce a large plan to its weekly structure with per-task summaries"""
+        summarized_weeks = {}
         
-        Return the restructured plan in the same JSON format as the input, but with:
-        - Simplified task descriptions
-        - Shorter task durations
-        - More granular task breakdown
-        - Added review and practice sessions
+        for week_key, week_data in plan.get("weekly_structure", {}).items():
+            if isinstance(week_data, list):
+                summarized_weeks[week_key] = [
+                    {
+                        "day": day_data.get("day"),
+                        "tasks": [
+                            {
+                                "task": task.get("task"),
+                                "duration_minutes": task.get("duration_minutes"),
+                                "priority": task.get("priority")
+                            }
+                            for task in day_data.get("tasks", [])
+                        ]
+                    }
+                    for day_data in week_data
+                ]
+            else:
+                summarized_weeks[week_key] = week_data
         
-        Return ONLY valid JSON, no additional text.
-        """
+        return {"weekly_structure": summarized_weeks}
 
     def _algorithmic_simplification(self, plan: Dict, analysis: Dict) -> Dict[str, Any]:
         """Algorithmically simplify plan when LLM fails"""
         simplified_plan = plan.copy()
         weekly_structure = simplified_plan.get("weekly_structure", {})
         
-        for week_key, week_data in weekly_structure.items():
-            if isinstance(week_data, list):
-                for day_data in week_data:
-                    for task in day_data.get("tasks", []):
-                        if "duration_minutes" in task:
-                            task["duration_minutes"] = max(15, int(task["duration_minutes"] * 0.75))
-                            task["simplified"] = True
+        for tasks in self._iter_day_tasks(weekly_structure):
+            for task in tasks:
+                if "duration_minutes" in task:
+                    task["duration_minutes"] = max(15, int(task["duration_minutes"] * 0.75))
+                    task["simplified"] = True
             
         simplified_plan["optimization_metadata"] = {
             "optimization_type": "algorithmic_simplification",
@@ -279,17 +369,19 @@ class OptimizerAgent:
         enhanced_plan = plan.copy()
         weekly_structure = enhanced_plan.get("weekly_structure", {})
         
-        for week_key, week_data in weekly_structure.items():
-            if isinstance(week_data, list):
-                challenge_task = {
-                    "task": "Advanced challenge: Apply learning to complex scenario",
-                    "duration_minutes": 90,
-                    "priority": "high",
-                    "type": "challenge",
-                    "learning_objective": "Extend understanding through advanced application"
-                }
+        schema = self._plan_schema(weekly_structure)
+        if schema != "dict-days":
+            for week_data in weekly_structure.values():
+                if schema == "mixed" and not isinstance(week_data, list):
+                    continue
                 if len(week_data) >= 5:
-                    week_data[4]["tasks"].append(challenge_task)
+                    week_data[4]["tasks"].append({
+                        "task": "Advanced challenge: Apply learning to complex scenario",
+                        "duration_minutes": 90,
+                        "priority": "high",
+                        "type": "challenge",
+                        "learning_objective": "Extend understanding through advanced application"
+                    })
         
         enhanced_plan["optimization_metadata"] = {
             "optimization_type": "enhancement",
@@ -305,12 +397,10 @@ class OptimizerAgent:
         adjusted_plan = plan.copy()
         weekly_structure = adjusted_plan.get("weekly_structure", {})
         
-        for week_key, week_data in weekly_structure.items():
-            if isinstance(week_data, list):
-                for day_data in week_data:
-                    for task in day_data.get("tasks", []):
-                        if "duration_minutes" in task:
-                            task["duration_minutes"] = max(20, int(task["duration_minutes"] * 0.85))
+        for tasks in self._iter_day_tasks(weekly_structure):
+            for task in tasks:
+                if "duration_minutes" in task:
+                    task["duration_minutes"] = max(20, int(task["duration_minutes"] * 0.85))
         
         adjusted_plan["optimization_metadata"] = {
             "optimization_type": "adjustment",
@@ -359,10 +449,11 @@ class OptimizerAgent:
 
     def get_optimization_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get optimization history for a user"""
-        user_optimizations = [
-            opt for opt in self.optimization_history 
-            if opt.get("user_id") == user_id
-        ]
+        with self.history_lock:
+            user_optimizations = [
+                opt for opt in self.optimization_history 
+                if opt.get("user_id") == user_id
+            ]
         return sorted(user_optimizations, key=lambda x: x["timestamp"], reverse=True)[:limit]
 
     def get_optimization_effectiveness(self, user_id: str) -> Dict[str, Any]:
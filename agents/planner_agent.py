@@ -1,11 +1,121 @@
-import json
+import copy
+import functools
+import hashlib
+import math
+import re
 import time
-from typing import Dict, Any, List, Optional
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
 from loguru import logger
 from core.llm_client import LLMClient
 from core.memory_bank import MemoryBank
 from agents.context_compactor import ContextCompactor
 
+# Goal keywords per plan type, checked in priority order (substring match, as before)
+_PLAN_TYPE_PATTERNS = (
+    ("software_development", re.compile(r"software|code|develop|program", re.IGNORECASE)),
+    ("study_preparation", re.compile(r"exam|test|study|learn", re.IGNORECASE)),
+    ("research_project", re.compile(r"research|paper|thesis", re.IGNORECASE)),
+)
+_STUDY_SUBJECTS = frozenset({"math", "science", "history", "language"})
+
+# Static plan schema and instructions, kept first and never interpolated so
+# providers can cache the prompt prefix across calls
+PLAN_SCHEMA_PROMPT = """You are creating a personalized multi-week plan.
+
+The plan should be structured as a JSON object with the following format:
+{
+    "weekly_schedule": {
+        "week_1": [
+            {
+                "day": "Monday",
+                "tasks": [
+                    {
+                        "task": "Specific task description",
+                        "duration_minutes": 60,
+                        "priority": "high|medium|low",
+                        "resources_needed": ["resource1", "resource2"],
+                        "learning_objective": "What should be accomplished"
+                    }
+                ],
+                "weekly_theme": "Theme for the week"
+            }
+        ]
+    },
+    "milestones": [
+        {
+            "week": 1,
+            "milestone": "Description of milestone",
+            "success_criteria": ["criteria1", "criteria2"]
+        }
+    ],
+    "resources_overview": {
+        "primary_resources": ["resource1", "resource2"],
+        "supplementary_materials": ["material1", "material2"]
+    },
+    "success_metrics": {
+        "weekly_goals": ["goal1", "goal2"],
+        "completion_criteria": "How to know when the plan is successfully completed"
+    }
+}
+
+Key requirements:
+- Tasks should be specific and actionable
+- Account for the daily time available stated in the profile
+- Include progressive difficulty (easier tasks first)
+- Balance between learning, practice, and review
+- Include weekly review sessions
+- Account for potential challenges and include contingency
+
+Return ONLY valid JSON, no additional text.
+"""
+
+_ADAPTATION_RULES = {
+    "adjustment_triggers": {
+        "low_progress": "If completion rate < 60% for 3 consecutive days",
+        "high_fatigue": "If user reports fatigue or burnout",
+        "ahead_of_schedule": "If completion rate > 90% for 2 consecutive weeks"
+    },
+    "adaptation_strategies": {
+        "simplify_tasks": "Break complex tasks into smaller steps",
+        "increase_practice": "Add more practice sessions for weak areas",
+        "reduce_workload": "Temporarily reduce daily hours by 25%",
+        "accelerate_plan": "Add advanced topics if ahead of schedule"
+    }
+}
+
+# Static fragments of the per-profile prompt suffix, joined with the profile values
+_PLAN_PROFILE_HEAD = "\nCreate a detailed "
+_PLAN_PROFILE_INTRO = "-week personalized plan for the following profile:\n\n"
+
+@functools.lru_cache(maxsize=None)
+def _template_plan_json(weeks: int, phases: Tuple[str, ...], max_daily_hours: int) -> bytes:
+    """Build the serialized fallback plan for one template shape"""
+    days = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+    weekly_schedule = {}
+    
+    for week in range(1, weeks + 1):
+        phase = phases[min(week - 1, len(phases) - 1)]
+        weekly_schedule[f"week_{week}"] = [
+            {
+                "day": day,
+                "tasks": [
+                    {
+                        "task": f"Focused learning session - {phase}",
+                        "duration_minutes": max_daily_hours * 60,
+                        "priority": "high",
+                        "resources_needed": ["Core materials", "Practice exercises"],
+                        "learning_objective": f"Master key concepts for {phase} phase"
+                    }
+                ],
+                "weekly_theme": phase
+            }
+            for day in days
+        ]
+    
+    return orjson.dumps({"weekly_schedule": weekly_schedule})
+
 class PlannerAgent:
     """
     Intelligent Planner Agent for creating personalized project and study plans
@@ -17,6 +127,11 @@ class PlannerAgent:
         self.memory = memory
         self.compactor = context_compactor
         self.plan_templates = self._load_plan_templates()
+        self.plan_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.plan_cache_size = 256
+        self.plan_cache_similarity = 0.9  # Minimum goal similarity for adapting a cached plan
+        self.context_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.context_cache_size = 1024
         
         logger.info("PlannerAgent initialized")
 
@@ -58,78 +173,186 @@ class PlannerAgent:
         """
         logger.info(f"PlannerAgent creating plan for user {user_id}")
         
-        start_time = time.time()
+        created_at = time.time()
+        start_time = time.perf_counter()
         
         try:
-            user_memory = self.memory.get_user_memory(user_id)
-            compacted_memory = self.compactor.compact_user_memory(user_memory)
-            
-          
-            plan_type = self._determine_plan_type(profile)
-            template = self.plan_templates.get(plan_type, self.plan_templates["general_learning"])
-            
-  
-            llm_prompt = self._build_plan_prompt(profile, compacted_memory, template)
-            llm_response = self.llm.generate(llm_prompt, max_tokens=1200)
-            
-        
-            plan_data = self._parse_llm_response(llm_response, template)
+            cached_result = self._lookup_context_result(user_id, profile, created_at, start_time)
+            if cached_result is not None:
+                logger.info(f"Returning context-cached plan for user {user_id}")
+                return cached_result
             
-    
-            enhanced_plan = self._enhance_plan_structure(plan_data, profile, template)
-            
-      
-            plan_record = {
-                "plan_id": f"plan_{int(time.time())}",
-                "created_at": time.time(),
-                "plan_type": plan_type,
-                "profile_snapshot": profile,
-                "plan_data": enhanced_plan,
-                "metadata": {
-                    "generation_time": time.time() - start_time,
-                    "template_used": plan_type,
-                    "llm_provider": self.llm.provider
-                }
-            }
+            context = self._prepare_plan_context(user_id, profile)
             
-            self.memory.add_plan(user_id, plan_record)
+            if context["plan_data"] is None:
+                prompt_prefix, prompt_suffix = self._build_plan_prompt(profile, context["memory"], context["template"])
+                llm_response = self.llm.generate(prompt_suffix, max_tokens=1200, cache_prefix=prompt_prefix)
+                context["plan_data"] = self._plan_from_llm_response(llm_response, context)
             
-            logger.info(f"Plan created successfully for user {user_id} in {time.time() - start_time:.2f}s")
-            
-            return {
-                "status": "success",
-                "plan_id": plan_record["plan_id"],
-                "plan": enhanced_plan,
-                "metadata": plan_record["metadata"]
-            }
+            result = self._finalize_plan(user_id, profile, context, created_at, start_time)
+            self._store_context_result(user_id, profile, context["plan_type"], result)
+            return result
             
         except Exception as e:
             logger.error(f"Plan creation failed for user {user_id}: {e}")
             return {
                 "status": "error",
-                "plan": self._create_fallback_plan(profile),
+                "plan": self._create_fallback_plan(profile, created_at),
                 "error": str(e)
             }
 
+    def create_plans_batch(self, user_profiles: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Create plans for several users, sending all uncached prompts in one LLM batch
+        
+        Args:
+            user_profiles: List of (user_id, profile) tuples
+            
+        Returns:
+            Plan results in the same order as user_profiles
+        """
+        logger.info(f"PlannerAgent creating {len(user_profiles)} plans in batch")
+        
+        created_at = time.time()
+        start_time = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(user_profiles)
+        contexts: Dict[int, Dict[str, Any]] = {}
+        pending: Dict[str, List[int]] = {}
+        suffixes: List[str] = []
+        
+        for index, (user_id, profile) in enumerate(user_profiles):
+            try:
+                context = self._prepare_plan_context(user_id, profile)
+                contexts[index] = context
+                if context["plan_data"] is None:
+                    key_hash = self._hash_plan_cache_key(context["cache_key"])
+                    if key_hash not in pending:
+                        _, prompt_suffix = self._build_plan_prompt(profile, context["memory"], context["template"])
+                        pending[key_hash] = []
+                        suffixes.append(prompt_suffix)
+                    pending[key_hash].append(index)
+            except Exception as e:
+                logger.error(f"Plan creation failed for user {user_id}: {e}")
+                results[index] = {
+                    "status": "error",
+                    "plan": self._create_fallback_plan(profile, created_at),
+                    "error": str(e)
+                }
+        
+        if suffixes:
+            responses = self.llm.batch_generate(suffixes, max_tokens=1200, cache_prefix=PLAN_SCHEMA_PROMPT)
+            for indices, llm_response in zip(pending.values(), responses):
+                plan_data = self._plan_from_llm_response(llm_response, contexts[indices[0]])
+                for index in indices:
+                    contexts[index]["plan_data"] = copy.deepcopy(plan_data)
+        
+        for index, context in contexts.items():
+            user_id, profile = user_profiles[index]
+            try:
+                results[index] = self._finalize_plan(user_id, profile, context, created_at, start_time)
+            except Exception as e:
+                logger.error(f"Plan creation failed for user {user_id}: {e}")
+                results[index] = {
+                    "status": "error",
+                    "plan": self._create_fallback_plan(profile, created_at),
+                    "error": str(e)
+                }
+        
+        return results
+
+    def _prepare_plan_context(self, user_id: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve memory, template and any cached plan ahead of generation"""
+        self.memory.touch_user(user_id)
+        user_memory = self.memory.get_user_memory(user_id)
+        compacted_memory = self.compactor.compact_user_memory(user_memory)
+        
+        plan_type = self._determine_plan_type(profile)
+        template = self.plan_templates.get(plan_type, self.plan_templates["general_learning"])
+        
+        cache_key = self._plan_cache_key(plan_type, profile, template)
+        cache_hit, cached_entry = self._lookup_cached_plan(cache_key)
+        
+        plan_data = None
+        if cache_hit == "exact":
+            plan_data = copy.deepcopy(cached_entry["plan_data"])
+        elif cache_hit == "semantic":
+            plan_data = self._adapt_cached_plan(cached_entry, cache_key)
+            self._store_cached_plan(cache_key, plan_data)
+        
+        return {
+            "memory": compacted_memory,
+            "plan_type": plan_type,
+            "template": template,
+            "cache_key": cache_key,
+            "cache_hit": cache_hit,
+            "plan_data": plan_data
+        }
+
+    def _plan_from_llm_response(self, llm_response: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse a generated plan, caching it on success and falling back to the template"""
+        plan_data = self._parse_llm_response(llm_response)
+        if plan_data is not None:
+            self._store_cached_plan(context["cache_key"], plan_data)
+            return plan_data
+        return self._create_template_plan(context["template"])
+
+    def _finalize_plan(self, user_id: str, profile: Dict[str, Any], context: Dict[str, Any],
+                       created_at: float, start_time: float) -> Dict[str, Any]:
+        """
+        Enhance the plan, record it in memory and build the response
+        
+        Args:
+            created_at: Wall-clock time of the request, used for the plan id and timestamp
+            start_time: perf_counter() reading taken when the request started
+        """
+        plan_type = context["plan_type"]
+        enhanced_plan = self._enhance_plan_structure(context["plan_data"], profile, context["template"], created_at)
+        generation_time = time.perf_counter() - start_time
+        
+        plan_record = {
+            "plan_id": f"plan_{int(created_at)}",
+            "created_at": created_at,
+            "plan_type": plan_type,
+            "profile_snapshot": profile,
+            "plan_data": enhanced_plan,
+            "metadata": {
+                "generation_time": generation_time,
+                "template_used": plan_type,
+                "llm_provider": self.llm.provider,
+                "plan_cache": context["cache_hit"] or "miss"
+            }
+        }
+        
+        self.memory.add_plan(user_id, plan_record)
+        
+        logger.info(f"Plan created successfully for user {user_id} in {generation_time:.2f}s")
+        
+        return {
+            "status": "success",
+            "plan_id": plan_record["plan_id"],
+            "plan": enhanced_plan,
+            "metadata": plan_record["metadata"]
+        }
+
     def _determine_plan_type(self, profile: Dict[str, Any]) -> str:
         """Determine the most appropriate plan type based on user profile"""
-        goals = profile.get("goals", "").lower()
-        subjects = profile.get("subjects", [])
-        time_available = profile.get("daily_hours", 2)
+        goals = profile.get("goals", "")
         
-        if any(keyword in goals for keyword in ["software", "code", "develop", "program"]):
-            return "software_development"
-        elif any(keyword in goals for keyword in ["exam", "test", "study", "learn"]):
-            return "study_preparation"
-        elif any(keyword in goals for keyword in ["research", "paper", "thesis"]):
-            return "research_project"
-        elif any(subject in ["math", "science", "history", "language"] for subject in subjects):
+        for plan_type, keyword_pattern in _PLAN_TYPE_PATTERNS:
+            if keyword_pattern.search(goals):
+                return plan_type
+        
+        if not _STUDY_SUBJECTS.isdisjoint(profile.get("subjects", [])):
             return "study_preparation"
-        else:
-            return "general_learning"
+        return "general_learning"
 
-    def _build_plan_prompt(self, profile: Dict, memory: Dict, template: Dict) -> str:
-        """Build detailed prompt for LLM plan generation"""
+    def _build_plan_prompt(self, profile: Dict, memory: Dict, template: Dict) -> Tuple[str, str]:
+        """
+        Build prompt for LLM plan generation
+        
+        Returns:
+            (cacheable_prefix, dynamic_suffix) - the prefix is byte-identical across calls
+        """
         
         goals = profile.get("goals", "General skill improvement")
         subjects = profile.get("subjects", ["General learning"])
@@ -140,80 +363,24 @@ class PlannerAgent:
         memory_context = ""
         if memory.get("plans"):
             previous_plans = memory.get("plans", [])[-3:]  # Last 3 plans
-            memory_context = f"Previous plans context: {json.dumps(previous_plans, indent=2)}"
-        
-        prompt = f"""
-        Create a detailed {timeline_weeks}-week personalized plan for the following profile:
-        
-        GOALS: {goals}
-        SUBJECTS/TOPICS: {subjects}
-        DAILY TIME AVAILABLE: {daily_hours} hours
-        TIMELINE: {timeline_weeks} weeks
-        CONSTRAINTS: {constraints}
-        
-        {memory_context}
-        
-        The plan should be structured as a JSON object with the following format:
-        {{
-            "weekly_schedule": {{
-                "week_1": [
-                    {{
-                        "day": "Monday",
-                        "tasks": [
-                            {{
-                                "task": "Specific task description",
-                                "duration_minutes": 60,
-                                "priority": "high|medium|low",
-                                "resources_needed": ["resource1", "resource2"],
-                                "learning_objective": "What should be accomplished"
-                            }}
-                        ],
-                        "weekly_theme": "Theme for the week"
-                    }}
-                ]
-            }},
-            "milestones": [
-                {{
-                    "week": 1,
-                    "milestone": "Description of milestone",
-                    "success_criteria": ["criteria1", "criteria2"]
-                }}
-            ],
-            "resources_overview": {{
-                "primary_resources": ["resource1", "resource2"],
-                "supplementary_materials": ["material1", "material2"]
-            }},
-            "success_metrics": {{
-                "weekly_goals": ["goal1", "goal2"],
-                "completion_criteria": "How to know when the plan is successfully completed"
-            }}
-        }}
-        
-        Key requirements:
-        - Tasks should be specific and actionable
-        - Account for the {daily_hours} hours daily availability
-        - Include progressive difficulty (easier tasks first)
-        - Balance between learning, practice, and review
-        - Include weekly review sessions
-        - Account for potential challenges and include contingency
-        
-        Return ONLY valid JSON, no additional text.
-        """
+            memory_context = f"Previous plans context: {orjson.dumps(previous_plans).decode()}"
+        
+        dynamic_suffix = "".join((
+            _PLAN_PROFILE_HEAD, str(timeline_weeks), _PLAN_PROFILE_INTRO,
+            "GOALS: ", str(goals),
+            "\nSUBJECTS/TOPICS: ", str(subjects),
+            "\nDAILY TIME AVAILABLE: ", str(daily_hours),
+            " hours\nTIMELINE: ", str(timeline_weeks),
+            " weeks\nCONSTRAINTS: ", str(constraints),
+            "\n\n", memory_context, "\n"
+        ))
         
-        return prompt
+        return PLAN_SCHEMA_PROMPT, dynamic_suffix
 
-    def _parse_llm_response(self, response: str, template: Dict) -> Dict[str, Any]:
-        """Parse and validate LLM response into structured plan"""
+    def _parse_llm_response(self, response: str) -> Optional[Dict[str, Any]]:
+        """Parse and validate LLM response into structured plan, None if unusable"""
         try:
-          
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            plan_data = json.loads(cleaned_response)
+            plan_data = orjson.loads(self._extract_json_object(response))
             
           
             if "weekly_schedule" not in plan_data:
@@ -221,19 +388,192 @@ class PlannerAgent:
                 
             return plan_data
             
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.warning(f"LLM response parsing failed, using template: {e}")
-            return self._create_template_plan(template)
+        except (orjson.JSONDecodeError, ValueError) as e:
+            logger.warning(f"LLM response parsing failed: {e}")
+            return None
+
+    def _extract_json_object(self, response: str) -> str:
+        """
+        Locate the first balanced JSON object in an LLM response
+        
+        Tolerates ```json fences, leading prose and trailing text; braces
+        inside string literals are ignored while counting depth.
+        
+        Args:
+            response: Raw LLM output
+            
+        Returns:
+            Slice of the response containing the JSON object
+        """
+        start = response.find("{")
+        if start < 0:
+            raise ValueError("No JSON object in LLM response")
+        
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(response)):
+            char = response[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return response[start:i + 1]
+        
+        raise ValueError("Unbalanced JSON object in LLM response")
+
+    def _plan_cache_key(self, plan_type: str, profile: Dict, template: Dict) -> Dict[str, Any]:
+        """Normalize the profile fields that shape a generated plan"""
+        return {
+            "plan_type": plan_type,
+            "goals": " ".join(str(profile.get("goals", "")).lower().split()),
+            "subjects": sorted(str(subject).lower() for subject in profile.get("subjects", [])),
+            "daily_hours": profile.get("daily_hours", 2),
+            "timeline_weeks": profile.get("timeline_weeks", template["weeks"])
+        }
+
+    def _hash_plan_cache_key(self, cache_key: Dict[str, Any]) -> str:
+        """Stable digest of a normalized plan cache key"""
+        canonical = orjson.dumps(cache_key, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+    def _context_cache_key(self, user_id: str, profile: Dict[str, Any]) -> str:
+        """Hash the user, full profile and current memory version into a context cache key"""
+        context = {"u": user_id, "p": profile, "m": self.memory.version(user_id)}
+        serialized = orjson.dumps(context, option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+    def _lookup_context_result(self, user_id: str, profile: Dict[str, Any],
+                               created_at: float, start_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Reissue the plan already produced for this exact user, profile and plan history
+        
+        The plan is recorded again under a fresh plan_id and timestamp, then re-cached
+        under the memory version that includes this new record.
+        
+        Args:
+            created_at: Wall-clock time of the request, used for the plan id and timestamp
+            start_time: perf_counter() reading taken when the request started
+        """
+        context_key = self._context_cache_key(user_id, profile)
+        cached_entry = self.context_cache.pop(context_key, None)
+        if cached_entry is None:
+            return None
+        
+        result = copy.deepcopy(cached_entry["result"])
+        result["plan_id"] = f"plan_{int(created_at)}"
+        result["metadata"]["generation_time"] = time.perf_counter() - start_time
+        result["metadata"]["plan_cache"] = "context"
+        
+        self.memory.add_plan(user_id, {
+            "plan_id": result["plan_id"],
+            "created_at": created_at,
+            "plan_type": cached_entry["plan_type"],
+            "profile_snapshot": profile,
+            "plan_data": result["plan"],
+            "metadata": result["metadata"]
+        })
+        self._store_context_result(user_id, profile, cached_entry["plan_type"], result)
+        return result
+
+    def _store_context_result(self, user_id: str, profile: Dict[str, Any], plan_type: str, result: Dict[str, Any]):
+        """Cache a successful result under the memory version that includes its own plan"""
+        context_key = self._context_cache_key(user_id, profile)
+        self.context_cache[context_key] = {"plan_type": plan_type, "result": copy.deepcopy(result)}
+        self.context_cache.move_to_end(context_key)
+        if len(self.context_cache) > self.context_cache_size:
+            self.context_cache.popitem(last=False)
+
+    def _embed_goals(self, cache_key: Dict[str, Any]) -> Counter:
+        """Bag-of-words vector over goals and subjects used for similarity lookups"""
+        text = cache_key["goals"] + " " + " ".join(cache_key["subjects"])
+        return Counter(re.findall(r"\w+", text))
+
+    def _cosine_similarity(self, a: Counter, b: Counter) -> float:
+        """Cosine similarity between two sparse word vectors"""
+        if not a or not b:
+            return 0.0
+        dot = sum(count * b[word] for word, count in a.items() if word in b)
+        norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+        return dot / norm if norm else 0.0
+
+    def _lookup_cached_plan(self, cache_key: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Find a cached plan for an identical or sufficiently similar profile"""
+        key_hash = self._hash_plan_cache_key(cache_key)
+        entry = self.plan_cache.get(key_hash)
+        if entry is not None:
+            self.plan_cache.move_to_end(key_hash)
+            return "exact", entry
+        
+        embedding = self._embed_goals(cache_key)
+        best_entry, best_score = None, 0.0
+        for entry in self.plan_cache.values():
+            cached_key = entry["key"]
+            if (cached_key["plan_type"] != cache_key["plan_type"] or
+                    cached_key["timeline_weeks"] != cache_key["timeline_weeks"]):
+                continue
+            score = self._cosine_similarity(embedding, entry["embedding"])
+            if score > best_score:
+                best_entry, best_score = entry, score
+        
+        if best_entry is not None and best_score >= self.plan_cache_similarity:
+            return "semantic", best_entry
+        return None, None
+
+    def _store_cached_plan(self, cache_key: Dict[str, Any], plan_data: Dict[str, Any]):
+        """Cache a generated plan, evicting the least recently used entry when full"""
+        key_hash = self._hash_plan_cache_key(cache_key)
+        self.plan_cache[key_hash] = {
+            "key": cache_key,
+            "embedding": self._embed_goals(cache_key),
+            "plan_data": copy.deepcopy(plan_data)
+        }
+        self.plan_cache.move_to_end(key_hash)
+        if len(self.plan_cache) > self.plan_cache_size:
+            self.plan_cache.popitem(last=False)
+
+    def _adapt_cached_plan(self, cached_entry: Dict[str, Any], cache_key: Dict[str, Any]) -> Dict[str, Any]:
+        """Adapt a similar cached plan to the new profile with a short prompt"""
+        cached_key = cached_entry["key"]
+        changes = [
+            f"- {field.upper()}: {cached_key[field]} -> {cache_key[field]}"
+            for field in ("goals", "subjects", "daily_hours")
+            if cached_key[field] != cache_key[field]
+        ]
+        
+        prompt = (
+            "Adapt the following existing plan to an updated profile. Keep the same JSON "
+            "structure and change only what the profile changes require.\n\n"
+            f"EXISTING PLAN:\n{orjson.dumps(cached_entry['plan_data']).decode()}\n\n"
+            "PROFILE CHANGES:\n" + "\n".join(changes) + "\n\n"
+            "Return ONLY valid JSON, no additional text."
+        )
+        
+        adapted_plan = self._parse_llm_response(self.llm.generate(prompt, max_tokens=1200))
+        if adapted_plan is None:
+            logger.info("Plan adaptation failed, reusing cached plan as-is")
+            return copy.deepcopy(cached_entry["plan_data"])
+        return adapted_plan
 
-    def _enhance_plan_structure(self, plan_data: Dict, profile: Dict, template: Dict) -> Dict[str, Any]:
-        """Enhance plan with additional structure and metadata"""
+    def _enhance_plan_structure(self, plan_data: Dict, profile: Dict, template: Dict, created_at: float) -> Dict[str, Any]:
+        """Enhance plan with additional structure and metadata, stamped with the request's created_at"""
         
         daily_hours = profile.get("daily_hours", 2)
         timeline_weeks = profile.get("timeline_weeks", template["weeks"])
         
         enhanced_plan = {
             "metadata": {
-                "creation_timestamp": time.time(),
+                "creation_timestamp": created_at,
                 "plan_duration_weeks": timeline_weeks,
                 "daily_hours_target": daily_hours,
                 "estimated_total_hours": timeline_weeks * 7 * daily_hours,
@@ -250,57 +590,24 @@ class PlannerAgent:
 
     def _generate_adaptation_rules(self, profile: Dict) -> Dict[str, Any]:
         """Generate rules for plan adaptation based on user profile"""
-        return {
-            "adjustment_triggers": {
-                "low_progress": "If completion rate < 60% for 3 consecutive days",
-                "high_fatigue": "If user reports fatigue or burnout",
-                "ahead_of_schedule": "If completion rate > 90% for 2 consecutive weeks"
-            },
-            "adaptation_strategies": {
-                "simplify_tasks": "Break complex tasks into smaller steps",
-                "increase_practice": "Add more practice sessions for weak areas",
-                "reduce_workload": "Temporarily reduce daily hours by 25%",
-                "accelerate_plan": "Add advanced topics if ahead of schedule"
-            }
-        }
+        # Rules are currently the same for every profile and never mutated, so share one instance
+        return _ADAPTATION_RULES
 
     def _create_template_plan(self, template: Dict) -> Dict[str, Any]:
         """Create a basic plan from template when LLM fails"""
-        weeks = template["weeks"]
-        daily_hours_range = template["daily_hours_range"]
-        
-        plan = {"weekly_schedule": {}}
-        
-        for week in range(1, weeks + 1):
-            week_key = f"week_{week}"
-            plan["weekly_schedule"][week_key] = []
-            
-            for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]:
-                daily_tasks = [
-                    {
-                        "task": f"Focused learning session - {template['phases'][min(week-1, len(template['phases'])-1)]}",
-                        "duration_minutes": daily_hours_range[1] * 60,
-                        "priority": "high",
-                        "resources_needed": ["Core materials", "Practice exercises"],
-                        "learning_objective": f"Master key concepts for {template['phases'][min(week-1, len(template['phases'])-1)]} phase"
-                    }
-                ]
-                
-                plan["weekly_schedule"][week_key].append({
-                    "day": day,
-                    "tasks": daily_tasks,
-                    "weekly_theme": template['phases'][min(week-1, len(template['phases'])-1)]
-                })
-        
-        return plan
+        cached_plan = _template_plan_json(
+            template["weeks"], tuple(template["phases"]), template["daily_hours_range"][1]
+        )
+        # Parsing the cached JSON yields a fresh plan the caller may mutate freely
+        return orjson.loads(cached_plan)
 
-    def _create_fallback_plan(self, profile: Dict) -> Dict[str, Any]:
-        """Create a very basic fallback plan when everything else fails"""
+    def _create_fallback_plan(self, profile: Dict, created_at: float) -> Dict[str, Any]:
+        """Create a very basic fallback plan when everything else fails, stamped with the request's created_at"""
         logger.warning("Using fallback plan due to generation failures")
         
         return {
             "metadata": {
-                "creation_timestamp": time.time(),
+                "creation_timestamp": created_at,
                 "plan_duration_weeks": 4,
                 "daily_hours_target": 2,
                 "estimated_total_hours": 56,
@@ -1,11 +1,22 @@
-import json
+import atexit
+import bisect
+import itertools
+import os
+import queue
+import threading
 import time
-from typing import Dict, Any, List, Optional
+from array import array
+from collections import deque
+import orjson
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from loguru import logger
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from tools.save_json_tool import save_to_file
 
+# Per-process sequence appended to record ids; queued saves return well inside a millisecond
+_record_sequence = itertools.count()
+
 @dataclass
 class ProgressRecord:
     """Data class for progress records"""
@@ -15,6 +26,45 @@ class ProgressRecord:
     timestamp: float
     metrics: Dict[str, float]
 
+def _record_timestamp(record: Dict[str, Any]) -> float:
+    """Sort key for progress records"""
+    return record.get("timestamp", 0)
+
+@dataclass
+class UserProgressAggregate:
+    """Rolling per-user state that progress insights are computed from"""
+    recent: deque = field(default_factory=lambda: deque(maxlen=14))  # (timestamp, completion_rate, efficiency_score)
+    streak_timestamps: deque = field(default_factory=deque)  # records chained within one day of each other
+    
+    def add(self, record: Dict[str, Any]):
+        """Fold one record (in timestamp order) into the aggregate"""
+        timestamp = record["timestamp"]
+        metrics = record.get("metrics", {})
+        self.recent.append((timestamp, metrics.get("completion_rate", 0), metrics.get("efficiency_score", 0)))
+        
+        if self.streak_timestamps and timestamp - self.streak_timestamps[-1] > 24 * 60 * 60:
+            self.streak_timestamps.clear()
+        self.streak_timestamps.append(timestamp)
+
+@dataclass
+class UserMetricColumns:
+    """Packed per-user metric columns in timestamp order, scanned for aggregate metrics"""
+    timestamps: array = field(default_factory=lambda: array("d"))
+    total_tasks: array = field(default_factory=lambda: array("I"))
+    completed_tasks: array = field(default_factory=lambda: array("I"))
+    total_duration_minutes: array = field(default_factory=lambda: array("f"))  # float32 is plenty for minutes
+    
+    def add(self, record: Dict[str, Any]):
+        """Insert one record's metrics, keeping the columns ordered by timestamp"""
+        timestamp = record["timestamp"]
+        metrics = record.get("metrics", {})
+        index = bisect.bisect_right(self.timestamps, timestamp)
+        
+        self.timestamps.insert(index, timestamp)
+        self.total_tasks.insert(index, int(metrics.get("total_tasks", 0)))
+        self.completed_tasks.insert(index, int(metrics.get("completed_tasks", 0)))
+        self.total_duration_minutes.insert(index, metrics.get("total_duration_minutes", 0))
+
 class ProgressAgent:
     """
     Progress Tracking Agent for monitoring user progress and computing metrics
@@ -23,17 +73,183 @@ class ProgressAgent:
     
     def __init__(self, save_tool):
         self.save_tool = save_tool
-        self.storage_path = Path("memory/progress.json")
+        self.storage_path = Path("memory/progress.jsonl")
+        self.legacy_storage_path = Path("memory/progress.json")
+        self._user_offsets: Dict[str, List[int]] = {}
+        self._storage_stamp: Optional[Tuple[int, int]] = None
+        self._records_cache: Optional[List[Dict[str, Any]]] = None
+        self._user_history_cache: Dict[str, List[Dict[str, Any]]] = {}
+        self._user_aggregates: Dict[str, UserProgressAggregate] = {}
+        self._user_columns: Dict[str, UserMetricColumns] = {}
+        self._lock = threading.RLock()
+        # Serializes appends to the storage file with index rebuilds, so the slow open/write/fsync
+        # runs outside _lock; taken before _lock whenever both are needed
+        self._file_lock = threading.Lock()
+        # Set while the writer's own append is changing the file, so readers don't mistake it
+        # for an outside change and wait for it in _sync_with_storage
+        self._append_in_progress = False
+        self.write_batch_size = 32
+        self.write_batch_interval = 0.1  # seconds to wait for more records before writing
+        self._write_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        # Records whose append failed; the writer retries them every write_retry_interval
+        # seconds (and ahead of every new batch) and reports the failure until one succeeds.
+        # Guarded by their own lock, held only to swap them, so status reads never wait on I/O
+        self._unwritten_records: List[Dict[str, Any]] = []
+        self._write_error: Optional[Dict[str, Any]] = None
+        self._write_state_lock = threading.Lock()
+        self.write_retry_interval = 5.0
         self._ensure_storage()
+        self._sync_with_storage()
+        
+        self._writer = threading.Thread(target=self._drain_write_queue, daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
         
         logger.info("ProgressAgent initialized")
 
     def _ensure_storage(self):
-        """Ensure progress storage file exists"""
+        """Ensure progress storage file exists, migrating the legacy JSON array if present"""
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.storage_path.exists():
-            with open(self.storage_path, 'w') as f:
-                json.dump([], f)
+        if self.storage_path.exists():
+            return
+        
+        legacy_records = self.load_records(str(self.legacy_storage_path))
+        with open(self.storage_path, 'wb') as f:
+            for record in legacy_records:
+                f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+    def _build_offset_index(self):
+        """Index the byte offset of every stored record by user"""
+        self._user_offsets = {}
+        
+        try:
+            with open(self.storage_path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        user_id = orjson.loads(line).get("user_id")
+                        self._user_offsets.setdefault(user_id, []).append(offset)
+                    offset += len(line)
+        except Exception as e:
+            logger.error(f"Failed to index progress records: {e}")
+
+    def _current_storage_stamp(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size identifying the current state of the storage file"""
+        try:
+            stat = self.storage_path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _sync_with_storage(self):
+        """Drop cached records and re-index if the storage file changed outside this agent"""
+        with self._lock:
+            if self._append_in_progress or self._current_storage_stamp() == self._storage_stamp:
+                return
+        
+        # Land our own queued appends first so the rebuilt index includes them
+        self.flush()
+        with self._file_lock, self._lock:
+            stamp = self._current_storage_stamp()
+            if stamp != self._storage_stamp:
+                self._records_cache = None
+                self._user_history_cache = {}
+                self._user_aggregates = {}
+                self._user_columns = {}
+                self._build_offset_index()
+                self._storage_stamp = stamp
+
+    def flush(self) -> bool:
+        """
+        Block until every queued progress record has been handled by the writer
+        
+        Returns:
+            True if everything recorded so far is on disk, False if some records are
+            still waiting for a retry after a failed write (see get_write_status)
+        """
+        self._write_queue.join()
+        with self._write_state_lock:
+            return not self._unwritten_records
+
+    def get_write_status(self) -> Dict[str, Any]:
+        """Report whether background progress writes are succeeding (never waits on disk I/O)"""
+        with self._write_state_lock:
+            return {
+                "healthy": self._write_error is None,
+                "unwritten_records": len(self._unwritten_records),
+                "last_error": dict(self._write_error) if self._write_error else None
+            }
+
+    def _drain_write_queue(self):
+        """Background writer: batch queued records and append them to storage, retrying failed batches"""
+        while True:
+            with self._write_state_lock:
+                retry_pending = bool(self._unwritten_records)
+            try:
+                batch = [self._write_queue.get(timeout=self.write_retry_interval if retry_pending else None)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + self.write_batch_interval
+            
+            while batch and len(batch) < self.write_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            with self._write_state_lock:
+                records = self._unwritten_records + batch
+            
+            try:
+                self._append_records(records)
+                with self._write_state_lock:
+                    self._unwritten_records = []
+                    if self._write_error is not None:
+                        logger.info(f"Progress writes recovered, wrote {len(records)} records")
+                    self._write_error = None
+            except Exception as e:
+                logger.error(f"Failed to write {len(records)} progress records, will retry: {e}")
+                with self._write_state_lock:
+                    self._unwritten_records = records
+                    self._write_error = {
+                        "error": str(e),
+                        "failed_at": time.time(),
+                        "unwritten_records": len(records)
+                    }
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        """Append a batch of records with a single write and index their offsets"""
+        lines = [orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records]
+        
+        # Only the writer thread appends; readers keep using _lock while the write and fsync
+        # run, and take it again only for the index update
+        with self._file_lock:
+            with self._lock:
+                self._append_in_progress = True
+            
+            try:
+                with open(self.storage_path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(b"".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception:
+                with self._lock:
+                    self._append_in_progress = False
+                raise
+            
+            with self._lock:
+                self._append_in_progress = False
+                for record, line in zip(records, lines):
+                    self._user_offsets.setdefault(record.get("user_id"), []).append(offset)
+                    offset += len(line)
+                self._storage_stamp = self._current_storage_stamp()
 
     def record_progress(self, user_id: str, session_id: str, completed_tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -49,7 +265,8 @@ class ProgressAgent:
         """
         logger.info(f"Recording progress for user {user_id}, {len(completed_tasks)} tasks")
         
-        start_time = time.time()
+        now = time.time()
+        start_time = time.perf_counter()
         
         try:
             metrics = self._compute_session_metrics(completed_tasks)
@@ -58,22 +275,28 @@ class ProgressAgent:
                 user_id=user_id,
                 session_id=session_id,
                 completed_tasks=completed_tasks,
-                timestamp=time.time(),
+                timestamp=now,
                 metrics=metrics
             )
             
   
-            self._save_progress_record(record)
-            insights = self._generate_progress_insights(user_id, metrics)       
-            logger.info(f"Progress recorded successfully in {time.time() - start_time:.2f}s")
+            record_id = self._record_id(now)
+            self._save_progress_record(record, record_id)
+            insights = self._generate_progress_insights(user_id, metrics, now)
+            logger.info(f"Progress recorded successfully in {time.perf_counter() - start_time:.2f}s")
             
-            return {
+            result = {
                 "status": "success",
-                "record_id": f"progress_{int(time.time())}",
+                "record_id": record_id,
                 "metrics": metrics,
                 "insights": insights,
                 "timestamp": record.timestamp
             }
+            write_status = self.get_write_status()
+            if not write_status["healthy"]:
+                # The record is queued, but earlier writes are failing; don't report it as safely stored
+                result["storage_warning"] = write_status
+            return result
             
         except Exception as e:
             logger.error(f"Progress recording failed: {e}")
@@ -82,6 +305,10 @@ class ProgressAgent:
                 "error": str(e)
             }
 
+    def _record_id(self, timestamp: float) -> str:
+        """Unique record identifier: the record timestamp in milliseconds plus a per-process sequence number"""
+        return f"progress_{int(timestamp * 1000)}_{next(_record_sequence)}"
+
     def _compute_session_metrics(self, completed_tasks: List[Dict[str, Any]]) -> Dict[str, float]:
         """Compute comprehensive metrics from completed tasks"""
         if not completed_tasks:
@@ -111,54 +338,71 @@ class ProgressAgent:
             "efficiency_score": round(efficiency_score, 2)
         }
 
-    def _save_progress_record(self, record: ProgressRecord):
+    def _save_progress_record(self, record: ProgressRecord, record_id: str):
         """Save progress record to storage"""
         try:
-            existing_records = self.load_records()
-            
             record_dict = {
                 "user_id": record.user_id,
                 "session_id": record.session_id,
                 "completed_tasks": record.completed_tasks,
                 "timestamp": record.timestamp,
                 "metrics": record.metrics,
-                "record_id": f"progress_{int(record.timestamp)}"
+                "record_id": record_id
             }
             
-            existing_records.append(record_dict)
+            # Load the user's history before queueing so the in-memory view stays complete
+            self._user_history(record.user_id)
+            
+            with self._lock:
+                if self._records_cache is not None:
+                    self._records_cache.append(record_dict)
+                user_records = self._user_history_cache.get(record.user_id)
+                if user_records is not None:
+                    bisect.insort(user_records, record_dict, key=_record_timestamp)
+                aggregate = self._user_aggregates.get(record.user_id)
+                if aggregate is not None:
+                    aggregate.add(record_dict)
+                columns = self._user_columns.get(record.user_id)
+                if columns is not None:
+                    columns.add(record_dict)
             
-            with open(self.storage_path, 'w') as f:
-                json.dump(existing_records, f, indent=2)
+            self._write_queue.put(record_dict)
                 
         except Exception as e:
             logger.error(f"Failed to save progress record: {e}")
             raise
 
-    def _generate_progress_insights(self, user_id: str, current_metrics: Dict[str, float]) -> Dict[str, Any]:
-        """Generate insights based on current progress and historical data"""
+    def _generate_progress_insights(self, user_id: str, current_metrics: Dict[str, float], now: float) -> Dict[str, Any]:
+        """Generate insights based on current progress and historical data, as of the caller's clock reading"""
         
-        user_history = self.get_user_progress_history(user_id, days=30)
+        aggregate = self._get_user_aggregate(user_id)
+        cutoff_time = now - (30 * 24 * 60 * 60)
         
-        if not user_history:
+        with self._lock:
+            recent = [entry for entry in aggregate.recent if entry[0] > cutoff_time]
+            while aggregate.streak_timestamps and aggregate.streak_timestamps[0] <= cutoff_time:
+                aggregate.streak_timestamps.popleft()
+            streak_timestamps = list(aggregate.streak_timestamps)
+        
+        if not recent:
             return {
                 "trend": "new_user",
                 "message": "Great start! Keep maintaining this consistency.",
                 "recommendation": "Establish a regular study schedule"
             }
         
-        recent_metrics = user_history[-7:] if len(user_history) >= 7 else user_history
-        historical_completion = [m["metrics"]["completion_rate"] for m in recent_metrics]
-        historical_efficiency = [m["metrics"]["efficiency_score"] for m in recent_metrics]
+        completion_rates = [entry[1] for entry in recent]
+        efficiency_scores = [entry[2] for entry in recent]
         
-        completion_trend = self._calculate_trend(historical_completion)
-        efficiency_trend = self._calculate_trend(historical_efficiency)
+        completion_trend = self._calculate_trend(completion_rates[-7:])
+        efficiency_trend = self._calculate_trend(efficiency_scores[-7:])
         
         insights = {
             "trend": self._determine_overall_trend(completion_trend, efficiency_trend),
             "completion_trend": completion_trend,
             "efficiency_trend": efficiency_trend,
-            "current_streak": self._calculate_current_streak(user_history),
-            "weekly_improvement": self._calculate_weekly_improvement(user_history)
+            "current_streak": self._calculate_current_streak(streak_timestamps, now),
+            "weekly_improvement": self._calculate_weekly_improvement(completion_rates)
         }
         
         insights["message"] = self._generate_encouragement_message(insights, current_metrics)
@@ -166,17 +410,46 @@ class ProgressAgent:
         
         return insights
 
+    def _get_user_aggregate(self, user_id: str) -> UserProgressAggregate:
+        """Get the rolling insight aggregate for a user, seeding it from history on first use"""
+        with self._lock:
+            aggregate = self._user_aggregates.get(user_id)
+            if aggregate is not None:
+                return aggregate
+        
+        # Loading history may flush the writer queue, so do it outside the lock
+        user_records = self._user_history(user_id)
+        with self._lock:
+            aggregate = self._user_aggregates.get(user_id)
+            if aggregate is None:
+                aggregate = UserProgressAggregate()
+                for record in user_records:
+                    aggregate.add(record)
+                self._user_aggregates[user_id] = aggregate
+            return aggregate
+
     def _calculate_trend(self, values: List[float]) -> str:
         """Calculate trend from historical values"""
-        if len(values) < 2:
+        count = len(values)
+        if count < 2:
             return "stable"
         
-        recent_avg = sum(values[-3:]) / min(3, len(values))
-        previous_avg = sum(values[:-3]) / max(1, len(values) - 3) if len(values) > 3 else values[0]
+        # One pass over the values; the earlier window is the remainder of the total
+        recent_count = min(3, count)
+        total = 0.0
+        recent_total = 0.0
+        for i, value in enumerate(values):
+            total += value
+            if i >= count - recent_count:
+                recent_total += value
+        
+        recent_avg = recent_total / recent_count
+        previous_avg = (total - recent_total) / (count - recent_count) if count > recent_count else values[0]
+        difference = recent_avg - previous_avg
         
-        if recent_avg > previous_avg + 5:
+        if difference > 5:
             return "improving"
-        elif recent_avg < previous_avg - 5:
+        elif difference < -5:
             return "declining"
         else:
             return "stable"
@@ -192,19 +465,16 @@ class ProgressAgent:
         else:
             return "stable"
 
-    def _calculate_current_streak(self, user_history: List[Dict]) -> int:
-        """Calculate current consecutive days with progress"""
-        if not user_history:
+    def _calculate_current_streak(self, timestamps: List[float], now: float) -> int:
+        """Calculate current consecutive days with progress up to now from timestamps in ascending order"""
+        if not timestamps:
             return 0
             
-        current_time = time.time()
+        current_time = now
         one_day = 24 * 60 * 60
         streak = 0
         
-        sorted_history = sorted(user_history, key=lambda x: x["timestamp"], reverse=True)
-        
-        for record in sorted_history:
-            record_time = record["timestamp"]
+        for record_time in reversed(timestamps):
             if current_time - record_time <= one_day:
                 streak += 1
                 current_time = record_time
@@ -213,13 +483,13 @@ class ProgressAgent:
                 
         return streak
 
-    def _calculate_weekly_improvement(self, user_history: List[Dict]) -> float:
+    def _calculate_weekly_improvement(self, completion_rates: List[float]) -> float:
         """Calculate weekly improvement percentage"""
-        if len(user_history) < 7:
+        if len(completion_rates) < 7:
             return 0.0
             
-        current_week = [m["metrics"]["completion_rate"] for m in user_history[-7:]]
-        previous_week = [m["metrics"]["completion_rate"] for m in user_history[-14:-7]] if len(user_history) >= 14 else current_week
+        current_week = completion_rates[-7:]
+        previous_week = completion_rates[-14:-7] if len(completion_rates) >= 14 else current_week
         
         current_avg = sum(current_week) / len(current_week)
         previous_avg = sum(previous_week) / len(previous_week) if previous_week else current_avg
@@ -263,59 +533,155 @@ class ProgressAgent:
 
     def load_records(self, storage_path: Optional[str] = None) -> List[Dict[str, Any]]:
         """Load all progress records from storage"""
-        path = Path(storage_path) if storage_path else self.storage_path
-        
+        if storage_path and Path(storage_path) != self.storage_path:
+            return self._read_records(Path(storage_path))
+        
+        self._sync_with_storage()
+        with self._lock:
+            if self._records_cache is not None:
+                return list(self._records_cache)
+        
+        self.flush()
+        with self._lock:
+            if self._records_cache is None:
+                self._records_cache = self._read_records(self.storage_path)
+            return list(self._records_cache)
+
+    def _read_records(self, path: Path) -> List[Dict[str, Any]]:
+        """Parse every record in a JSONL (or legacy JSON array) file"""
         try:
             if path.exists():
-                with open(path, 'r') as f:
-                    return json.load(f)
+                with open(path, 'rb') as f:
+                    if path.suffix == ".json":
+                        return orjson.loads(f.read())
+                    return [orjson.loads(line) for line in f if line.strip()]
             return []
         except Exception as e:
             logger.error(f"Failed to load progress records: {e}")
             return []
 
+    def get_user_records(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get every stored progress record for a user, oldest first, via the per-user index"""
+        user_records = self._user_history(user_id)
+        with self._lock:
+            return list(user_records)
+
+    def _user_history(self, user_id: str) -> List[Dict[str, Any]]:
+        """Cached timestamp-ordered history for a user; shared, so callers must copy before mutating"""
+        self._sync_with_storage()
+        
+        with self._lock:
+            user_records = self._user_history_cache.get(user_id)
+            
+            if user_records is None:
+                try:
+                    with open(self.storage_path, 'rb') as f:
+                        user_records = []
+                        for offset in self._user_offsets.get(user_id, []):
+                            f.seek(offset)
+                            user_records.append(orjson.loads(f.readline()))
+                except Exception as e:
+                    logger.error(f"Failed to load progress history for user {user_id}: {e}")
+                    return []
+                
+                user_records.sort(key=_record_timestamp)
+                self._user_history_cache[user_id] = user_records
+            
+            return user_records
+
     def get_user_progress_history(self, user_id: str, days: int = 30) -> List[Dict[str, Any]]:
         """Get progress history for a specific user"""
-        all_records = self.load_records()
         cutoff_time = time.time() - (days * 24 * 60 * 60)
+        user_records = self._user_history(user_id)
         
-        user_records = [
-            record for record in all_records 
-            if record.get("user_id") == user_id and record.get("timestamp", 0) > cutoff_time
-        ]
-        
-        return sorted(user_records, key=lambda x: x.get("timestamp", 0))
+        with self._lock:
+            # History is kept in timestamp order, so the window is a tail slice
+            start = bisect.bisect_right(user_records, cutoff_time, key=_record_timestamp)
+            return user_records[start:]
 
     def compute_aggregate_metrics(self, progress_records: List[Dict]) -> Dict[str, Any]:
         """Compute aggregate metrics from progress records"""
         if not progress_records:
-            return {
-                "total_tasks": 0,
-                "completion_rate": 0,
-                "average_time_per_task_min": 0,
-                "total_study_time_hours": 0,
-                "consistency_score": 0
-            }
+            return self._empty_aggregate_metrics()
         
         total_tasks = 0
         completed_tasks = 0
         total_minutes = 0
+        min_ts = float("inf")
+        active_days = set()
+        # Bucket by local calendar day without a strftime call per record
+        utc_offset = time.localtime().tm_gmtoff
         
         for record in progress_records:
             metrics = record.get("metrics", {})
             total_tasks += metrics.get("total_tasks", 0)
             completed_tasks += metrics.get("completed_tasks", 0)
             total_minutes += metrics.get("total_duration_minutes", 0)
+            ts = record["timestamp"]
+            if ts < min_ts:
+                min_ts = ts
+            active_days.add(int((ts + utc_offset) // 86400))
+        
+        return self._build_aggregate_metrics(total_tasks, completed_tasks, total_minutes, min_ts, len(active_days))
+
+    def compute_user_aggregate_metrics(self, user_id: str, days: int = 30) -> Dict[str, Any]:
+        """Compute aggregate metrics for a user's recent window from the packed metric columns"""
+        columns = self._get_user_columns(user_id)
+        cutoff_time = time.time() - (days * 24 * 60 * 60)
         
+        with self._lock:
+            start = bisect.bisect_right(columns.timestamps, cutoff_time)
+            timestamps = columns.timestamps[start:]
+            if not timestamps:
+                return self._empty_aggregate_metrics()
+            
+            utc_offset = time.localtime().tm_gmtoff
+            active_days = {int((ts + utc_offset) // 86400) for ts in timestamps}
+            
+            return self._build_aggregate_metrics(
+                sum(columns.total_tasks[start:]),
+                sum(columns.completed_tasks[start:]),
+                sum(columns.total_duration_minutes[start:]),
+                timestamps[0],
+                len(active_days)
+            )
+
+    def _get_user_columns(self, user_id: str) -> UserMetricColumns:
+        """Get the packed metric columns for a user, building them from history on first use"""
+        with self._lock:
+            columns = self._user_columns.get(user_id)
+            if columns is not None:
+                return columns
+        
+        # Loading history may flush the writer queue, so do it outside the lock
+        user_records = self._user_history(user_id)
+        with self._lock:
+            columns = self._user_columns.get(user_id)
+            if columns is None:
+                columns = UserMetricColumns()
+                for record in user_records:
+                    columns.add(record)
+                self._user_columns[user_id] = columns
+            return columns
+
+    def _empty_aggregate_metrics(self) -> Dict[str, Any]:
+        """Aggregate metrics when there are no records"""
+        return {
+            "total_tasks": 0,
+            "completion_rate": 0,
+            "average_time_per_task_min": 0,
+            "total_study_time_hours": 0,
+            "consistency_score": 0
+        }
+
+    def _build_aggregate_metrics(self, total_tasks: int, completed_tasks: int, total_minutes: float,
+                                 earliest_timestamp: float, unique_days: int) -> Dict[str, Any]:
+        """Derive the aggregate metric report from accumulated totals"""
         completion_rate = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
         avg_time_per_task = total_minutes / completed_tasks if completed_tasks > 0 else 0
         total_study_hours = total_minutes / 60
         
-        unique_days = len(set(
-            time.strftime("%Y-%m-%d", time.localtime(record["timestamp"])) 
-            for record in progress_records
-        ))
-        total_days = min(30, (time.time() - min(record["timestamp"] for record in progress_records)) / (24 * 60 * 60))
+        total_days = min(30, (time.time() - earliest_timestamp) / (24 * 60 * 60))
         consistency_score = (unique_days / total_days) * 100 if total_days > 0 else 0
         
         return {
@@ -330,8 +696,9 @@ class ProgressAgent:
 
     def get_progress_summary(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive progress summary for a user"""
+        now = time.time()
         user_history = self.get_user_progress_history(user_id)
-        aggregate_metrics = self.compute_aggregate_metrics(user_history)
+        aggregate_metrics = self.compute_user_aggregate_metrics(user_id)
         
         if not user_history:
             return {
@@ -351,7 +718,7 @@ class ProgressAgent:
                 "average_efficiency": sum(m["efficiency_score"] for m in recent_metrics) / len(recent_metrics),
                 "session_count": len(recent_records)
             },
-            "insights": self._generate_progress_insights(user_id, recent_metrics[-1] if recent_metrics else {})
+            "insights": self._generate_progress_insights(user_id, recent_metrics[-1] if recent_metrics else {}, now)
         }
 
   
@@ -1,8 +1,187 @@
+import hashlib
+import heapq
+import math
+import re
 import time
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from types import MappingProxyType
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
 from loguru import logger
 from tools.search_tool import SearchTool
-import json
+
+def _keyword_pattern(*keywords: str) -> "re.Pattern[str]":
+    """Compile keywords into one alternation matching any of them as a substring"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+# Keyword sets matched against lowercased titles and URLs (substring semantics)
+_TRUSTED_DOMAINS_RE = _keyword_pattern("khanacademy.org", "coursera.org", "edx.org", "youtube.com",
+                                       "mit.edu", "stanford.edu", "w3schools.com", "mdn.io")
+_QUESTIONABLE_DOMAINS_RE = _keyword_pattern("blogspot.com", "wordpress.com", "tumblr.com")
+_DOCUMENT_EXTENSIONS_RE = _keyword_pattern(".pdf", ".doc", ".txt")
+_VIDEO_TERMS_RE = _keyword_pattern("video", "youtube", "vimeo")
+_INTERACTIVE_TERMS_RE = _keyword_pattern("interactive", "quiz", "exercise")
+_COURSE_TERMS_RE = _keyword_pattern("course", "tutorial", "guide")
+_BEGINNER_TERMS_RE = _keyword_pattern("beginner", "basic", "introduction", "101")
+_ADVANCED_TERMS_RE = _keyword_pattern("advanced", "expert", "master", "deep dive")
+_EDUCATIONAL_TERMS_RE = _keyword_pattern("tutorial", "course", "learn", "guide", "lesson", "explained")
+_EDUCATIONAL_DOMAIN_RE = _keyword_pattern(".edu", "academy", "course")
+_QUALITY_TERMS_RE = _keyword_pattern("official", "complete", "comprehensive", "expert")
+_SPAM_TERMS_RE = _keyword_pattern("free download", "crack", "hack", "secret")
+_LONG_FORM_TERMS_RE = _keyword_pattern("course", "comprehensive", "complete")
+
+_TRACKING_PARAMS = frozenset({"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+                              "gclid", "fbclid", "ref"})
+_TITLE_STOPWORDS = frozenset({"a", "an", "the", "and", "or", "of", "to", "in", "for", "on", "with", "how", "what", "is"})
+_TITLE_WORD_RE = re.compile(r"\w+")
+
+# Shared, read-only preferences for users without stored preferences
+_DEFAULT_PREFS = MappingProxyType({
+    "preferred_formats": ("video", "interactive", "text"),
+    "difficulty_level": "intermediate",
+    "learning_style": "visual",
+    "trusted_sources": ("Khan Academy", "Coursera", "edX", "YouTube EDU"),
+    "avoided_topics": ()
+})
+
+# _build_search_queries always emits these generic queries first, ahead of refinements
+_BASE_QUERY_COUNT = 4
+
+# Weights for relevance, educational domain, quality keywords, high reputation,
+# matched preferences and difficulty matching the requested level
+_RANKING_WEIGHTS = (40, 10, 10, 10, 5, 10)
+
+@lru_cache(maxsize=4096)
+def _url_parts(url: str) -> Tuple[str, str]:
+    """Split a URL once into its lowercased host (without www.) and path"""
+    try:
+        parts = urlsplit(url.lower())
+    except ValueError:
+        return "", ""
+    return parts.netloc.removeprefix("www."), parts.path
+
+@lru_cache(maxsize=4096)
+def _source_from_host(host: str) -> str:
+    """Extract source name from a URL host"""
+    return host.split(".", 1)[0].title()
+
+@lru_cache(maxsize=4096)
+def _source_reputation(host: str) -> str:
+    """Assess reputation of the source domain"""
+    if _TRUSTED_DOMAINS_RE.search(host):
+        return "high"
+    elif _QUESTIONABLE_DOMAINS_RE.search(host):
+        return "medium"
+    else:
+        return "unknown"
+
+@lru_cache(maxsize=4096)
+def _resource_format(title: str, path: str) -> str:
+    """Detect the format of a resource from its title and lowercased URL path"""
+    title = title.lower()
+    
+    if _DOCUMENT_EXTENSIONS_RE.search(path):
+        return "document"
+    elif _VIDEO_TERMS_RE.search(title):
+        return "video"
+    elif _INTERACTIVE_TERMS_RE.search(title):
+        return "interactive"
+    elif _COURSE_TERMS_RE.search(title):
+        return "course"
+    else:
+        return "webpage"
+
+@lru_cache(maxsize=4096)
+def _resource_duration(title: str) -> str:
+    """Estimate duration of a resource from its title"""
+    title = title.lower()
+    
+    if "quick" in title or "5 minute" in title:
+        return "5-10 minutes"
+    elif "hour" in title or "60 minute" in title:
+        return "1 hour"
+    elif _LONG_FORM_TERMS_RE.search(title):
+        return "multiple hours"
+    else:
+        return "15-30 minutes"
+
+@lru_cache(maxsize=4096)
+def _resource_difficulty(title: str) -> str:
+    """Estimate difficulty level of a resource from its title"""
+    title = title.lower()
+    
+    if _BEGINNER_TERMS_RE.search(title):
+        return "beginner"
+    elif _ADVANCED_TERMS_RE.search(title):
+        return "advanced"
+    else:
+        return "intermediate"
+
+class ResourceCache:
+    """
+    Size- and TTL-bounded cache with cost-aware LRU (v-LRU) eviction
+    
+    Mirrors the get/put surface of a TTL cache, but when full it evicts the
+    entry among the least recently used ones that was cheapest to produce and
+    least reused, rather than strictly the oldest.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float, candidate_fraction: float = 0.1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.candidate_fraction = candidate_fraction  # Least-recent share of entries considered for eviction
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []  # (expires_at, key), invalidated lazily
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a fresh cached value, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["timestamp"] >= self.ttl:
+            del self._entries[key]
+            return None
+        
+        entry["hits"] += 1
+        self._entries.move_to_end(key)
+        return entry["data"]
+
+    def put(self, key: str, data: Any, cost: float = 0.0):
+        """Cache a value; cost is how expensive it was to produce"""
+        now = time.time()
+        self._expire(now)
+        
+        self._entries[key] = {"data": data, "timestamp": now, "hits": 0, "cost": cost}
+        self._entries.move_to_end(key)
+        heapq.heappush(self._expiry_heap, (now + self.ttl, key))
+        while len(self._entries) > self.maxsize:
+            del self._entries[self._eviction_victim()]
+
+    def _expire(self, now: float):
+        """Drop every expired entry so dead data never competes with live entries for eviction"""
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            # Skip heap items left behind by a key that was re-cached or already evicted
+            if entry is not None and entry["timestamp"] + self.ttl <= now:
+                del self._entries[key]
+
+    def _eviction_victim(self) -> str:
+        """Among the least recently used entries, pick the one with the lowest caching value"""
+        candidate_count = max(1, int(len(self._entries) * self.candidate_fraction))
+        candidates = islice(self._entries.items(), candidate_count)
+        
+        def caching_value(item):
+            entry = item[1]
+            return math.log(entry["cost"] + entry["hits"] + 1e-6)
+        
+        return min(candidates, key=caching_value)[0]
 
 class ResourceAgent:
     """
@@ -12,13 +191,15 @@ class ResourceAgent:
     
     def __init__(self, search_tool: SearchTool):
         self.search_tool = search_tool
-        self.resource_cache: Dict[str, Dict[str, Any]] = {}
+        self.resource_cache = ResourceCache(maxsize=100, ttl=3600)
         self.user_preferences: Dict[str, List[str]] = {}
-        self.cache_expiry = 3600
+        self.title_similarity_threshold = 0.85
+        self.strong_match_relevance = 0.6  # Relevance above which a result counts toward stopping early
         
         logger.info("ResourceAgent initialized")
 
-    def fetch_resources(self, topic: str, user_id: Optional[str] = None, context: Optional[Dict] = None, top_k: int = 5) -> Dict[str, Any]:
+    def fetch_resources(self, topic: str, user_id: Optional[str] = None, context: Optional[Dict] = None, top_k: int = 5,
+                        strategy: str = "stop_if_enough") -> Dict[str, Any]:
         """
         Fetch relevant learning resources for a topic
         
@@ -27,34 +208,30 @@ class ResourceAgent:
             user_id: Optional user ID for personalization
             context: Additional context about learning goals
             top_k: Number of resources to return
+            strategy: "stop_if_enough" skips the refinement queries once the base
+                queries found enough strong matches; "none" always runs every query
             
         Returns:
             Curated list of resources with metadata
         """
-        logger.info(f"ResourceAgent fetching resources for topic: {topic}")
+        logger.info("ResourceAgent fetching resources for topic: {}", topic)
         
         start_time = time.time()
         
         try:
             cache_key = self._generate_cache_key(topic, user_id, context)
-            cached_result = self._get_cached_resources(cache_key)
+            cached_result = self.resource_cache.get(cache_key)
             if cached_result:
-                logger.debug(f"Using cached resources for {topic}")
+                logger.debug("Using cached resources for {}", topic)
                 return cached_result
 
             user_prefs = self._get_user_preferences(user_id) if user_id else {}
             search_queries = self._build_search_queries(topic, context, user_prefs)
             
-            all_resources = []
-            for query in search_queries:
-                search_results = self.search_tool.search(query, num_results=top_k)
-                processed_results = self._process_search_results(search_results, topic, user_prefs)
-                all_resources.extend(processed_results)
+            all_resources, queries_run = self._collect_resources(search_queries, topic, user_prefs, top_k, strategy)
             
             unique_resources = self._deduplicate_resources(all_resources)
-            ranked_resources = self._rank_resources(unique_resources, topic, context, user_prefs)
-        
-            final_resources = ranked_resources[:top_k]
+            final_resources = self._rank_resources(unique_resources, topic, context, user_prefs, top_k)
         
             categorized_resources = self._categorize_resources(final_resources)
     
@@ -65,14 +242,14 @@ class ResourceAgent:
                 "topic": topic,
                 "resources": categorized_resources,
                 "learning_path": learning_path,
-                "search_queries_used": search_queries,
+                "search_queries_used": search_queries[:queries_run],
                 "total_resources_found": len(final_resources),
                 "processing_time": time.time() - start_time
             }
             
-            self._cache_resources(cache_key, result)
+            self.resource_cache.put(cache_key, result, cost=result["processing_time"])
             
-            logger.info(f"Found {len(final_resources)} resources for {topic} in {time.time() - start_time:.2f}s")
+            logger.info("Found {} resources for {} in {:.2f}s", len(final_resources), topic, time.time() - start_time)
             
             return result
             
@@ -86,49 +263,51 @@ class ResourceAgent:
                 "fallback_resources": self._get_fallback_resources(topic)
             }
 
+    def _collect_resources(self, search_queries: List[str], topic: str, user_prefs: Dict, top_k: int,
+                           strategy: str) -> Tuple[List[Dict], int]:
+        """
+        Run the search queries and process their results
+        
+        With the stop_if_enough strategy the base queries run first as one batch
+        and the refinement queries only run if fewer than top_k * 2 strong
+        matches came back.
+        
+        Returns:
+            (processed resources, number of queries actually run)
+        """
+        if strategy == "stop_if_enough":
+            waves = [search_queries[:_BASE_QUERY_COUNT], search_queries[_BASE_QUERY_COUNT:]]
+        else:
+            waves = [search_queries]
+        
+        all_resources = []
+        queries_run = 0
+        strong_matches = 0
+        for wave in waves:
+            if not wave:
+                continue
+            if queries_run and strong_matches >= top_k * 2:
+                logger.debug("Enough strong matches after {} queries, skipping {}", queries_run, len(search_queries) - queries_run)
+                break
+            
+            for search_results in self.search_tool.search_batch(wave, num_results=top_k):
+                processed_results = self._process_search_results(search_results, topic, user_prefs)
+                all_resources.extend(processed_results)
+                strong_matches += sum(1 for resource in processed_results
+                                      if resource["relevance_score"] > self.strong_match_relevance)
+            queries_run += len(wave)
+        
+        return all_resources, queries_run
+
     def _generate_cache_key(self, topic: str, user_id: Optional[str], context: Optional[Dict]) -> str:
-        """Generate cache key from topic, user_id, and context"""
-        base_key = f"{topic.lower().replace(' ', '_')}"
-        if user_id:
-            base_key += f"_{user_id}"
-        if context:
-            context_str = str(sorted(context.items()))[:50]
-            base_key += f"_{hash(context_str)}"
-        return base_key
-
-    def _get_cached_resources(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get cached resources if they exist and are fresh"""
-        if cache_key in self.resource_cache:
-            cache_entry = self.resource_cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
-            else:
-                del self.resource_cache[cache_key]
-        return None
-
-    def _cache_resources(self, cache_key: str, data: Dict[str, Any]):
-        """Cache resource results"""
-        self.resource_cache[cache_key] = {
-            "data": data,
-            "timestamp": time.time()
-        }
-        if len(self.resource_cache) > 100:
-            oldest_key = min(self.resource_cache.keys(), 
-                           key=lambda k: self.resource_cache[k]["timestamp"])
-            del self.resource_cache[oldest_key]
+        """Generate a deterministic cache key from topic, user_id, and context"""
+        payload = {"topic": topic.lower(), "user": user_id, "ctx": context or {}}
+        digest = hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str), digest_size=8).hexdigest()
+        return f"{topic.lower().replace(' ', '_')}:{digest}"
 
     def _get_user_preferences(self, user_id: str) -> Dict[str, Any]:
-        """Get user preferences for resource personalization"""
-      
-        default_prefs = {
-            "preferred_formats": ["video", "interactive", "text"],
-            "difficulty_level": "intermediate",
-            "learning_style": "visual",
-            "trusted_sources": ["Khan Academy", "Coursera", "edX", "YouTube EDU"],
-            "avoided_topics": []
-        }
-        
-        return self.user_preferences.get(user_id, default_prefs)
+        """Get user preferences for resource personalization (read-only for the defaults)"""
+        return self.user_preferences.get(user_id, _DEFAULT_PREFS)
 
     def _build_search_queries(self, topic: str, context: Optional[Dict], user_prefs: Dict) -> List[str]:
         """Build intelligent search queries based on topic and context"""
@@ -178,18 +357,25 @@ class ResourceAgent:
         processed_results = []
         
         for result in search_results:
+            title = result.get("title", "")
+            url = result.get("link", "")
+            host, path = _url_parts(url)
+            source = _source_from_host(host)
+            resource_format = _resource_format(title, path)
+            difficulty = _resource_difficulty(title)
+            
             processed_result = {
-                "title": result.get("title", ""),
-                "url": result.get("link", ""),
-                "source": self._extract_source(result.get("link", "")),
+                "title": title,
+                "url": url,
+                "source": source,
                 "relevance_score": self._calculate_relevance(result, topic),
-                "quality_indicators": self._assess_quality(result),
-                "format": self._detect_format(result),
-                "estimated_duration": self._estimate_duration(result),
-                "difficulty_level": self._estimate_difficulty(result, topic),
+                "quality_indicators": self._assess_quality(result, host),
+                "format": resource_format,
+                "estimated_duration": _resource_duration(title),
+                "difficulty_level": difficulty,
                 "metadata": {
                     "retrieved_at": time.time(),
-                    "user_preferences_matched": self._check_preference_match(result, user_prefs)
+                    "user_preferences_matched": self._check_preference_match(resource_format, difficulty, source, user_prefs)
                 }
             }
             
@@ -200,13 +386,7 @@ class ResourceAgent:
 
     def _extract_source(self, url: str) -> str:
         """Extract source domain from URL"""
-        import urllib.parse
-        try:
-            domain = urllib.parse.urlparse(url).netloc
-            domain = domain.replace("www.", "").split(".")[0]
-            return domain.title()
-        except:
-            return "Unknown"
+        return _source_from_host(_url_parts(url)[0])
 
     def _calculate_relevance(self, result: Dict, topic: str) -> float:
         """Calculate relevance score for a search result"""
@@ -216,94 +396,52 @@ class ResourceAgent:
         matches = sum(1 for word in topic_words if word in title)
         base_score = matches / len(topic_words) if topic_words else 0
         
-        educational_terms = ["tutorial", "course", "learn", "guide", "lesson", "explained"]
-        boost = 0.2 if any(term in title for term in educational_terms) else 0
+        boost = 0.2 if _EDUCATIONAL_TERMS_RE.search(title) else 0
         
         return min(1.0, base_score + boost)
 
-    def _assess_quality(self, result: Dict) -> Dict[str, Any]:
+    def _assess_quality(self, result: Dict, host: Optional[str] = None) -> Dict[str, Any]:
         """Assess quality of a resource based on available information"""
         title = result.get("title", "").lower()
         url = result.get("link", "").lower()
+        if host is None:
+            host = _url_parts(url)[0]
         
         quality_indicators = {
-            "has_educational_domain": any(domain in url for domain in [".edu", "academy", "course"]),
-            "has_quality_keywords": any(keyword in title for keyword in 
-                                      ["official", "complete", "comprehensive", "expert"]),
-            "avoids_spam_keywords": not any(keyword in title for keyword in 
-                                          ["free download", "crack", "hack", "secret"]),
-            "source_reputation": self._assess_source_reputation(result.get("link", ""))
+            "has_educational_domain": bool(_EDUCATIONAL_DOMAIN_RE.search(url)),
+            "has_quality_keywords": bool(_QUALITY_TERMS_RE.search(title)),
+            "avoids_spam_keywords": not _SPAM_TERMS_RE.search(title),
+            "source_reputation": _source_reputation(host)
         }
         
         return quality_indicators
 
     def _assess_source_reputation(self, url: str) -> str:
         """Assess reputation of the source domain"""
-        trusted_domains = ["khanacademy.org", "coursera.org", "edx.org", "youtube.com", 
-                          "mit.edu", "stanford.edu", "w3schools.com", "mdn.io"]
-        questionable_domains = ["blogspot.com", "wordpress.com", "tumblr.com"]
-        
-        domain = url.lower()
-        if any(trusted in domain for trusted in trusted_domains):
-            return "high"
-        elif any(questionable in domain for questionable in questionable_domains):
-            return "medium"
-        else:
-            return "unknown"
+        return _source_reputation(_url_parts(url)[0])
 
     def _detect_format(self, result: Dict) -> str:
         """Detect the format of the resource"""
-        title = result.get("title", "").lower()
-        url = result.get("link", "").lower()
-        
-        if any(ext in url for ext in [".pdf", ".doc", ".txt"]):
-            return "document"
-        elif any(keyword in title for keyword in ["video", "youtube", "vimeo"]):
-            return "video"
-        elif any(keyword in title for keyword in ["interactive", "quiz", "exercise"]):
-            return "interactive"
-        elif any(keyword in title for keyword in ["course", "tutorial", "guide"]):
-            return "course"
-        else:
-            return "webpage"
+        return _resource_format(result.get("title", ""), _url_parts(result.get("link", ""))[1])
 
     def _estimate_duration(self, result: Dict) -> str:
         """Estimate duration of the resource"""
-        title = result.get("title", "").lower()
-        
-        if "quick" in title or "5 minute" in title:
-            return "5-10 minutes"
-        elif "hour" in title or "60 minute" in title:
-            return "1 hour"
-        elif any(term in title for term in ["course", "comprehensive", "complete"]):
-            return "multiple hours"
-        else:
-            return "15-30 minutes"
+        return _resource_duration(result.get("title", ""))
 
     def _estimate_difficulty(self, result: Dict, topic: str) -> str:
         """Estimate difficulty level of the resource"""
-        title = result.get("title", "").lower()
-        
-        if any(term in title for term in ["beginner", "basic", "introduction", "101"]):
-            return "beginner"
-        elif any(term in title for term in ["advanced", "expert", "master", "deep dive"]):
-            return "advanced"
-        else:
-            return "intermediate"
+        return _resource_difficulty(result.get("title", ""))
 
-    def _check_preference_match(self, result: Dict, user_prefs: Dict) -> List[str]:
-        """Check which user preferences this resource matches"""
+    def _check_preference_match(self, resource_format: str, difficulty: str, source: str, user_prefs: Dict) -> List[str]:
+        """Check which user preferences a resource matches, given its already-classified attributes"""
         matched_preferences = []
         
-        resource_format = self._detect_format(result)
         if resource_format in user_prefs.get("preferred_formats", []):
             matched_preferences.append("format")
             
-        resource_difficulty = self._estimate_difficulty(result, "")
-        if resource_difficulty == user_prefs.get("difficulty_level", "intermediate"):
+        if difficulty == user_prefs.get("difficulty_level", "intermediate"):
             matched_preferences.append("difficulty")
             
-        source = self._extract_source(result.get("link", ""))
         if source in user_prefs.get("trusted_sources", []):
             matched_preferences.append("trusted_source")
             
@@ -312,44 +450,79 @@ class ResourceAgent:
     def _deduplicate_resources(self, resources: List[Dict]) -> List[Dict]:
         """Remove duplicate resources based on URL and title similarity"""
         seen_urls = set()
+        title_keys: List[frozenset] = []
+        titles_by_token: Dict[str, List[int]] = {}
         unique_resources = []
         
         for resource in resources:
-            url = resource.get("url", "")
-            if url not in seen_urls:
-                seen_urls.add(url)
-                unique_resources.append(resource)
+            url = self._normalize_url(resource.get("url", ""))
+            if url in seen_urls:
+                continue
+            
+            title_key = self._title_key(resource.get("title", ""))
+            if title_key:
+                # Only titles sharing a token can be near-duplicates
+                candidates = {index for token in title_key for index in titles_by_token.get(token, ())}
+                if any(self._jaccard(title_key, title_keys[index]) > self.title_similarity_threshold
+                       for index in candidates):
+                    continue
+                for token in title_key:
+                    titles_by_token.setdefault(token, []).append(len(title_keys))
+                title_keys.append(title_key)
+            
+            seen_urls.add(url)
+            unique_resources.append(resource)
         
         return unique_resources
 
-    def _rank_resources(self, resources: List[Dict], topic: str, context: Optional[Dict], user_prefs: Dict) -> List[Dict]:
-        """Rank resources by relevance and quality"""
-        
-        def scoring_function(resource):
-            score = 0
-            
-            score += resource.get("relevance_score", 0) * 40
-          
-            quality = resource.get("quality_indicators", {})
-            if quality.get("has_educational_domain"):
-                score += 10
-            if quality.get("has_quality_keywords"):
-                score += 10
-            if quality.get("source_reputation") == "high":
-                score += 10
-            
-            prefs_matched = len(resource.get("metadata", {}).get("user_preferences_matched", []))
-            score += prefs_matched * 5
-            
-            if context:
-                resource_level = resource.get("difficulty_level", "intermediate")
-                context_level = context.get("level", "intermediate")
-                if resource_level == context_level:
-                    score += 10
-            
-            return score
+    def _normalize_url(self, url: str) -> str:
+        """Canonical URL form for deduplication: no scheme, fragment, tracking params or trailing slash"""
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        query = urlencode(sorted(
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith("utm_")
+        ))
+        path = parts.path.rstrip("/")
+        return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+    def _title_key(self, title: str) -> frozenset:
+        """Token set of a title with stopwords removed, for near-duplicate detection"""
+        return frozenset(_TITLE_WORD_RE.findall(title.lower())) - _TITLE_STOPWORDS
+
+    def _jaccard(self, first: frozenset, second: frozenset) -> float:
+        """Jaccard similarity of two token sets"""
+        return len(first & second) / len(first | second)
+
+    def _rank_resources(self, resources: List[Dict], topic: str, context: Optional[Dict], user_prefs: Dict,
+                        top_k: Optional[int] = None) -> List[Dict]:
+        """Rank resources by relevance and quality, keeping only the best top_k when given"""
+        context_level = context.get("level", "intermediate") if context else None
+        scores = [
+            sum(weight * feature for weight, feature in zip(_RANKING_WEIGHTS, self._ranking_features(resource, context_level)))
+            for resource in resources
+        ]
         
-        return sorted(resources, key=scoring_function, reverse=True)
+        if top_k is None:
+            order = sorted(range(len(resources)), key=scores.__getitem__, reverse=True)
+        else:
+            # Partial selection; nlargest keeps input order among equal scores like sorted()
+            order = heapq.nlargest(top_k, range(len(resources)), key=scores.__getitem__)
+        return [resources[i] for i in order]
+
+    def _ranking_features(self, resource: Dict, context_level: Optional[str]) -> Tuple[float, ...]:
+        """Numeric ranking features for a resource, aligned with _RANKING_WEIGHTS"""
+        quality = resource.get("quality_indicators", {})
+        return (
+            resource.get("relevance_score", 0),
+            bool(quality.get("has_educational_domain")),
+            bool(quality.get("has_quality_keywords")),
+            quality.get("source_reputation") == "high",
+            len(resource.get("metadata", {}).get("user_preferences_matched", [])),
+            context_level is not None and resource.get("difficulty_level", "intermediate") == context_level
+        )
 
     def _categorize_resources(self, resources: List[Dict]) -> Dict[str, List[Dict]]:
         """Categorize resources by type and difficulty"""
@@ -363,7 +536,7 @@ class ResourceAgent:
         
         for resource in resources:
             difficulty = resource.get("difficulty_level", "intermediate")
-            duration = resource.get("estimated_duration", "")
+            duration = resource.get("estimated_duration", "").lower()
             format_type = resource.get("format", "")
             
             if difficulty == "beginner":
@@ -373,18 +546,25 @@ class ResourceAgent:
             elif difficulty == "advanced":
                 categorized["advanced"].append(resource)
             
-            if "quick" in duration.lower() or format_type == "webpage":
+            if "quick" in duration or format_type == "webpage":
                 categorized["quick_reference"].append(resource)
-            elif "multiple" in duration.lower() or format_type == "course":
+            elif "multiple" in duration or format_type == "course":
                 categorized["comprehensive_guides"].append(resource)
         
         return categorized
 
     def _generate_learning_path(self, resources: List[Dict], topic: str) -> Dict[str, Any]:
         """Generate a suggested learning path using the resources"""
-        beginners = [r for r in resources if r.get("difficulty_level") == "beginner"]
-        intermediate = [r for r in resources if r.get("difficulty_level") == "intermediate"]
-        advanced = [r for r in resources if r.get("difficulty_level") == "advanced"]
+        beginners, intermediate, advanced = [], [], []
+        by_difficulty = {"beginner": (beginners, 2), "intermediate": (intermediate, 2), "advanced": (advanced, 1)}
+        open_slots = 5
+        for resource in resources:
+            bucket, limit = by_difficulty.get(resource.get("difficulty_level"), (None, 0))
+            if bucket is not None and len(bucket) < limit:
+                bucket.append(resource)
+                open_slots -= 1
+                if not open_slots:
+                    break
         
         return {
             "path_name": f"Learning Path for {topic}",
@@ -393,21 +573,21 @@ class ResourceAgent:
                     "step": 1,
                     "title": "Get Started",
                     "description": "Learn the basics and fundamental concepts",
-                    "recommended_resources": beginners[:2],
+                    "recommended_resources": beginners,
                     "estimated_time": "1-2 hours"
                 },
                 {
                     "step": 2,
                     "title": "Build Understanding", 
                     "description": "Dive deeper into core concepts and applications",
-                    "recommended_resources": intermediate[:2],
+                    "recommended_resources": intermediate,
                     "estimated_time": "2-3 hours"
                 },
                 {
                     "step": 3,
                     "title": "Master Advanced Topics",
                     "description": "Explore advanced applications and expert techniques",
-                    "recommended_resources": advanced[:1],
+                    "recommended_resources": advanced,
                     "estimated_time": "3+ hours"
                 }
             ],
@@ -449,7 +629,7 @@ class ResourceAgent:
     def update_user_preferences(self, user_id: str, preferences: Dict[str, Any]):
         """Update user preferences for resource recommendations"""
         self.user_preferences[user_id] = preferences
-        logger.info(f"Updated preferences for user {user_id}")
+        logger.info("Updated preferences for user {}", user_id)
 
     def get_resource_stats(self) -> Dict[str, Any]:
         """Get statistics about resource fetching"""
@@ -457,7 +637,7 @@ class ResourceAgent:
             "cache_size": len(self.resource_cache),
             "cache_hit_rate": "N/A",
             "user_preferences_stored": len(self.user_preferences),
-            "cache_expiry_seconds": self.cache_expiry
+            "cache_expiry_seconds": self.resource_cache.ttl
         }
 
 
@@ -1,9 +1,58 @@
 import os
+import random
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 import google.generativeai as genai
 from typing import Optional
 
+# Mock provider dispatch: keyword patterns (case-insensitive substring match) and canned responses
+_MOCK_PLAN_ACTION_RE = re.compile(r"create|generate|plan", re.IGNORECASE)
+_MOCK_PLAN_SUBJECT_RE = re.compile(r"study|project|roadmap|schedule", re.IGNORECASE)
+_MOCK_ADJUST_RE = re.compile(r"adjust|revise|optimize|update", re.IGNORECASE)
+_MOCK_MOTIVATION_RE = re.compile(r"motivat|nudge|encourage|support", re.IGNORECASE)
+
+_MOCK_PLAN_RESPONSE = '''{
+                "week_1": [
+                    {"task": "Research and gather resources", "duration_h": 3, "priority": "high"},
+                    {"task": "Define project scope and objectives", "duration_h": 2, "priority": "high"},
+                    {"task": "Set up development environment", "duration_h": 1, "priority": "medium"}
+                ],
+                "week_2": [
+                    {"task": "Implement core functionality", "duration_h": 6, "priority": "high"},
+                    {"task": "Write unit tests", "duration_h": 3, "priority": "medium"},
+                    {"task": "Documentation draft", "duration_h": 2, "priority": "low"}
+                ],
+                "week_3": [
+                    {"task": "Integration testing", "duration_h": 4, "priority": "high"},
+                    {"task": "Performance optimization", "duration_h": 3, "priority": "medium"},
+                    {"task": "Final documentation", "duration_h": 2, "priority": "medium"}
+                ]
+            }'''
+
+_MOCK_ADJUST_RESPONSE = '''{
+                "adjusted_plan": {
+                    "day_1": [
+                        {"task": "Review previous work", "duration_h": 1, "priority": "high"},
+                        {"task": "Light revision of key concepts", "duration_h": 1.5, "priority": "medium"}
+                    ],
+                    "day_2": [
+                        {"task": "Practice problems - focused session", "duration_h": 2, "priority": "high"},
+                        {"task": "Study new materials", "duration_h": 1, "priority": "medium"}
+                    ]
+                },
+                "reasoning": "Reduced workload to maintain sustainable pace while focusing on core concepts"
+            }'''
+
+_MOCK_MOTIVATIONAL_RESPONSES = (
+    "Great progress so far! Remember: consistent small steps lead to big achievements. Try a 25-minute focused session next.",
+    "You're making solid progress! Consider breaking down larger tasks into smaller, manageable chunks to maintain momentum.",
+    "Excellent work! Don't forget to take short breaks - they improve focus and retention. Your dedication is paying off!",
+    "You're on the right track! Remember why you started this journey. Each completed task brings you closer to your goal."
+)
+
 class LLMClient:
     """
     Enhanced LLM client wrapper with Gemini, OpenAI, and mock providers.
@@ -15,6 +64,16 @@ class LLMClient:
         self.provider = os.getenv("LLM_PROVIDER", "mock")
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.gemini_key = os.getenv("GEMINI_API_KEY")
+        self.max_batch_workers = 8
+        
+        # One keep-alive session so repeated calls reuse the TLS connection
+        self._http = requests.Session()
+        if self.openai_key:
+            self._http.headers.update({
+                "Authorization": f"Bearer {self.openai_key}",
+                "Content-Type": "application/json"
+            })
+        self._http.mount("https://", HTTPAdapter(pool_maxsize=self.max_batch_workers))
       
         if self.provider == "gemini" and self.gemini_key:
             genai.configure(api_key=self.gemini_key)
@@ -22,7 +81,8 @@ class LLMClient:
         
         logger.info(f"LLMClient initialized with provider: {self.provider}")
 
-    def generate(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> str:
+    def generate(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7,
+                 cache_prefix: Optional[str] = None) -> str:
         """
         Generate response using configured LLM provider
         
@@ -30,6 +90,7 @@ class LLMClient:
             prompt: Input prompt
             max_tokens: Maximum tokens to generate
             temperature: Creativity temperature (0.0-1.0)
+            cache_prefix: Static text sent ahead of the prompt so the provider can cache it
             
         Returns:
             Generated text response
@@ -38,11 +99,11 @@ class LLMClient:
         
         try:
             if self.provider == "mock":
-                return self._mock_response(prompt)
+                return self._mock_response((cache_prefix or "") + prompt)
             elif self.provider == "openai":
-                return self._openai_response(prompt, max_tokens, temperature)
+                return self._openai_response(prompt, max_tokens, temperature, cache_prefix)
             elif self.provider == "gemini":
-                return self._gemini_response(prompt, max_tokens, temperature)
+                return self._gemini_response((cache_prefix or "") + prompt, max_tokens, temperature)
             else:
                 raise ValueError(f"Unsupported LLM provider: {self.provider}")
                 
@@ -52,75 +113,38 @@ class LLMClient:
 
     def _mock_response(self, prompt: str) -> str:
         """Generate mock responses for offline testing"""
-        prompt_lower = prompt.lower()
-
-        if any(keyword in prompt_lower for keyword in ["create", "generate", "plan"]) and \
-           any(keyword in prompt_lower for keyword in ["study", "project", "roadmap", "schedule"]):
-            return '''{
-                "week_1": [
-                    {"task": "Research and gather resources", "duration_h": 3, "priority": "high"},
-                    {"task": "Define project scope and objectives", "duration_h": 2, "priority": "high"},
-                    {"task": "Set up development environment", "duration_h": 1, "priority": "medium"}
-                ],
-                "week_2": [
-                    {"task": "Implement core functionality", "duration_h": 6, "priority": "high"},
-                    {"task": "Write unit tests", "duration_h": 3, "priority": "medium"},
-                    {"task": "Documentation draft", "duration_h": 2, "priority": "low"}
-                ],
-                "week_3": [
-                    {"task": "Integration testing", "duration_h": 4, "priority": "high"},
-                    {"task": "Performance optimization", "duration_h": 3, "priority": "medium"},
-                    {"task": "Final documentation", "duration_h": 2, "priority": "medium"}
-                ]
-            }'''
+        if _MOCK_PLAN_ACTION_RE.search(prompt) and _MOCK_PLAN_SUBJECT_RE.search(prompt):
+            return _MOCK_PLAN_RESPONSE
     
-        if any(keyword in prompt_lower for keyword in ["adjust", "revise", "optimize", "update"]):
-            return '''{
-                "adjusted_plan": {
-                    "day_1": [
-                        {"task": "Review previous work", "duration_h": 1, "priority": "high"},
-                        {"task": "Light revision of key concepts", "duration_h": 1.5, "priority": "medium"}
-                    ],
-                    "day_2": [
-                        {"task": "Practice problems - focused session", "duration_h": 2, "priority": "high"},
-                        {"task": "Study new materials", "duration_h": 1, "priority": "medium"}
-                    ]
-                },
-                "reasoning": "Reduced workload to maintain sustainable pace while focusing on core concepts"
-            }'''
+        if _MOCK_ADJUST_RE.search(prompt):
+            return _MOCK_ADJUST_RESPONSE
       
-        if any(keyword in prompt_lower for keyword in ["motivat", "nudge", "encourage", "support"]):
-            motivational_responses = [
-                "Great progress so far! Remember: consistent small steps lead to big achievements. Try a 25-minute focused session next.",
-                "You're making solid progress! Consider breaking down larger tasks into smaller, manageable chunks to maintain momentum.",
-                "Excellent work! Don't forget to take short breaks - they improve focus and retention. Your dedication is paying off!",
-                "You're on the right track! Remember why you started this journey. Each completed task brings you closer to your goal."
-            ]
-            import random
-            return random.choice(motivational_responses)
+        if _MOCK_MOTIVATION_RE.search(prompt):
+            return random.choice(_MOCK_MOTIVATIONAL_RESPONSES)
 
         return "I understand your request. Based on the information provided, I recommend proceeding with a structured approach and regular progress checks."
 
-    def _openai_response(self, prompt: str, max_tokens: int, temperature: float) -> str:
+    def _openai_response(self, prompt: str, max_tokens: int, temperature: float,
+                         cache_prefix: Optional[str] = None) -> str:
         """Generate response using OpenAI API"""
         if not self.openai_key:
             raise RuntimeError("OPENAI_API_KEY not set in environment")
             
         url = "https://api.openai.com/v1/chat/completions"
+        messages = [{"role": "user", "content": prompt}]
+        if cache_prefix:
+            # OpenAI caches identical leading messages automatically
+            messages.insert(0, {"role": "system", "content": cache_prefix})
         payload = {
             "model": "gpt-4",
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature,
             "top_p": 0.9
         }
-        headers = {
-            "Authorization": f"Bearer {self.openai_key}",
-            "Content-Type": "application/json"
-        }
         
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=30)
+            resp = self._http.post(url, json=payload, timeout=30)
             resp.raise_for_status()
             data = resp.json()
             return data["choices"][0]["message"]["content"]
@@ -153,15 +177,26 @@ class LLMClient:
             logger.error(f"Gemini API request failed: {e}")
             raise
 
-    def batch_generate(self, prompts: list, max_tokens: int = 256) -> list:
+    def batch_generate(self, prompts: list, max_tokens: int = 256, cache_prefix: Optional[str] = None) -> list:
         """
-        Generate responses for multiple prompts (sequential for simplicity)
-        In production, this could be optimized with parallel requests
+        Generate responses for multiple prompts
+        
+        Remote providers are called concurrently so the batch takes about as
+        long as its slowest request; the mock provider runs inline. A shared
+        cache_prefix is sent ahead of every prompt so the provider only bills
+        the static part once per cache window.
+        
+        Returns:
+            Responses in the same order as prompts
         """
-        results = []
-        for prompt in prompts:
-            results.append(self.generate(prompt, max_tokens))
-        return results
+        if self.provider == "mock" or len(prompts) <= 1:
+            return [self.generate(prompt, max_tokens, cache_prefix=cache_prefix) for prompt in prompts]
+        
+        workers = min(self.max_batch_workers, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda prompt: self.generate(prompt, max_tokens, cache_prefix=cache_prefix), prompts
+            ))
 
     def get_usage_metrics(self) -> dict:
         """Get usage metrics for observability"""
@@ -1,73 +1,253 @@
-import json
+import atexit
+import bisect
+import heapq
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+import orjson
 from loguru import logger
 import time
 
+def _progress_timestamp(record: Dict[str, Any]) -> float:
+    """Sort key keeping progress_history in timestamp order"""
+    return record.get("timestamp", 0)
+
+def _entry_counts(user_memory: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """Number of plans and progress records held for a user"""
+    if not user_memory:
+        return 0, 0
+    return len(user_memory.get("plans", [])), len(user_memory.get("progress_history", []))
+
 class MemoryBank:
     """
     Enhanced Memory Bank for long-term memory storage with compaction and retrieval
     Supports user-specific memory with automatic persistence
+    
+    Each user is stored in its own file under users_path, so a write only
+    touches the users that changed. A legacy single-file store at path is
+    migrated into per-user files on first load. Only the most recently used
+    users are kept in memory; the rest are read back from disk on demand.
     """
     
     def __init__(self, path: str = "memory/memory_store.json"):
         self.path = Path(path)
-        self.data: Dict[str, Any] = {}
+        self.users_path = self.path.parent / "users"
+        self.data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # Resident users, least recently used first
+        self.max_resident_users = 1024
+        self._known_users: Set[str] = set()
         self.access_timestamps: Dict[str, float] = {}
+        self.versions: Dict[str, int] = {}  # Bumped when a user is created or deleted and on every add_plan
+        self.flush_interval = 2.0  # Seconds to coalesce mutations before writing to disk
+        self.access_write_interval = 30.0  # Minimum seconds between persisted last_accessed updates
+        self._lock = threading.RLock()
+        self._dirty_users: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._totals: Optional[Dict[str, int]] = None  # Running stats, built on the first get_memory_stats call
         self._load()
+        atexit.register(self.flush)
         
-        logger.info(f"MemoryBank initialized with {len(self.data)} users")
+        logger.info(f"MemoryBank initialized with {len(self._known_users)} users")
+
+    def _user_file(self, user_id: str) -> Path:
+        """Path of the file holding one user's memory"""
+        return self.users_path / f"{quote(user_id, safe='')}.json"
 
     def _load(self):
-        """Load memory data from disk"""
+        """Discover stored users; their memory is read lazily on first access"""
+        self.data = OrderedDict()
+        if self.path.exists():
+            self._migrate_legacy_store()
+        
+        if not self.users_path.exists():
+            logger.debug("No existing memory found, starting fresh")
+            return
+        
+        self._known_users = {unquote(user_file.stem) for user_file in self.users_path.glob("*.json")}
+        logger.debug(f"Found {len(self._known_users)} users in {self.users_path}")
+
+    def _read_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Read one user's memory from disk"""
+        user_file = self._user_file(user_id)
         try:
-            if self.path.exists():
-                with open(self.path, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-                logger.debug(f"Loaded memory from {self.path}")
-            else:
-                self.data = {}
-                logger.debug("No existing memory found, starting fresh")
+            user_memory = orjson.loads(user_file.read_bytes())
+        except Exception as e:
+            logger.error(f"Failed to load memory from {user_file}: {e}")
+            return None
+        
+        # Older files may hold progress out of order; get_progress_trend relies on it being sorted
+        if isinstance(user_memory.get("progress_history"), list):
+            user_memory["progress_history"].sort(key=_progress_timestamp)
+        return user_memory
+
+    def _peek_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's memory without making it resident, so scans don't evict hot users"""
+        with self._lock:
+            if user_id in self.data:
+                return self.data[user_id]
+        if user_id in self._known_users:
+            return self._read_user(user_id)
+        return None
+
+    def _resident_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's memory, loading it into the resident set if needed; None if unknown"""
+        with self._lock:
+            if user_id in self.data:
+                self.data.move_to_end(user_id)
+                return self.data[user_id]
+            
+            user_memory = self._read_user(user_id) if user_id in self._known_users else None
+            if user_memory is not None:
+                self._add_resident(user_id, user_memory)
+            return user_memory
+
+    def _ensure_user(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's memory, creating an empty one for unknown users"""
+        with self._lock:
+            user_memory = self._resident_user(user_id)
+            if user_memory is None:
+                user_memory = {
+                    "profile": {},
+                    "plans": [],
+                    "progress_history": [],
+                    "preferences": {},
+                    "interaction_patterns": {},
+                    "created_at": time.time(),
+                    "last_accessed": time.time()
+                }
+                self._known_users.add(user_id)
+                self._add_resident(user_id, user_memory)
+                self._bump_version(user_id)
+                self._mark_dirty(user_id)
+            return user_memory
+
+    def _add_resident(self, user_id: str, user_memory: Dict[str, Any]):
+        """Make a user's memory resident, evicting idle users if over capacity"""
+        self.data[user_id] = user_memory
+        self._evict_idle_users()
+
+    def _evict_idle_users(self):
+        """Drop least recently used users beyond max_resident_users, writing unsaved changes first"""
+        while len(self.data) > self.max_resident_users:
+            user_id = next(iter(self.data))
+            if user_id in self._dirty_users:
+                if not self._persist_user(user_id):
+                    break
+                self._dirty_users.discard(user_id)
+            del self.data[user_id]
+
+    def _migrate_legacy_store(self):
+        """Split a single-file memory store into per-user files"""
+        try:
+            legacy_data = orjson.loads(self.path.read_bytes())
         except Exception as e:
             logger.error(f"Failed to load memory from {self.path}: {e}")
-            self.data = {}
+            return
+        
+        failed = [user_id for user_id, user_memory in legacy_data.items()
+                  if not self._persist_user(user_id, user_memory)]
+        if not failed:
+            self.path.rename(self.path.with_suffix(".migrated"))
+            logger.info(f"Migrated {len(legacy_data)} users from {self.path} to {self.users_path}")
 
     def _persist(self):
-        """Persist memory data to disk"""
+        """Persist the memory of every user changed since the last write"""
+        with self._lock:
+            dirty_users, self._dirty_users = self._dirty_users, set()
+            for user_id in dirty_users:
+                if not self._persist_user(user_id):
+                    self._dirty_users.add(user_id)
+
+    def _persist_user(self, user_id: str, user_memory: Optional[Dict[str, Any]] = None) -> bool:
+        """Write one user's memory to disk, or remove its file if the user was deleted"""
+        user_file = self._user_file(user_id)
+        if user_memory is None:
+            user_memory = self.data.get(user_id)
         try:
-            self.path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-            logger.debug(f"Persisted memory to {self.path}")
+            old_size = user_file.stat().st_size if self._totals is not None and user_file.exists() else 0
+            if user_memory is None:
+                user_file.unlink(missing_ok=True)
+                self._adjust_file_size(-old_size)
+                return True
+            self.users_path.mkdir(parents=True, exist_ok=True)
+            payload = orjson.dumps(user_memory, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            
+            # Write to a temp file and swap it in so a crash never leaves a torn user file
+            temp_file = user_file.with_suffix(".tmp")
+            with open(temp_file, 'wb', buffering=64 * 1024) as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, user_file)
+            self._adjust_file_size(len(payload) - old_size)
+            logger.debug(f"Persisted memory to {user_file}")
+            return True
         except Exception as e:
-            logger.error(f"Failed to persist memory to {self.path}: {e}")
+            logger.error(f"Failed to persist memory to {user_file}: {e}")
+            return False
+
+    def _adjust_totals(self, before: Tuple[int, int], after: Tuple[int, int]):
+        """Apply a change in a user's plan/progress counts to the running stats"""
+        if self._totals is not None:
+            self._totals["plans"] += after[0] - before[0]
+            self._totals["progress"] += after[1] - before[1]
+
+    def _adjust_file_size(self, delta: int):
+        """Apply a change in on-disk size to the running stats"""
+        if self._totals is not None:
+            self._totals["file_size"] += delta
+
+    def _mark_dirty(self, user_id: str):
+        """Schedule a write of a user's changes, coalescing mutations within flush_interval"""
+        with self._lock:
+            self._dirty_users.add(user_id)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty_users:
+                self._persist()
+
+    def version(self, user_id: str) -> int:
+        """Cheap counter of a user's plan history, usable as a cache key component"""
+        return self.versions.get(user_id, 0)
+
+    def _bump_version(self, user_id: str):
+        """Record that a user's memory changed"""
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
 
     def get_user_memory(self, user_id: str) -> Dict[str, Any]:
         """
-        Get complete memory for a user
+        Get complete memory for a user without modifying it
         
         Args:
             user_id: Unique user identifier
             
         Returns:
-            User memory dictionary
+            User memory dictionary, empty for unknown users
         """
-        self.access_timestamps[user_id] = time.time()
-        user_memory = self.data.get(user_id, {})
-      
-        if user_id not in self.data:
-            self.data[user_id] = {
-                "profile": {},
-                "plans": [],
-                "progress_history": [],
-                "preferences": {},
-                "interaction_patterns": {},
-                "created_at": time.time(),
-                "last_accessed": time.time()
-            }
-            
-        self.data[user_id]["last_accessed"] = time.time()
-        return user_memory
+        user_memory = self._resident_user(user_id)
+        return user_memory if user_memory is not None else {}
+
+    def touch_user(self, user_id: str):
+        """Record an access to a user's memory, creating it if needed"""
+        now = time.time()
+        self.access_timestamps[user_id] = now
+        with self._lock:
+            user_memory = self._ensure_user(user_id)
+            # Only persist last_accessed once it has moved meaningfully, so frequent touches don't dirty the file
+            if now - user_memory.get("last_accessed", 0) > self.access_write_interval:
+                user_memory["last_accessed"] = now
+                self._mark_dirty(user_id)
 
     def update_user_memory(self, user_id: str, memory_updates: Dict[str, Any]):
         """
@@ -77,89 +257,87 @@ class MemoryBank:
             user_id: Unique user identifier
             memory_updates: Dictionary of memory updates
         """
-        if user_id not in self.data:
-            self.data[user_id] = {
-                "profile": {},
-                "plans": [],
-                "progress_history": [],
-                "preferences": {},
-                "interaction_patterns": {},
-                "created_at": time.time(),
-                "last_accessed": time.time()
-            }
-        
-        for key, value in memory_updates.items():
-            if key in ["plans", "progress_history"] and isinstance(value, list):
-                # Append to lists
-                if key not in self.data[user_id]:
-                    self.data[user_id][key] = []
-                self.data[user_id][key].extend(value)
-                
-                if len(self.data[user_id][key]) > 20:
-                    self.data[user_id][key] = self.data[user_id][key][-20:]
+        with self._lock:
+            user_memory = self._ensure_user(user_id)
+            counts_before = _entry_counts(user_memory)
+            
+            for key, value in memory_updates.items():
+                if key in ["plans", "progress_history"] and isinstance(value, list):
+                    # Append to lists, trimming the oldest entries in place
+                    entries = user_memory.setdefault(key, [])
+                    entries.extend(value)
+                    if key == "progress_history":
+                        entries.sort(key=_progress_timestamp)
                     
-            elif isinstance(value, dict) and key in self.data[user_id] and isinstance(self.data[user_id][key], dict):
-                self.data[user_id][key].update(value)
-            else:
-    
-                self.data[user_id][key] = value
+                    if len(entries) > 20:
+                        del entries[:-20]
+                        
+                elif isinstance(value, dict) and key in user_memory and isinstance(user_memory[key], dict):
+                    user_memory[key].update(value)
+                else:
         
-        self.data[user_id]["last_updated"] = time.time()
-        self._persist()
+                    user_memory[key] = value
+            
+            user_memory["last_updated"] = time.time()
+            self._adjust_totals(counts_before, _entry_counts(user_memory))
+            self._mark_dirty(user_id)
         logger.debug(f"Updated memory for user {user_id}")
 
     def add_plan(self, user_id: str, plan_data: Dict[str, Any]):
         """Add a new plan to user memory"""
-        if user_id not in self.data:
-            self.get_user_memory(user_id)  
-            
         plan_record = {
             "plan_data": plan_data,
             "created_at": time.time(),
             "plan_id": f"plan_{int(time.time())}"
         }
         
-        self.data[user_id]["plans"].append(plan_record)
-        self._persist()
+        with self._lock:
+            self._ensure_user(user_id)["plans"].append(plan_record)
+            self._adjust_totals((0, 0), (1, 0))
+            self._bump_version(user_id)
+            self._mark_dirty(user_id)
         logger.info(f"Added new plan for user {user_id}")
 
     def add_progress_record(self, user_id: str, progress_data: Dict[str, Any]):
         """Add progress record to user memory"""
-        if user_id not in self.data:
-            self.get_user_memory(user_id)  
-            
         progress_record = {
             **progress_data,
             "timestamp": time.time(),
             "record_id": f"progress_{int(time.time())}"
         }
         
-        self.data[user_id]["progress_history"].append(progress_record)
-        self._persist()
+        with self._lock:
+            bisect.insort(self._ensure_user(user_id)["progress_history"], progress_record, key=_progress_timestamp)
+            self._adjust_totals((0, 0), (0, 1))
+            self._mark_dirty(user_id)
         logger.debug(f"Added progress record for user {user_id}")
 
     def get_recent_plans(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get most recent plans for a user"""
         user_memory = self.get_user_memory(user_id)
         plans = user_memory.get("plans", [])
-        return sorted(plans, key=lambda x: x.get("created_at", 0), reverse=True)[:limit]
+        return heapq.nlargest(limit, plans, key=lambda x: x.get("created_at", 0))
 
     def get_progress_trend(self, user_id: str, days: int = 7) -> Dict[str, Any]:
         """Calculate progress trends for a user over specified days"""
         user_memory = self.get_user_memory(user_id)
         progress_history = user_memory.get("progress_history", [])
         
+        # progress_history is kept sorted by timestamp, so the window is a tail slice
         cutoff_time = time.time() - (days * 24 * 60 * 60)
-        recent_progress = [p for p in progress_history if p.get("timestamp", 0) > cutoff_time]
+        start = bisect.bisect_right(progress_history, cutoff_time, key=_progress_timestamp)
+        recent_records = len(progress_history) - start
+        total_tasks = 0
+        completed_tasks = 0
+        for record in progress_history[start:]:
+            tasks = record.get("completed_tasks", ())
+            total_tasks += len(tasks)
+            for task in tasks:
+                if task.get("completed", False):
+                    completed_tasks += 1
         
-        if not recent_progress:
+        if not recent_records:
             return {"trend": "no_data", "completion_rate": 0, "total_tasks": 0}
-      
-        total_tasks = sum(len(p.get("completed_tasks", [])) for p in recent_progress)
-        completed_tasks = sum(
-            sum(1 for task in p.get("completed_tasks", []) if task.get("completed", False))
-            for p in recent_progress
-        )
         
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
       
@@ -189,48 +367,67 @@ class MemoryBank:
             max_plans: Maximum number of plans to keep
             max_progress: Maximum number of progress records to keep
         """
-        if user_id not in self.data:
-            return
-        
-        if "plans" in self.data[user_id] and len(self.data[user_id]["plans"]) > max_plans:
-            self.data[user_id]["plans"] = sorted(
-                self.data[user_id]["plans"], 
-                key=lambda x: x.get("created_at", 0)
-            )[-max_plans:]
-            
-        if "progress_history" in self.data[user_id] and len(self.data[user_id]["progress_history"]) > max_progress:
-            self.data[user_id]["progress_history"] = sorted(
-                self.data[user_id]["progress_history"],
-                key=lambda x: x.get("timestamp", 0)
-            )[-max_progress:]
+        with self._lock:
+            user_memory = self._resident_user(user_id)
+            if user_memory is None:
+                return
+            counts_before = _entry_counts(user_memory)
             
-        self._persist()
+            if "plans" in user_memory and len(user_memory["plans"]) > max_plans:
+                newest_plans = heapq.nlargest(max_plans, user_memory["plans"], key=lambda x: x.get("created_at", 0))
+                newest_plans.reverse()
+                user_memory["plans"] = newest_plans
+                
+            # progress_history is already sorted by timestamp
+            if "progress_history" in user_memory and len(user_memory["progress_history"]) > max_progress:
+                del user_memory["progress_history"][:-max_progress]
+                
+            self._adjust_totals(counts_before, _entry_counts(user_memory))
+            self._mark_dirty(user_id)
         logger.info(f"Compacted memory for user {user_id}")
 
     def get_all_users(self) -> List[str]:
         """Get list of all user IDs in memory"""
-        return list(self.data.keys())
+        return list(self._known_users)
 
     def delete_user_memory(self, user_id: str):
         """Delete all memory for a user"""
-        if user_id in self.data:
-            del self.data[user_id]
+        with self._lock:
+            if user_id not in self._known_users:
+                return
+            if self._totals is not None:
+                self._adjust_totals(_entry_counts(self._peek_user(user_id)), (0, 0))
+            self._known_users.discard(user_id)
+            self.data.pop(user_id, None)
             if user_id in self.access_timestamps:
                 del self.access_timestamps[user_id]
-            self._persist()
-            logger.info(f"Deleted memory for user {user_id}")
+            self._bump_version(user_id)
+            self._mark_dirty(user_id)
+        logger.info(f"Deleted memory for user {user_id}")
 
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get statistics about the memory bank"""
-        total_users = len(self.data)
-        total_plans = sum(len(user_data.get("plans", [])) for user_data in self.data.values())
-        total_progress = sum(len(user_data.get("progress_history", [])) for user_data in self.data.values())
+        with self._lock:
+            if self._totals is None:
+                self._totals = self._scan_totals()
+            totals = dict(self._totals)
+            total_users = len(self._known_users)
         
         return {
             "total_users": total_users,
-            "total_plans": total_plans,
-            "total_progress_records": total_progress,
-            "memory_file_size": self.path.stat().st_size if self.path.exists() else 0,
+            "total_plans": totals["plans"],
+            "total_progress_records": totals["progress"],
+            "memory_file_size": totals["file_size"],
             "last_persist": time.time()
         }
+
+    def _scan_totals(self) -> Dict[str, int]:
+        """Count plans, progress records and file sizes across every user, once"""
+        totals = {"plans": 0, "progress": 0, "file_size": 0}
+        for user_id in self._known_users:
+            plans, progress = _entry_counts(self._peek_user(user_id))
+            totals["plans"] += plans
+            totals["progress"] += progress
+        totals["file_size"] = sum(user_file.stat().st_size for user_file in self.users_path.glob("*.json"))
+        return totals
       
@@ -1,11 +1,23 @@
+import os
 import time
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
-import json
+import orjson
 from pathlib import Path
 from enum import Enum
-from threading import Lock
+from threading import Lock, Thread
+from queue import Full, Queue
+from collections import deque
+from itertools import count, islice
+
+# (minimum success rate, maximum average time, grade), checked best first; anything else is "D"
+_PERFORMANCE_GRADES = (
+    (95, 2.0, "A+"),
+    (90, 3.0, "A"),
+    (85, 5.0, "B"),
+    (75, float("inf"), "C")
+)
 
 class AgentStatus(Enum):
     SUCCESS = "success"
@@ -13,7 +25,7 @@ class AgentStatus(Enum):
     WARNING = "warning"
     PENDING = "pending"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentTrace:
     """Data class for agent execution traces"""
     trace_id: str
@@ -26,6 +38,20 @@ class AgentTrace:
     error_message: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict form; payload dicts are shared rather than deep-copied"""
+        return {
+            "trace_id": self.trace_id,
+            "agent_name": self.agent_name,
+            "input_data": self.input_data,
+            "output_data": self.output_data,
+            "duration_sec": self.duration_sec,
+            "timestamp": self.timestamp,
+            "status": self.status.value,
+            "error_message": self.error_message,
+            "metadata": self.metadata
+        }
+
 @dataclass
 class PerformanceMetrics:
     """Data class for performance metrics"""
@@ -43,7 +69,10 @@ class ObservabilityManager:
     """
     
     def __init__(self, storage_path: str = "memory/observability"):
-        self.traces: List[AgentTrace] = []
+        self.max_traces_in_memory = 1000  # Prevent memory bloat
+        self.traces: deque = deque(maxlen=self.max_traces_in_memory)
+        self.traces_by_agent: Dict[str, deque] = {}  # Same traces as self.traces, oldest first per agent
+        self.traces_by_id: Dict[str, AgentTrace] = {}
         self.metrics = {
             "total_agent_calls": 0,
             "successful_calls": 0,
@@ -54,13 +83,61 @@ class ObservabilityManager:
         self.agent_performance: Dict[str, Dict[str, Any]] = {}
         self.storage_path = Path(storage_path)
         self.lock = Lock()
-        self.max_traces_in_memory = 1000  # Prevent memory bloat
+        self._trace_counter = count()
+        self._performance_generation = 0  # Bumped whenever agent_performance changes
+        self._performance_cache: Tuple[Optional[Dict[str, Any]], int] = (None, -1)
+        # Traces submitted from request threads, recorded by a background thread
+        self._pending_traces: Queue = Queue(maxsize=10000)
+        self.dropped_traces = 0
         
         # Ensure storage directory exists
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
+        Thread(target=self._drain_pending_traces, name="trace-recorder", daemon=True).start()
+        
         logger.info("ObservabilityManager initialized")
 
+    def submit_trace(self, 
+                     agent_name: str, 
+                     input_data: Dict[str, Any], 
+                     output_data: Dict[str, Any], 
+                     duration_sec: float, 
+                     status: AgentStatus = AgentStatus.SUCCESS,
+                     error_message: Optional[str] = None,
+                     metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Queue an agent execution trace for the background recorder without blocking
+        
+        Args:
+            agent_name: Name of the agent
+            input_data: Input data to the agent
+            output_data: Output data from the agent
+            duration_sec: Execution duration in seconds
+            status: Execution status
+            error_message: Error message if any
+            metadata: Additional metadata
+            
+        Returns:
+            True if queued, False if the queue was full and the trace was dropped
+        """
+        try:
+            self._pending_traces.put_nowait((agent_name, input_data, output_data, duration_sec,
+                                             status, error_message, metadata))
+            return True
+        except Full:
+            with self.lock:
+                self.dropped_traces += 1
+            return False
+
+    def _drain_pending_traces(self):
+        """Record submitted traces in submission order"""
+        while True:
+            pending = self._pending_traces.get()
+            try:
+                self.record_trace(*pending)
+            except Exception as e:
+                logger.error(f"Failed to record submitted trace: {e}")
+
     def record_trace(self, 
                     agent_name: str, 
                     input_data: Dict[str, Any], 
@@ -84,7 +161,7 @@ class ObservabilityManager:
         Returns:
             Trace ID for reference
         """
-        trace_id = f"trace_{int(time.time())}_{len(self.traces)}"
+        trace_id = f"trace_{int(time.time())}_{next(self._trace_counter)}"
         
         trace = AgentTrace(
             trace_id=trace_id,
@@ -97,15 +174,21 @@ class ObservabilityManager:
             error_message=error_message,
             metadata=metadata or {}
         )
+        succeeded = status == AgentStatus.SUCCESS
         
+        # Only counter and index updates happen under the lock; logging stays outside
         with self.lock:
-            # Add trace
+            # Add trace, evicting the oldest from the indexes when the buffer is full
+            if len(self.traces) == self.traces.maxlen:
+                self._evict_trace(self.traces[0])
             self.traces.append(trace)
+            self.traces_by_agent.setdefault(agent_name, deque()).append(trace)
+            self.traces_by_id[trace_id] = trace
         
             self.metrics["total_agent_calls"] += 1
             self.metrics["total_processing_time"] += duration_sec
             
-            if status == AgentStatus.SUCCESS:
+            if succeeded:
                 self.metrics["successful_calls"] += 1
             else:
                 self.metrics["failed_calls"] += 1
@@ -116,28 +199,36 @@ class ObservabilityManager:
                     "total_time": 0.0,
                     "success_count": 0,
                     "error_count": 0,
-                    "average_time": 0.0
+                    "average_time": 0.0,
+                    "last_activity": None
                 }
             
             agent_stats = self.agent_performance[agent_name]
+            self._performance_generation += 1
             agent_stats["call_count"] += 1
             agent_stats["total_time"] += duration_sec
             agent_stats["average_time"] = agent_stats["total_time"] / agent_stats["call_count"]
+            agent_stats["last_activity"] = trace.timestamp
             
-            if status == AgentStatus.SUCCESS:
+            if succeeded:
                 agent_stats["success_count"] += 1
             else:
                 agent_stats["error_count"] += 1
-        
-            if len(self.traces) > self.max_traces_in_memory:
-                self.traces = self.traces[-self.max_traces_in_memory:]
       
-        log_level = "INFO" if status == AgentStatus.SUCCESS else "ERROR"
+        log_level = "INFO" if succeeded else "ERROR"
         logger.log(log_level, 
                   f"Agent {agent_name} completed in {duration_sec:.3f}s - Status: {status.value} - Trace: {trace_id}")
         
         return trace_id
 
+    def _evict_trace(self, trace: AgentTrace):
+        """Drop an evicted trace from the indexes (it is always its agent's oldest)"""
+        agent_traces = self.traces_by_agent[trace.agent_name]
+        agent_traces.popleft()
+        if not agent_traces:
+            del self.traces_by_agent[trace.agent_name]
+        del self.traces_by_id[trace.trace_id]
+
     def get_agent_performance(self) -> Dict[str, Any]:
         """
         Get comprehensive performance metrics for all agents
@@ -146,6 +237,10 @@ class ObservabilityManager:
             Dictionary with agent performance data
         """
         with self.lock:
+            cached_data, generation = self._performance_cache
+            if generation == self._performance_generation:
+                return cached_data
+            
             performance_data = {}
             
             for agent_name, stats in self.agent_performance.items():
@@ -161,20 +256,15 @@ class ObservabilityManager:
                     "performance_grade": self._calculate_performance_grade(success_rate, stats["average_time"])
                 }
             
+            self._performance_cache = (performance_data, self._performance_generation)
             return performance_data
 
     def _calculate_performance_grade(self, success_rate: float, avg_time: float) -> str:
         """Calculate performance grade based on success rate and average time"""
-        if success_rate >= 95 and avg_time <= 2.0:
-            return "A+"
-        elif success_rate >= 90 and avg_time <= 3.0:
-            return "A"
-        elif success_rate >= 85 and avg_time <= 5.0:
-            return "B"
-        elif success_rate >= 75:
-            return "C"
-        else:
-            return "D"
+        for min_success_rate, max_avg_time, grade in _PERFORMANCE_GRADES:
+            if success_rate >= min_success_rate and avg_time <= max_avg_time:
+                return grade
+        return "D"
 
     def get_system_metrics(self) -> Dict[str, Any]:
         """
@@ -214,12 +304,15 @@ class ObservabilityManager:
             List of trace dictionaries
         """
         with self.lock:
-            traces_to_return = self.traces[-limit:] if limit > 0 else self.traces.copy()
-            
             if agent_filter:
-                traces_to_return = [t for t in traces_to_return if t.agent_name == agent_filter]
-            
-            return [asdict(trace) for trace in traces_to_return]
+                agent_traces = self.traces_by_agent.get(agent_filter, ())
+                start = max(len(agent_traces) - limit, 0) if limit > 0 else 0
+                traces_to_return = list(islice(agent_traces, start, None))
+            else:
+                start = max(len(self.traces) - limit, 0) if limit > 0 else 0
+                traces_to_return = list(islice(self.traces, start, None))
+        
+        return [trace.to_dict() for trace in traces_to_return]
 
     def get_trace_by_id(self, trace_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -232,14 +325,16 @@ class ObservabilityManager:
             Trace data or None if not found
         """
         with self.lock:
-            for trace in self.traces:
-                if trace.trace_id == trace_id:
-                    return asdict(trace)
-        return None
+            trace = self.traces_by_id.get(trace_id)
+        return trace.to_dict() if trace else None
 
     def export_traces(self, filepath: Optional[str] = None) -> str:
         """
-        Export all traces to JSON file
+        Export all traces to an NDJSON file
+        
+        The first line holds the export timestamp, system metrics and agent
+        performance; every following line is one trace. Traces are encoded one
+        at a time, so the export never holds the whole payload in memory.
         
         Args:
             filepath: Optional custom filepath
@@ -248,22 +343,31 @@ class ObservabilityManager:
             Path to exported file
         """
         if filepath is None:
-            filepath = self.storage_path / f"traces_export_{int(time.time())}.json"
+            filepath = self.storage_path / f"traces_export_{int(time.time())}.ndjson"
         else:
             filepath = Path(filepath)
         
-        export_data = {
+        with self.lock:
+            traces = list(self.traces)
+        
+        header = {
             "export_timestamp": time.time(),
             "system_metrics": self.get_system_metrics(),
             "agent_performance": self.get_agent_performance(),
-            "traces": [asdict(trace) for trace in self.traces]
+            "trace_count": len(traces)
         }
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            temp_path = filepath.with_suffix('.tmp')
+            with open(temp_path, 'wb', buffering=64 * 1024) as f:
+                f.write(orjson.dumps(header, option=orjson.OPT_APPEND_NEWLINE, default=str))
+                for trace in traces:
+                    f.write(orjson.dumps(trace.to_dict(), option=orjson.OPT_APPEND_NEWLINE, default=str))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, filepath)
             
-            logger.info(f"Exported {len(self.traces)} traces to {filepath}")
+            logger.info(f"Exported {len(traces)} traces to {filepath}")
             return str(filepath)
             
         except Exception as e:
@@ -281,7 +385,13 @@ class ObservabilityManager:
         
         with self.lock:
             initial_count = len(self.traces)
-            self.traces = [trace for trace in self.traces if trace.timestamp > cutoff_time]
+            self.traces = deque((trace for trace in self.traces if trace.timestamp > cutoff_time),
+                                maxlen=self.max_traces_in_memory)
+            self.traces_by_agent = {}
+            self.traces_by_id = {}
+            for trace in self.traces:
+                self.traces_by_agent.setdefault(trace.agent_name, deque()).append(trace)
+                self.traces_by_id[trace.trace_id] = trace
             removed_count = initial_count - len(self.traces)
             
             if removed_count > 0:
@@ -323,10 +433,7 @@ class ObservabilityManager:
     def _get_last_activity(self, agent_name: str) -> Optional[float]:
         """Get timestamp of last activity for an agent"""
         with self.lock:
-            agent_traces = [t for t in self.traces if t.agent_name == agent_name]
-            if agent_traces:
-                return max(t.timestamp for t in agent_traces)
-        return None
+            return self.agent_performance.get(agent_name, {}).get("last_activity")
 
     def _get_health_recommendation(self, health: str, success_rate: float) -> str:
         """Get recommendation based on health status"""
@@ -350,6 +457,7 @@ class ObservabilityManager:
                 "start_time": time.time()
             }
             self.agent_performance = {}
+            self._performance_generation += 1
             logger.info("Observability metrics reset")
 
     def get_comprehensive_report(self) -> Dict[str, Any]:
@@ -1,29 +1,176 @@
-import uuid
+import heapq
+import secrets
 import time
-from typing import Dict, Any, Optional, List
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, Optional, List, Set, Tuple
 from loguru import logger
-from threading import Lock
+from threading import Condition, Lock, Thread
+
+class ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or a single writer
+    
+    Waiting writers block new readers, so a steady stream of reads cannot
+    starve updates.
+    """
+    
+    def __init__(self):
+        self._condition = Condition(Lock())
+        self._readers = 0
+        self._writer_active = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self) -> Iterator[None]:
+        """Hold the lock shared with other readers"""
+        with self._condition:
+            while self._writer_active or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Hold the lock exclusively"""
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer_active or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer_active = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_active = False
+                self._condition.notify_all()
+
+@dataclass(slots=True)
+class Session:
+    """Session record; times other than created_at_wallclock are time.monotonic() values"""
+    user_id: str
+    created_at: float
+    created_at_wallclock: float
+    last_accessed: float
+    state: Dict[str, Any]
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 class InMemorySessionService:
     """
     Enhanced Session Service for managing user sessions with state persistence
     Supports concurrent access with thread safety
+    
+    Sessions are spread over shard_count shards by session ID hash, each with
+    its own lock, so requests for different sessions rarely contend.
     """
     
-    def __init__(self, session_timeout: int = 3600):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, session_timeout: int = 3600, shard_count: int = 16):
         self.session_timeout = session_timeout
-        self.lock = Lock()
+        self.shard_count = shard_count
+        self._shards: List[Dict[str, Session]] = [{} for _ in range(shard_count)]
+        self._shard_locks: List[ReadWriteLock] = [ReadWriteLock() for _ in range(shard_count)]
+        # Per-shard min-heaps of (expiry time, session_id). Entries may be stale, since
+        # access refreshes don't push; cleanup re-checks each popped session.
+        self._expiry_heaps: List[List[Tuple[float, str]]] = [[] for _ in range(shard_count)]
+        # Per-shard running totals for get_session_stats, guarded by the shard locks
+        self._active_counts: List[int] = [0] * shard_count
+        self._created_at_sums: List[float] = [0.0] * shard_count
+        # user_id -> session IDs, guarded by its own lock; always taken after a shard lock
+        self._by_user: Dict[str, Set[str]] = defaultdict(set)
+        self._by_user_lock = Lock()
+        # (session_id, timestamp) pairs from reads, applied in batches by the clock thread
+        self._access_queue: deque = deque()
         self.cleanup_interval = 300  
         self.last_cleanup = time.time()
         
+        # Coarse clocks refreshed once per clock_resolution; ample for hour-long sessions.
+        # created_at/last_accessed and all expiry arithmetic use the monotonic one, so
+        # wall-clock jumps can't expire or revive sessions; the wall clock is for reporting.
+        self.clock_resolution = 1.0
+        self._now = time.monotonic()
+        self._wall_now = time.time()
+        Thread(target=self._tick_clock, name="session-clock", daemon=True).start()
+        Thread(target=self._cleanup_loop, name="session-cleanup", daemon=True).start()
+        
         logger.info("InMemorySessionService initialized")
 
+    def _tick_clock(self) -> None:
+        """Refresh the cached clocks used for session timestamps and expiry checks"""
+        while True:
+            time.sleep(self.clock_resolution)
+            self._now = time.monotonic()
+            self._wall_now = time.time()
+            try:
+                self._apply_access_updates()
+            except Exception as e:
+                logger.error(f"Applying session access updates failed: {e}")
+
+    def _apply_access_updates(self) -> None:
+        """Drain queued read timestamps into last_accessed, one write lock per touched shard"""
+        latest: Dict[str, float] = {}
+        queue = self._access_queue
+        while True:
+            try:
+                session_id, timestamp = queue.popleft()
+            except IndexError:
+                break
+            if timestamp > latest.get(session_id, 0):
+                latest[session_id] = timestamp
+        if not latest:
+            return
+        
+        by_shard: Dict[int, List[Tuple[str, float]]] = defaultdict(list)
+        for session_id, timestamp in latest.items():
+            by_shard[self._shard_index(session_id)].append((session_id, timestamp))
+        for index, updates in by_shard.items():
+            shard = self._shards[index]
+            with self._shard_locks[index].write_lock():
+                for session_id, timestamp in updates:
+                    session = shard.get(session_id)
+                    if session is not None and session.last_accessed < timestamp:
+                        session.last_accessed = timestamp
+
+    def __len__(self) -> int:
+        """Number of sessions currently held, including expired ones not yet cleaned up"""
+        return sum(len(shard) for shard in self._shards)
+
+    def _shard_index(self, session_id: str) -> int:
+        """Index of the shard holding a session"""
+        return hash(session_id) % self.shard_count
+
+    def _shard(self, session_id: str) -> Tuple[ReadWriteLock, Dict[str, Session]]:
+        """Lock and dict of the shard holding a session"""
+        index = self._shard_index(session_id)
+        return self._shard_locks[index], self._shards[index]
+
+    def _count_session(self, index: int, session: Session, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a session from its shard's stats totals"""
+        if session.metadata.get("active", True):
+            self._active_counts[index] += sign
+        self._created_at_sums[index] += sign * session.created_at
+
+    def _unindex(self, user_id: str, session_id: str) -> None:
+        """Drop a session from the per-user index"""
+        with self._by_user_lock:
+            session_ids = self._by_user.get(user_id)
+            if session_ids is not None:
+                session_ids.discard(session_id)
+                if not session_ids:
+                    del self._by_user[user_id]
+
     def _generate_session_id(self) -> str:
-        """Generate unique session ID"""
-        return str(uuid.uuid4())
+        """Generate unique session ID (128 random bits as hex, without UUID object formatting)"""
+        return secrets.token_hex(16)
 
-    def create_session(self, user_id: str, initial_state: Dict[str, Any] = None) -> str:
+    def create_session(self, user_id: str, initial_state: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a new session for a user
         
@@ -35,26 +182,55 @@ class InMemorySessionService:
             Session ID
         """
         session_id = self._generate_session_id()
-        
-        with self.lock:
-            self.sessions[session_id] = {
-                "user_id": user_id,
-                "created_at": time.time(),
-                "last_accessed": time.time(),
-                "state": initial_state or {},
-                "metadata": {
-                    "session_id": session_id,
-                    "user_agent": "",
-                    "ip_address": "",
-                    "active": True
-                }
+        index = self._shard_index(session_id)
+        lock, shard = self._shard_locks[index], self._shards[index]
+        now = self._now
+        session = Session(
+            user_id=user_id,
+            created_at=now,
+            created_at_wallclock=self._wall_now,
+            last_accessed=now,
+            state=initial_state or {},
+            metadata={
+                "session_id": session_id,
+                "user_agent": "",
+                "ip_address": "",
+                "active": True
             }
+        )
+        
+        with lock.write_lock():
+            shard[session_id] = session
+            self._count_session(index, session, 1)
+            heapq.heappush(self._expiry_heaps[index], (now + self.session_timeout, session_id))
+            with self._by_user_lock:
+                self._by_user[user_id].add(session_id)
         
         logger.info(f"Created new session {session_id} for user {user_id}")
-        self._run_cleanup()  
         return session_id
 
-    def get(self, session_id: str, update_access: bool = True) -> Optional[Dict[str, Any]]:
+    def _lookup(self, session_id: str, update_access: bool = True) -> Optional[Session]:
+        """Live session, or None if not found/expired; the read lock covers only the lookup"""
+        lock, shard = self._shard(session_id)
+        with lock.read_lock():
+            session = shard.get(session_id)
+        
+        if session is None:
+            return None
+        now = self._now
+        # Same test as _is_expired, inlined on the per-request path
+        if now - session.last_accessed > self.session_timeout:
+            # Left in place for the cleanup thread to remove
+            logger.debug(f"Session {session_id} expired")
+            return None
+        
+        # Deferred to the clock thread; deque.append is atomic, and a second of
+        # staleness is negligible against session_timeout
+        if update_access:
+            self._access_queue.append((session_id, now))
+        return session
+
+    def get(self, session_id: str, update_access: bool = True) -> Optional[Session]:
         """
         Get session data by session ID
         
@@ -63,22 +239,40 @@ class InMemorySessionService:
             update_access: Whether to update last accessed time
             
         Returns:
-            Session data or None if not found/expired
+            Live session, or None if not found/expired; treat it as read-only.
+            Use update_state/update_full_state/update_metadata to change it.
         """
-        with self.lock:
-            session = self.sessions.get(session_id)
+        return self._lookup(session_id, update_access)
+
+    def get_user_id(self, session_id: str) -> Optional[str]:
+        """
+        Get the user owning a session
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            User ID, or None if the session is not found/expired
+        """
+        session = self._lookup(session_id)
+        return session.user_id if session is not None else None
+
+    def get_state(self, session_id: str, key: str, default: Any = None) -> Any:
+        """
+        Get a single state value from a session
+        
+        Args:
+            session_id: Session identifier
+            key: State key to read
+            default: Value returned when the key or session is missing
             
-            if not session:
-                return None
-            if self._is_expired(session):
-                logger.debug(f"Session {session_id} expired")
-                del self.sessions[session_id]
-                return None
-                
-            if update_access:
-                session["last_accessed"] = time.time()
-                
-            return session.copy() 
+        Returns:
+            State value, or default
+        """
+        session = self._lookup(session_id)
+        if session is None:
+            return default
+        return session.state.get(key, default)
 
     def update_state(self, session_id: str, key: str, value: Any):
         """
@@ -89,10 +283,12 @@ class InMemorySessionService:
             key: State key to update
             value: New value
         """
-        with self.lock:
-            if session_id in self.sessions:
-                self.sessions[session_id]["state"][key] = value
-                self.sessions[session_id]["last_accessed"] = time.time()
+        lock, shard = self._shard(session_id)
+        with lock.write_lock():
+            session = shard.get(session_id)
+            if session is not None:
+                session.state[key] = value
+                session.last_accessed = self._now
                 logger.debug(f"Updated state key '{key}' for session {session_id}")
 
     def update_full_state(self, session_id: str, new_state: Dict[str, Any]):
@@ -103,10 +299,12 @@ class InMemorySessionService:
             session_id: Session identifier
             new_state: New session state
         """
-        with self.lock:
-            if session_id in self.sessions:
-                self.sessions[session_id]["state"] = new_state
-                self.sessions[session_id]["last_accessed"] = time.time()
+        lock, shard = self._shard(session_id)
+        with lock.write_lock():
+            session = shard.get(session_id)
+            if session is not None:
+                session.state = new_state
+                session.last_accessed = self._now
                 logger.debug(f"Updated full state for session {session_id}")
 
     def update_metadata(self, session_id: str, metadata_updates: Dict[str, Any]):
@@ -117,10 +315,16 @@ class InMemorySessionService:
             session_id: Session identifier
             metadata_updates: Metadata updates
         """
-        with self.lock:
-            if session_id in self.sessions:
-                self.sessions[session_id]["metadata"].update(metadata_updates)
-                self.sessions[session_id]["last_accessed"] = time.time()
+        index = self._shard_index(session_id)
+        lock, shard = self._shard_locks[index], self._shards[index]
+        with lock.write_lock():
+            session = shard.get(session_id)
+            if session is not None:
+                metadata = session.metadata
+                was_active = bool(metadata.get("active", True))
+                metadata.update(metadata_updates)
+                self._active_counts[index] += bool(metadata.get("active", True)) - was_active
+                session.last_accessed = self._now
 
     def delete(self, session_id: str):
         """
@@ -129,12 +333,16 @@ class InMemorySessionService:
         Args:
             session_id: Session identifier to delete
         """
-        with self.lock:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
+        index = self._shard_index(session_id)
+        lock, shard = self._shard_locks[index], self._shards[index]
+        with lock.write_lock():
+            session = shard.pop(session_id, None)
+            if session is not None:
+                self._count_session(index, session, -1)
+                self._unindex(session.user_id, session_id)
                 logger.info(f"Deleted session {session_id}")
 
-    def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_sessions(self, user_id: str) -> List[Session]:
         """
         Get all active sessions for a user
         
@@ -142,16 +350,21 @@ class InMemorySessionService:
             user_id: User identifier
             
         Returns:
-            List of session data
+            List of live sessions (treat as read-only)
         """
-        with self.lock:
-            user_sessions = []
-            for session_id, session in self.sessions.items():
-                if session["user_id"] == user_id and not self._is_expired(session):
-                    user_sessions.append(session.copy())
-            return user_sessions
+        with self._by_user_lock:
+            session_ids = list(self._by_user.get(user_id, ()))
+        
+        user_sessions = []
+        for session_id in session_ids:
+            lock, shard = self._shard(session_id)
+            with lock.read_lock():
+                session = shard.get(session_id)
+                if session is not None and not self._is_expired(session):
+                    user_sessions.append(session)
+        return user_sessions
 
-    def _is_expired(self, session: Dict[str, Any]) -> bool:
+    def _is_expired(self, session: Session) -> bool:
         """
         Check if session is expired
         
@@ -161,28 +374,43 @@ class InMemorySessionService:
         Returns:
             True if expired, False otherwise
         """
-        last_accessed = session.get("last_accessed", 0)
-        return (time.time() - last_accessed) > self.session_timeout
+        return (self._now - session.last_accessed) > self.session_timeout
+
+    def _cleanup_loop(self) -> None:
+        """Remove expired sessions every cleanup_interval, off the request path"""
+        while True:
+            time.sleep(self.cleanup_interval)
+            try:
+                self._do_cleanup()
+            except Exception as e:
+                logger.error(f"Session cleanup failed: {e}")
 
-    def _run_cleanup(self):
-        """Clean up expired sessions"""
+    def _do_cleanup(self) -> None:
+        """Clean up expired sessions, one shard at a time, popping only due heap entries"""
         current_time = time.time()
-        if (current_time - self.last_cleanup) < self.cleanup_interval:
-            return
+        self._apply_access_updates()
+        expired_count = 0
+        for index, (lock, shard, heap) in enumerate(zip(self._shard_locks, self._shards, self._expiry_heaps)):
+            with lock.write_lock():
+                now = self._now
+                while heap and heap[0][0] < now:
+                    _, session_id = heapq.heappop(heap)
+                    session = shard.get(session_id)
+                    if session is None:
+                        continue
+                    if self._is_expired(session):
+                        del shard[session_id]
+                        self._count_session(index, session, -1)
+                        self._unindex(session.user_id, session_id)
+                        expired_count += 1
+                    else:
+                        # Accessed since the entry was pushed; requeue at its current expiry
+                        heapq.heappush(heap, (session.last_accessed + self.session_timeout, session_id))
             
-        with self.lock:
-            expired_sessions = []
-            for session_id, session in self.sessions.items():
-                if self._is_expired(session):
-                    expired_sessions.append(session_id)
+        if expired_count:
+            logger.info(f"Cleaned up {expired_count} expired sessions")
             
-            for session_id in expired_sessions:
-                del self.sessions[session_id]
-                
-            if expired_sessions:
-                logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
-                
-            self.last_cleanup = current_time
+        self.last_cleanup = current_time
 
     def get_session_stats(self) -> Dict[str, Any]:
         """
@@ -191,23 +419,24 @@ class InMemorySessionService:
         Returns:
             Session statistics
         """
-        with self.lock:
-            self._run_cleanup()
-            
-            total_sessions = len(self.sessions)
-            active_sessions = sum(1 for s in self.sessions.values() if s["metadata"].get("active", True))
-            
-            current_time = time.time()
-            session_ages = [current_time - s["created_at"] for s in self.sessions.values()]
-            avg_session_age = sum(session_ages) / len(session_ages) if session_ages else 0
-            
-            return {
-                "total_sessions": total_sessions,
-                "active_sessions": active_sessions,
-                "average_session_age_seconds": avg_session_age,
-                "session_timeout_seconds": self.session_timeout,
-                "last_cleanup": self.last_cleanup
-            }
+        total_sessions = 0
+        active_sessions = 0
+        created_at_sum = 0.0
+        for index, lock in enumerate(self._shard_locks):
+            with lock.read_lock():
+                total_sessions += len(self._shards[index])
+                active_sessions += self._active_counts[index]
+                created_at_sum += self._created_at_sums[index]
+        total_age = self._now * total_sessions - created_at_sum
+        avg_session_age = total_age / total_sessions if total_sessions else 0
+        
+        return {
+            "total_sessions": total_sessions,
+            "active_sessions": active_sessions,
+            "average_session_age_seconds": avg_session_age,
+            "session_timeout_seconds": self.session_timeout,
+            "last_cleanup": self.last_cleanup
+        }
 
     def invalidate_user_sessions(self, user_id: str):
         """
@@ -216,25 +445,31 @@ class InMemorySessionService:
         Args:
             user_id: User identifier
         """
-        with self.lock:
-            sessions_to_delete = []
-            for session_id, session in self.sessions.items():
-                if session["user_id"] == user_id:
-                    sessions_to_delete.append(session_id)
+        with self._by_user_lock:
+            sessions_to_delete = self._by_user.pop(user_id, set())
+        
+        deleted_count = 0
+        for session_id in sessions_to_delete:
+            index = self._shard_index(session_id)
+            with self._shard_locks[index].write_lock():
+                session = self._shards[index].pop(session_id, None)
+                if session is not None:
+                    self._count_session(index, session, -1)
+                    deleted_count += 1
             
-            for session_id in sessions_to_delete:
-                del self.sessions[session_id]
-                
-            logger.info(f"Invalidated {len(sessions_to_delete)} sessions for user {user_id}")
+        logger.info(f"Invalidated {deleted_count} sessions for user {user_id}")
 
-    def get_all_sessions(self) -> Dict[str, Dict[str, Any]]:
+    def get_all_sessions(self) -> Dict[str, Session]:
         """
         Get all sessions (for admin/debug purposes)
         
         Returns:
-            Copy of all sessions
+            Live sessions (treat as read-only) keyed by session ID
         """
-        with self.lock:
-            return {sid: session.copy() for sid, session in self.sessions.items()}
+        all_sessions = {}
+        for lock, shard in zip(self._shard_locks, self._shards):
+            with lock.read_lock():
+                all_sessions.update(shard)
+        return all_sessions
 
 
@@ -3,7 +3,7 @@ from fastapi import FastAPI, HTTPException
 from core.llm_client import LLMClient
 from core.memory_bank import MemoryBank
 from core.session_service import InMemorySessionService
-from core.observability import ObservabilityManager
+from core.observability import AgentStatus, ObservabilityManager
 from tools.search_tool import SearchTool
 from tools.save_json_tool import save_to_file
 from agents.planner_agent import PlannerAgent
@@ -43,11 +43,11 @@ def _wrap_with_observability(agent_name, agent_method):
         try:
             result = agent_method(*args, **kwargs)
             duration = time.time() - start_time
-            observability.record_trace(agent_name, {"args": args, "kwargs": kwargs}, {"result": result}, duration, True)
+            observability.submit_trace(agent_name, {"args": args, "kwargs": kwargs}, {"result": result}, duration, AgentStatus.SUCCESS)
             return result
         except Exception as e:
             duration = time.time() - start_time
-            observability.record_trace(agent_name, {"args": args, "kwargs": kwargs}, {"error": str(e)}, duration, False)
+            observability.submit_trace(agent_name, {"args": args, "kwargs": kwargs}, {"error": str(e)}, duration, AgentStatus.ERROR, str(e))
             raise e
     return wrapper
 
@@ -57,22 +57,25 @@ resource_agent.fetch_resources = _wrap_with_observability("ResourceAgent", resou
 motivation.send_nudge = _wrap_with_observability("MotivationAgent", motivation.send_nudge)
 evaluator.evaluate = _wrap_with_observability("EvaluatorAgent", evaluator.evaluate)
 
+# Endpoints that only touch in-memory state run on the event loop; the rest block on
+# LLM, search or file I/O and stay sync so FastAPI runs them in its threadpool
 @app.post("/create_session")
-def create_session(user_id: str):
+async def create_session(user_id: str):
     sid = sessions.create_session(user_id)
     logger.info(f"Created session {sid} for user {user_id}")
     return {"session_id": sid}
 
 @app.post("/create_plan")
 def create_plan(session_id: str, profile: dict):
-    s = sessions.get(session_id)
-    if not s:
+    user_id = sessions.get_user_id(session_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    current_memory = memory.get_user_memory(s["user_id"])
+    memory.touch_user(user_id)
+    current_memory = memory.get_user_memory(user_id)
     current_memory["profile"] = profile
     compacted_memory = context_compactor.compact_memory(current_memory)
-    memory.update_user_memory(s["user_id"], compacted_memory)
-    plan_meta = planner.create_plan(s["user_id"], profile)
+    memory.update_user_memory(user_id, compacted_memory)
+    plan_meta = planner.create_plan(user_id, profile)
     if "plan" in plan_meta:
         plan_meta = context_compactor.compact_plan(plan_meta)
     sessions.update_state(session_id, "plan", plan_meta)
@@ -80,25 +83,26 @@ def create_plan(session_id: str, profile: dict):
 
 @app.post("/record_progress")
 def record_progress(session_id: str, completed_tasks: list):
-    s = sessions.get(session_id)
-    if not s:
+    user_id = sessions.get_user_id(session_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    ok = progress.record_progress(s["user_id"], session_id, completed_tasks)
+    memory.touch_user(user_id)
+    ok = progress.record_progress(user_id, session_id, completed_tasks)
     if len(completed_tasks) >= 3:
         summary = {"completion_rate": 75, "recent_tasks": len(completed_tasks)}
-        motivation.send_nudge(s["user_id"], summary)
+        motivation.send_nudge(user_id, summary)
     return {"saved": ok}
 
 @app.post("/adjust")
 def adjust(session_id: str):
-    s = sessions.get(session_id)
-    if not s:
+    user_id = sessions.get_user_id(session_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    plan = s["state"].get("plan", {}).get("plan", {})
-    records = progress.load_records()
-    user_records = [r for r in records if r.get("user_id") == s["user_id"]]
+    memory.touch_user(user_id)
+    plan = sessions.get_state(session_id, "plan", {}).get("plan", {})
+    user_records = progress.get_user_records(user_id)
     metrics = progress.compute_metrics(user_records)
-    adjusted = optimizer.optimize(s["user_id"], plan, metrics)
+    adjusted = optimizer.optimize(user_id, plan, metrics)
     sessions.update_state(session_id, "plan", adjusted)
     return {"adjusted_plan": adjusted}
 
@@ -109,38 +113,43 @@ def resources(q: str):
 
 @app.get("/nudge")
 def nudge(session_id: str):
-    s = sessions.get(session_id)
-    if not s:
+    user_id = sessions.get_user_id(session_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    records = progress.load_records()
-    user_records = [r for r in records if r.get("user_id") == s["user_id"]]
+    memory.touch_user(user_id)
+    user_records = progress.get_user_records(user_id)
     metrics = progress.compute_metrics(user_records)
-    msg = motivation.send_nudge(s["user_id"], metrics)
+    msg = motivation.send_nudge(user_id, metrics)
     return msg
 
 @app.get("/evaluate")
 def evaluate(session_id: str):
-    s = sessions.get(session_id)
-    if not s:
+    user_id = sessions.get_user_id(session_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    plan = s["state"].get("plan", {}).get("plan", {})
-    records = progress.load_records()
-    user_records = [r for r in records if r.get("user_id") == s["user_id"]]
+    memory.touch_user(user_id)
+    plan = sessions.get_state(session_id, "plan", {}).get("plan", {})
+    user_records = progress.get_user_records(user_id)
     metrics = progress.compute_metrics(user_records)
     res = evaluator.evaluate(plan, metrics)
     return res
 
 @app.get("/observability")
-def get_observability():
+async def get_observability():
     return {
         "metrics": observability.metrics,
         "agent_performance": observability.get_agent_performance(),
-        "recent_traces": [trace.__dict__ for trace in observability.traces[-10:]]
+        "recent_traces": observability.get_recent_traces(10)
     }
 
 @app.get("/health")
-def health():
-    return {"status": "healthy", "active_sessions": len(sessions.sessions)}
+async def health():
+    progress_storage = progress.get_write_status()
+    return {
+        "status": "healthy" if progress_storage["healthy"] else "degraded",
+        "active_sessions": len(sessions),
+        "progress_storage": progress_storage
+    }
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000)
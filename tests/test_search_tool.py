@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tools.search_tool import SearchTool
+
+
+def _results(topic, count):
+    return [{"title": f"{topic.title()} lesson {i}",
+             "link": f"https://example.com/{topic}/{i}",
+             "snippet": f"A beginner tutorial and guide to {topic}, part {i}",
+             "displayLink": "example.com"} for i in range(count)]
+
+
+class SearchGroupTest(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        env = {"GOOGLE_SEARCH_API_KEY": "key", "GOOGLE_SEARCH_CX": "cx"}
+        with mock.patch.dict(os.environ, env):
+            self.tool = SearchTool()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _fake_search(self, query, num_results, search_type):
+        if " OR " in query:
+            # Unbalanced combined response: the python query is underrepresented
+            return _results("java", 12) + _results("rust", 10) + _results("python", 2)
+        topic = query.split()[0]
+        return _results(topic, num_results)
+
+    def test_unbalanced_group_keeps_results_with_their_query(self):
+        queries = [self.tool._educational_query(topic, "tutorial", "beginner")
+                   for topic in ("java", "rust", "python")]
+
+        with mock.patch.object(self.tool, "_execute_google_search", side_effect=self._fake_search):
+            grouped = self.tool.search_many(queries, num_results=8)
+
+            for topic, results in zip(("java", "rust", "python"), grouped):
+                self.assertTrue(results)
+                self.assertTrue(all(f"/{topic}/" in result["url"] for result in results), topic)
+
+            # The short python list must not have been cached from the combined request
+            results = self.tool.search(queries[2], num_results=8)
+            self.assertEqual(len(results), 8)
+            self.assertTrue(all("/python/" in result["url"] for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,45 @@
+import gzip
 import json
+import mmap
+import os
+import shutil
+import struct
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from loguru import logger
+import orjson
 import hashlib
 from datetime import datetime
+from collections import OrderedDict, defaultdict, deque
+from fnmatch import fnmatchcase
+from concurrent.futures import ThreadPoolExecutor
+
+# Stringify non-str dict keys the way json.dumps does instead of raising
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Payloads at least this large are hashed on a worker thread while they are written;
+# hashlib releases the GIL, so the two overlap
+_PARALLEL_HASH_THRESHOLD = 1 << 20
+_hash_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="json-save-hash")
+
+# Default integrity hash: 128-bit BLAKE2b, faster than MD5 on 64-bit CPUs and as wide
+_DEFAULT_HASH_ALGORITHM = "blake2b"
+
+# Files at least this large are memory-mapped for hashing and parsing instead of being
+# copied into a bytes object; below it the mapping setup costs more than the copy
+_MMAP_THRESHOLD = 1 << 20
+
+# Payloads smaller than this are rewritten in place instead of via temp file + rename.
+# Trade-off: a crash mid-write can leave such a file torn, in exchange for skipping the
+# temp file creation and the directory update of the rename.
+_DIRECT_WRITE_THRESHOLD = 4096
+
+# Length prefix of each record in a batch_save container: little-endian uint32
+_RECORD_HEADER = struct.Struct('<I')
+
+# Files with these suffixes hold one JSON value per line and are appended to in place
+_LINE_DELIMITED_SUFFIXES = ('.jsonl', '.ndjson')
 
 class JSONSaveTool:
     """
@@ -12,17 +47,42 @@ class JSONSaveTool:
     Supports automatic directory creation, data validation, and backup management
     """
     
-    def __init__(self, base_path: str = "data", backup_enabled: bool = True, max_backups: int = 5):
+    def __init__(self, base_path: str = "data", backup_enabled: bool = True, max_backups: int = 5, pretty: bool = False,
+                 compress_backups: bool = False, hash_algorithm: str = _DEFAULT_HASH_ALGORITHM):
         self.base_path = Path(base_path)
+        # Integrity hashes only detect corruption, so the fast default suits; any hashlib
+        # name (e.g. "md5" to match older hashes, "sha256") can be chosen instead
+        hashlib.new(hash_algorithm)  # Fail fast on unknown algorithms
+        self.hash_algorithm = hash_algorithm
+        # Saved files are compact unless constructed with pretty=True; indentation roughly
+        # doubles size and serialize/parse time. Sidecars and JSONL are never indented.
+        self.pretty = pretty
         self.backup_enabled = backup_enabled
         self.max_backups = max_backups
         self.backup_dir = self.base_path / "backups"
+        # Store backups gzip-compressed (<name>.gz) instead of hard-linking them: several
+        # times smaller on disk, at the cost of reading and compressing the file per backup
+        self.compress_backups = compress_backups
+        # File hashes keyed by (path, mtime_ns, size), least recently used first
+        self._hash_cache: OrderedDict = OrderedDict()
+        self.max_cached_hashes = 1024
+        # Parsed file contents for shared loads: path -> ((mtime_ns, size), data), least recently used first
+        self._load_cache: OrderedDict = OrderedDict()
+        self.max_cached_loads = 64
+        # Line counts of line-delimited files appended to, for max_entries compaction
+        self._line_counts: Dict[str, int] = {}
         
         # Ensure base directories exist
         self.base_path.mkdir(parents=True, exist_ok=True)
         if self.backup_enabled:
             self.backup_dir.mkdir(parents=True, exist_ok=True)
         
+        # Backup paths per file stem, oldest first; scanned once, then maintained incrementally
+        self._backup_index: Dict[str, deque] = defaultdict(deque)
+        for backup_path in sorted((entry.path for entry in self._scan_files(self.backup_dir, "*_backup_*", recursive=False)),
+                                  key=os.path.basename):
+            self._backup_index[os.path.basename(backup_path).rsplit("_backup_", 1)[0]].append(backup_path)
+        
         # Operation statistics
         self.stats = {
             'total_saves': 0,
@@ -31,31 +91,39 @@ class JSONSaveTool:
             'last_operation': None
         }
         
-        logger.info(f"JSONSaveTool initialized - Base path: {self.base_path}")
+        logger.info("JSONSaveTool initialized - Base path: {}", self.base_path)
 
     def save_to_file(self, 
                     file_path: str, 
                     data: Union[Dict, List], 
                     ensure_ascii: bool = False,
-                    indent: int = 2,
-                    backup: bool = True) -> Dict[str, Any]:
+                    indent: Optional[int] = None,
+                    backup: bool = True,
+                    include_metadata: bool = False) -> Dict[str, Any]:
         """
         Save data to JSON file with enhanced features
         
+        Save metadata (time, data hash) goes to a '<file>.meta' sidecar, so data is
+        written unchanged; include_metadata embeds it in the file as before instead.
+        
         Args:
             file_path: Path to save file (relative to base_path)
             data: Data to save (dict or list)
-            ensure_ascii: Ensure ASCII output
-            indent: JSON indentation
+            ensure_ascii: Ensure ASCII output (serialized with the stdlib json module, which supports it)
+            indent: JSON indentation (any non-zero value writes orjson's 2-space indentation);
+                defaults to 2 if the tool is pretty, else compact
             backup: Whether to create backup
+            include_metadata: Embed metadata under '_metadata' (lists are wrapped in '_items')
             
         Returns:
             Operation result with metadata
         """
-        start_time = time.time()
+        # One wall-clock read for every timestamp; durations use the monotonic clock
+        start = time.monotonic()
+        now = time.time()
         full_path = self.base_path / file_path
         
-        logger.info(f"Saving data to: {full_path}")
+        logger.info("Saving data to: {}", full_path)
         
         try:
             # Validate input data
@@ -71,47 +139,58 @@ class JSONSaveTool:
                 self._create_backup(full_path)
             
             # Prepare data for saving
-            prepared_data = self._prepare_data_for_saving(data)
-            
-            # Save to file with atomic write (write to temp file then rename)
-            temp_path = full_path.with_suffix('.tmp')
-            
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(prepared_data, f, ensure_ascii=ensure_ascii, indent=indent)
-            
-            # Atomic replace
-            temp_path.replace(full_path)
-            
-            # Calculate file hash for integrity checking
-            file_hash = self._calculate_file_hash(full_path)
+            data_hash = self._hash_hex(validation_result['data_bytes'])
+            prepared_data = self._prepare_data_for_saving(data, data_hash, now) if include_metadata else data
+            if indent is None:
+                indent = 2 if self.pretty else 0
+            
+            if ensure_ascii:
+                data_bytes = json.dumps(prepared_data, ensure_ascii=True, indent=indent or None,
+                                        separators=None if indent else (',', ':')).encode('utf-8')
+            else:
+                data_bytes = orjson.dumps(prepared_data, option=_ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+            
+            # Save to file with atomic write (write to temp file then rename), hashing the
+            # bytes in memory rather than reading the file back
+            if len(data_bytes) >= _PARALLEL_HASH_THRESHOLD:
+                hash_future = _hash_executor.submit(self._hash_hex, data_bytes)
+                self._atomic_write(full_path, data_bytes)
+                file_hash = hash_future.result()
+            else:
+                self._write_file(full_path, data_bytes)
+                file_hash = self._hash_hex(data_bytes)
+            self._remember_file_hash(full_path, file_hash)
+            self._load_cache.pop(str(full_path), None)
+            if not include_metadata:
+                self._write_file(self._metadata_path(full_path), orjson.dumps(self._build_metadata(data, data_hash, now)))
             
             # Update statistics
-            self._update_stats('save', True)
+            self._update_stats('save', True, now)
             
-            operation_time = time.time() - start_time
+            operation_time = time.monotonic() - start
             
-            logger.info(f"Successfully saved {len(str(prepared_data))} bytes to {full_path} in {operation_time:.2f}s")
+            logger.info("Successfully saved {} bytes to {} in {:.2f}s", len(data_bytes), full_path, operation_time)
             
             return {
                 'status': 'success',
                 'file_path': str(full_path),
-                'file_size': len(str(prepared_data)),
+                'file_size': len(data_bytes),
                 'data_hash': file_hash,
                 'backup_created': backup and full_path.exists(),
                 'operation_time': operation_time,
-                'timestamp': time.time()
+                'timestamp': now
             }
             
         except Exception as e:
-            self._update_stats('save', False)
+            self._update_stats('save', False, now)
             logger.error(f"Failed to save data to {full_path}: {e}")
             
             return {
                 'status': 'error',
                 'file_path': str(full_path),
                 'error': str(e),
-                'operation_time': time.time() - start_time,
-                'timestamp': time.time()
+                'operation_time': time.monotonic() - start,
+                'timestamp': now
             }
 
     def append_to_file(self, 
@@ -121,6 +200,9 @@ class JSONSaveTool:
         """
         Append data to JSON file, handling both list and object structures
         
+        .jsonl/.ndjson files are appended to in place (see append_ndjson); other
+        files are read, extended and rewritten.
+        
         Args:
             file_path: Path to file (relative to base_path)
             data: Data to append
@@ -129,10 +211,13 @@ class JSONSaveTool:
         Returns:
             Operation result
         """
+        if Path(file_path).suffix in _LINE_DELIMITED_SUFFIXES:
+            return self.append_ndjson(file_path, data, max_entries)
+        
         start_time = time.time()
         full_path = self.base_path / file_path
         
-        logger.info(f"Appending data to: {full_path}")
+        logger.info("Appending data to: {}", full_path)
         
         try:
             # Read existing data if file exists
@@ -152,7 +237,7 @@ class JSONSaveTool:
             # Apply entry limit if specified
             if max_entries and len(existing_data) > max_entries:
                 existing_data = existing_data[-max_entries:]
-                logger.debug(f"Trimmed data to {max_entries} entries")
+                logger.debug("Trimmed data to {} entries", max_entries)
             
             # Save updated data
             result = self.save_to_file(file_path, existing_data, backup=True)
@@ -172,10 +257,239 @@ class JSONSaveTool:
                 'timestamp': time.time()
             }
 
+    def append_ndjson(self, 
+                      file_path: str, 
+                      data: Union[Dict, List], 
+                      max_entries: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Append entries to a line-delimited JSON file without rewriting it
+        
+        Args:
+            file_path: Path to file (relative to base_path)
+            data: Entry to append, or a list of entries
+            max_entries: Maximum entries to keep; the file is compacted to this many
+                once it grows past twice the limit
+            
+        Returns:
+            Operation result
+        """
+        start_time = time.time()
+        full_path = self.base_path / file_path
+        entries = data if isinstance(data, list) else [data]
+        
+        logger.info("Appending {} entries to: {}", len(entries), full_path)
+        
+        try:
+            lines = b"".join(orjson.dumps(entry, option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+                             for entry in entries)
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            key = str(full_path)
+            if key not in self._line_counts:
+                self._line_counts[key] = self._count_lines(full_path)
+            
+            with open(full_path, 'ab') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._line_counts[key] += len(entries)
+            self._load_cache.pop(key, None)
+            
+            if max_entries and self._line_counts[key] > 2 * max_entries:
+                self._compact_ndjson(full_path, max_entries)
+            
+            self._update_stats('save', True)
+            
+            return {
+                'status': 'success',
+                'file_path': str(full_path),
+                'operation': 'append',
+                'entries_count': min(self._line_counts[key], max_entries) if max_entries else self._line_counts[key],
+                'entries_added': len(entries),
+                'operation_time': time.time() - start_time,
+                'timestamp': time.time()
+            }
+            
+        except Exception as e:
+            self._update_stats('save', False)
+            logger.error(f"Failed to append data to {full_path}: {e}")
+            return {
+                'status': 'error',
+                'file_path': str(full_path),
+                'error': str(e),
+                'operation_time': time.time() - start_time,
+                'timestamp': time.time()
+            }
+
+    def batch_save(self, container_path: str, items: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        """
+        Append many small payloads to one container file with a single write and fsync
+        
+        Each item becomes a length-prefixed record holding its logical path and data,
+        sparing the per-file create, rename and fsync that save_to_file pays.
+        
+        Args:
+            container_path: Container file path (relative to base_path)
+            items: (logical path, data) pairs to store
+            
+        Returns:
+            Operation result
+        """
+        start_time = time.time()
+        full_path = self.base_path / container_path
+        
+        logger.info("Batch saving {} items to: {}", len(items), full_path)
+        
+        try:
+            chunks = []
+            for item_path, data in items:
+                record = orjson.dumps({'path': item_path, 'data': data}, option=_ORJSON_OPTIONS)
+                chunks.append(_RECORD_HEADER.pack(len(record)))
+                chunks.append(record)
+            payload = b"".join(chunks)
+            
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(full_path, 'ab') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            self._update_stats('save', True)
+            
+            return {
+                'status': 'success',
+                'file_path': str(full_path),
+                'operation': 'batch_save',
+                'entries_added': len(items),
+                'bytes_written': len(payload),
+                'operation_time': time.time() - start_time,
+                'timestamp': time.time()
+            }
+            
+        except Exception as e:
+            self._update_stats('save', False)
+            logger.error(f"Failed to batch save to {full_path}: {e}")
+            return {
+                'status': 'error',
+                'file_path': str(full_path),
+                'error': str(e),
+                'operation_time': time.time() - start_time,
+                'timestamp': time.time()
+            }
+
+    def batch_load(self, container_path: str) -> List[Tuple[str, Any]]:
+        """
+        Read every record from a batch_save container
+        
+        Args:
+            container_path: Container file path (relative to base_path)
+            
+        Returns:
+            (logical path, data) pairs in write order; a truncated trailing record is skipped
+        """
+        full_path = self.base_path / container_path
+        records = []
+        
+        try:
+            with open(full_path, 'rb') as f:
+                buffer = f.read()
+        except FileNotFoundError:
+            return records
+        except Exception as e:
+            logger.error(f"Failed to read container {full_path}: {e}")
+            return records
+        
+        view = memoryview(buffer)
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(view):
+            (length,) = _RECORD_HEADER.unpack_from(view, offset)
+            start = offset + _RECORD_HEADER.size
+            if start + length > len(view):
+                break
+            try:
+                record = orjson.loads(view[start:start + length])
+            except orjson.JSONDecodeError as e:
+                logger.error(f"Corrupt record at offset {offset} in {full_path}: {e}")
+                break
+            records.append((record['path'], record['data']))
+            offset = start + length
+        
+        if offset != len(view):
+            logger.warning(f"Ignored {len(view) - offset} trailing bytes in {full_path}")
+        return records
+
+    def _atomic_write(self, file_path: Path, data_bytes: bytes):
+        """Write bytes to a temp file in one call, fsync it, then rename it over file_path"""
+        temp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(data_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+
+    def _write_file(self, file_path: Path, data_bytes: bytes):
+        """Durably write a file: small payloads in place, larger ones with _atomic_write"""
+        if len(data_bytes) < _DIRECT_WRITE_THRESHOLD:
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT, 0o644)
+            try:
+                # A hard-linked backup shares the inode, so only rewrite unshared files
+                if os.fstat(fd).st_nlink <= 1:
+                    written = 0
+                    while written < len(data_bytes):
+                        written += os.pwrite(fd, data_bytes[written:], written)
+                    os.ftruncate(fd, len(data_bytes))
+                    os.fsync(fd)
+                    return
+            finally:
+                os.close(fd)
+        self._atomic_write(file_path, data_bytes)
+
+    def _metadata_path(self, full_path: Path) -> Path:
+        """Sidecar file holding a data file's save metadata"""
+        return full_path.with_name(full_path.name + '.meta')
+
+    def load_metadata(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the save metadata recorded alongside a file
+        
+        Args:
+            file_path: Path to file (relative to base_path)
+            
+        Returns:
+            Metadata, or None if the file was saved without a sidecar
+        """
+        metadata_path = self._metadata_path(self.base_path / file_path)
+        try:
+            with open(metadata_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to load metadata from {metadata_path}: {e}")
+            return None
+
+    def _count_lines(self, file_path: Path) -> int:
+        """Number of non-empty lines in a line-delimited file (0 if missing)"""
+        if not file_path.exists():
+            return 0
+        with open(file_path, 'rb') as f:
+            return sum(1 for line in f if line.strip())
+
+    def _compact_ndjson(self, file_path: Path, max_entries: int):
+        """Atomically rewrite a line-delimited file keeping only its last max_entries lines"""
+        with open(file_path, 'rb') as f:
+            kept = deque((line for line in f if line.strip()), maxlen=max_entries)
+        
+        self._atomic_write(file_path, b"".join(kept))
+        
+        self._line_counts[str(file_path)] = len(kept)
+        logger.debug("Compacted {} to {} entries", file_path, len(kept))
+
     def load_from_file(self, 
                       file_path: str, 
                       default: Any = None,
-                      validate: bool = True) -> Any:
+                      validate: bool = True,
+                      shared: bool = False) -> Any:
         """
         Load data from JSON file with error handling and validation
         
@@ -183,19 +497,45 @@ class JSONSaveTool:
             file_path: Path to file (relative to base_path)
             default: Default value if file doesn't exist or can't be read
             validate: Whether to validate loaded data
+            shared: Serve from (and fill) a cache keyed by the file's mtime and size; the
+                returned object is shared between callers and must not be mutated
             
         Returns:
             Loaded data or default value
         """
         full_path = self.base_path / file_path
+        cache_key = str(full_path)
         
-        if not full_path.exists():
-            logger.debug(f"File not found: {full_path}, returning default")
+        try:
+            stat = full_path.stat()
+        except FileNotFoundError:
+            logger.debug("File not found: {}, returning default", full_path)
             return default
+        except OSError as e:
+            logger.error(f"Failed to stat {full_path}: {e}")
+            return default
+        
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if shared:
+            cached = self._load_cache.get(cache_key)
+            if cached is not None and cached[0] == stamp:
+                self._load_cache.move_to_end(cache_key)
+                return cached[1]
         
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if full_path.suffix == '.gz':
+                # Compressed backup
+                with gzip.open(full_path, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(full_path, 'rb') as f:
+                    if full_path.suffix in _LINE_DELIMITED_SUFFIXES:
+                        data = [orjson.loads(line) for line in f if line.strip()]
+                    elif os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                            data = orjson.loads(view)
+                    else:
+                        data = orjson.loads(f.read())
             
             # Validate loaded data if requested
             if validate:
@@ -204,16 +544,22 @@ class JSONSaveTool:
                     logger.warning(f"Loaded data validation failed: {validation_result['errors']}")
                     # Still return data but log warning
             
-            logger.debug(f"Successfully loaded data from {full_path}")
+            if shared:
+                self._load_cache[cache_key] = (stamp, data)
+                self._load_cache.move_to_end(cache_key)
+                if len(self._load_cache) > self.max_cached_loads:
+                    self._load_cache.popitem(last=False)
+            
+            logger.debug("Successfully loaded data from {}", full_path)
             return data
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON decode error in {full_path}: {e}")
             # Try to create backup of corrupted file
             if self.backup_enabled:
                 corrupted_backup = self.backup_dir / f"corrupted_{full_path.name}_{int(time.time())}.json"
                 full_path.rename(corrupted_backup)
-                logger.info(f"Backed up corrupted file to {corrupted_backup}")
+                logger.info("Backed up corrupted file to {}", corrupted_backup)
             
             return default
         except Exception as e:
@@ -228,104 +574,177 @@ class JSONSaveTool:
             data: Data to validate
             
         Returns:
-            Validation result
+            Validation result; 'data_bytes' holds the canonical (sorted-key) serialization
+            when valid, for reuse as the data hash input
         """
         errors = []
+        data_bytes = None
         
         if data is None:
             errors.append("Data cannot be None")
         
-        # Check if data is JSON serializable
+        # A single serialization checks JSON compatibility; circular references
+        # surface here too, as orjson's recursion limit error
         try:
-            json.dumps(data)
-        except (TypeError, ValueError) as e:
-            errors.append(f"Data not JSON serializable: {e}")
-        
-        # Check for circular references (basic check)
-        if isinstance(data, (dict, list)):
-            try:
-                # This will fail if there are circular references
-                json.dumps(data)
-            except ValueError as e:
-                if "circular" in str(e).lower():
-                    errors.append("Circular reference detected in data")
+            data_bytes = orjson.dumps(data, option=_ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)
+        except orjson.JSONEncodeError as e:
+            if "recursion" in str(e).lower():
+                errors.append("Circular reference detected in data")
+            else:
+                errors.append(f"Data not JSON serializable: {e}")
         
         return {
             'valid': len(errors) == 0,
             'errors': errors,
-            'data_type': type(data).__name__
+            'data_type': type(data).__name__,
+            'data_bytes': data_bytes
         }
 
-    def _prepare_data_for_saving(self, data: Union[Dict, List]) -> Union[Dict, List]:
+    def _prepare_data_for_saving(self, data: Union[Dict, List], data_hash: Optional[str] = None,
+                                 saved_at: Optional[float] = None) -> Union[Dict, List]:
         """
         Prepare data for saving by adding metadata and handling special types
         
         Args:
             data: Original data
+            data_hash: Precomputed hash of data, computed here if omitted
+            saved_at: Save time, defaulting to now
             
         Returns:
             Prepared data with metadata
         """
         prepared_data = data
+        if data_hash is None and isinstance(data, (dict, list)):
+            data_hash = self._calculate_data_hash(data)
         
         # Add metadata for tracking
         if isinstance(data, dict):
             prepared_data = data.copy()
-            prepared_data['_metadata'] = {
-                'saved_at': time.time(),
-                'saved_at_iso': datetime.utcnow().isoformat(),
-                'tool_version': '1.0',
-                'data_hash': self._calculate_data_hash(data)
-            }
+            prepared_data['_metadata'] = self._build_metadata(data, data_hash, saved_at)
         elif isinstance(data, list):
             # For lists, we might want to add metadata differently
             # Here we'll create a wrapper object
             prepared_data = {
                 '_items': data,
-                '_metadata': {
-                    'saved_at': time.time(),
-                    'saved_at_iso': datetime.utcnow().isoformat(),
-                    'tool_version': '1.0',
-                    'item_count': len(data),
-                    'data_hash': self._calculate_data_hash(data)
-                }
+                '_metadata': self._build_metadata(data, data_hash, saved_at)
             }
         
         return prepared_data
 
+    def _build_metadata(self, data: Union[Dict, List], data_hash: str, saved_at: Optional[float] = None) -> Dict[str, Any]:
+        """Save metadata for data, embedded or written to the sidecar"""
+        if saved_at is None:
+            saved_at = time.time()
+        metadata = {
+            'saved_at': saved_at,
+            'saved_at_iso': datetime.utcfromtimestamp(saved_at).isoformat(),
+            'tool_version': '1.0'
+        }
+        if isinstance(data, list):
+            metadata['item_count'] = len(data)
+        metadata['data_hash'] = data_hash
+        return metadata
+
+    def _new_hash(self):
+        """Hash object for data and file integrity hashes"""
+        if self.hash_algorithm == _DEFAULT_HASH_ALGORITHM:
+            return hashlib.blake2b(digest_size=16)
+        return hashlib.new(self.hash_algorithm)
+
+    def _hash_hex(self, data_bytes: bytes) -> str:
+        """Integrity hex digest of in-memory bytes"""
+        digest = self._new_hash()
+        digest.update(data_bytes)
+        return digest.hexdigest()
+
     def _calculate_data_hash(self, data: Any) -> str:
         """Calculate hash of data for integrity checking"""
-        data_string = json.dumps(data, sort_keys=True)
-        return hashlib.md5(data_string.encode()).hexdigest()
+        data_bytes = orjson.dumps(data, option=_ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)
+        return self._hash_hex(data_bytes)
 
     def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate MD5 hash of file contents"""
+        """Calculate integrity hash of file contents"""
         try:
             with open(file_path, 'rb') as f:
-                file_hash = hashlib.md5()
-                for chunk in iter(lambda: f.read(4096), b""):
+                if os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        file_hash = self._new_hash()
+                        file_hash.update(mapped)
+                        return file_hash.hexdigest()
+                if hasattr(hashlib, 'file_digest'):
+                    # Python 3.11+: hashed in C with a large internal buffer
+                    return hashlib.file_digest(f, self._new_hash).hexdigest()
+                file_hash = self._new_hash()
+                for chunk in iter(lambda: f.read(1 << 20), b""):
                     file_hash.update(chunk)
                 return file_hash.hexdigest()
         except Exception as e:
             logger.warning(f"Failed to calculate file hash for {file_path}: {e}")
             return "unknown"
 
+    def _cached_file_hash(self, file_path: Path, stat: Optional[os.stat_result] = None) -> str:
+        """File hash, recomputed only when the file's mtime or size changed"""
+        try:
+            stat = stat or file_path.stat()
+        except OSError as e:
+            logger.warning(f"Failed to stat {file_path} for hashing: {e}")
+            return "unknown"
+        
+        key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        file_hash = self._hash_cache.get(key)
+        if file_hash is not None:
+            self._hash_cache.move_to_end(key)
+            return file_hash
+        
+        file_hash = self._calculate_file_hash(file_path)
+        if file_hash != "unknown":
+            self._cache_file_hash(key, file_hash)
+        return file_hash
+
+    def _remember_file_hash(self, file_path: Path, file_hash: str):
+        """Cache the known hash of a file just written"""
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return
+        self._cache_file_hash((str(file_path), stat.st_mtime_ns, stat.st_size), file_hash)
+
+    def _cache_file_hash(self, key: tuple, file_hash: str):
+        """Insert into the file hash LRU, evicting the least recently used entry when full"""
+        self._hash_cache[key] = file_hash
+        self._hash_cache.move_to_end(key)
+        if len(self._hash_cache) > self.max_cached_hashes:
+            self._hash_cache.popitem(last=False)
+
     def _create_backup(self, file_path: Path):
         """Create backup of existing file"""
         try:
             timestamp = int(time.time())
             backup_name = f"{file_path.stem}_backup_{timestamp}{file_path.suffix}"
             backup_path = self.backup_dir / backup_name
-            
-            # Copy file to backup location
-            import shutil
-            shutil.copy2(file_path, backup_path)
+            if self.compress_backups:
+                backup_path = backup_path.with_name(backup_name + '.gz')
+            
+            # Saves never rewrite a file in place while its inode is shared (see _write_file),
+            # so a hard link is a zero-copy snapshot of the current contents; copy across devices
+            replaced = backup_path.exists()
+            backup_path.unlink(missing_ok=True)
+            if self.compress_backups:
+                with open(file_path, 'rb') as src, gzip.open(backup_path, 'wb', compresslevel=3) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+            else:
+                try:
+                    os.link(file_path, backup_path)
+                except OSError:
+                    shutil.copy2(file_path, backup_path)
+            if not replaced:
+                self._backup_index[file_path.stem].append(str(backup_path))
             
             # Manage backup count
             self._cleanup_old_backups(file_path.stem)
             
             self.stats['total_backups'] += 1
-            logger.debug(f"Created backup: {backup_path}")
+            logger.debug("Created backup: {}", backup_path)
             
         except Exception as e:
             logger.warning(f"Failed to create backup for {file_path}: {e}")
@@ -333,32 +752,56 @@ class JSONSaveTool:
     def _cleanup_old_backups(self, file_stem: str):
         """Clean up old backups beyond the maximum count"""
         try:
-            backup_pattern = f"{file_stem}_backup_*"
-            backups = sorted(self.backup_dir.glob(backup_pattern))
-            
-            if len(backups) > self.max_backups:
-                # Remove oldest backups
-                backups_to_remove = backups[:-self.max_backups]
-                for backup in backups_to_remove:
-                    backup.unlink()
-                    logger.debug(f"Removed old backup: {backup}")
+            backups = self._backup_index[file_stem]
+            
+            # Remove oldest backups
+            while len(backups) > self.max_backups:
+                backup = backups.popleft()
+                Path(backup).unlink(missing_ok=True)
+                logger.debug("Removed old backup: {}", backup)
                     
         except Exception as e:
             logger.warning(f"Failed to cleanup old backups: {e}")
 
-    def _update_stats(self, operation: str, success: bool):
+    def _update_stats(self, operation: str, success: bool, timestamp: Optional[float] = None):
         """Update operation statistics"""
         self.stats['total_saves'] += 1
         if not success:
             self.stats['total_errors'] += 1
-        self.stats['last_operation'] = time.time()
+        self.stats['last_operation'] = timestamp if timestamp is not None else time.time()
+
+    def _scan_files(self, root: Union[str, Path], pattern: str = "*", recursive: bool = True) -> Iterator[os.DirEntry]:
+        """
+        Walk a directory with os.scandir, yielding entries for files whose names match pattern
+        
+        Entries carry their file type and cache their stat(), so walks avoid building a
+        Path and issuing an extra stat per file the way Path.rglob does.
+        
+        Args:
+            root: Directory to walk
+            pattern: Glob pattern matched against file names
+            recursive: Whether to descend into subdirectories
+            
+        Returns:
+            Iterator of matching directory entries
+        """
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            yield from self._scan_files(entry.path, pattern, recursive)
+                    elif entry.is_file() and fnmatchcase(entry.name, pattern):
+                        yield entry
+        except FileNotFoundError:
+            return
 
     def list_files(self, pattern: str = "*.json") -> List[Dict[str, Any]]:
         """
         List JSON files in base directory
         
         Args:
-            pattern: File pattern to match
+            pattern: File name pattern to match
             
         Returns:
             List of file information
@@ -366,15 +809,14 @@ class JSONSaveTool:
         files_info = []
         
         try:
-            for file_path in self.base_path.rglob(pattern):
-                if file_path.is_file():
-                    stat = file_path.stat()
-                    files_info.append({
-                        'path': str(file_path.relative_to(self.base_path)),
-                        'size': stat.st_size,
-                        'modified': stat.st_mtime,
-                        'modified_iso': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                    })
+            for entry in self._scan_files(self.base_path, pattern):
+                stat = entry.stat()
+                files_info.append({
+                    'path': os.path.relpath(entry.path, self.base_path),
+                    'size': stat.st_size,
+                    'modified': stat.st_mtime,
+                    'modified_iso': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                })
             
             return sorted(files_info, key=lambda x: x['modified'], reverse=True)
             
@@ -399,7 +841,7 @@ class JSONSaveTool:
         
         try:
             stat = full_path.stat()
-            file_hash = self._calculate_file_hash(full_path)
+            file_hash = self._cached_file_hash(full_path, stat)
             
             # Try to load data to get basic info
             data = self.load_from_file(file_path, default=None, validate=False)
@@ -413,7 +855,7 @@ class JSONSaveTool:
                 'file_hash': file_hash,
                 'data_type': type(data).__name__ if data else 'unknown',
                 'data_length': len(data) if hasattr(data, '__len__') else None,
-                'backups_count': len(list(self.backup_dir.glob(f"{full_path.stem}_backup_*")))
+                'backups_count': len(self._backup_index.get(full_path.stem, ()))
             }
             
         except Exception as e:
@@ -442,8 +884,10 @@ class JSONSaveTool:
             
             # Delete file
             full_path.unlink()
+            self._metadata_path(full_path).unlink(missing_ok=True)
+            self._load_cache.pop(str(full_path), None)
             
-            logger.info(f"Deleted file: {full_path}")
+            logger.info("Deleted file: {}", full_path)
             return {
                 'status': 'success',
                 'file_path': str(full_path),
@@ -462,9 +906,12 @@ class JSONSaveTool:
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get tool statistics and health information"""
-        total_files = len(list(self.base_path.rglob("*.json")))
-        total_backups = len(list(self.backup_dir.glob("*.json"))) if self.backup_enabled else 0
-        total_size = sum(f.stat().st_size for f in self.base_path.rglob("*.json"))
+        total_files = 0
+        total_size = 0
+        for entry in self._scan_files(self.base_path, "*.json"):
+            total_files += 1
+            total_size += entry.stat().st_size
+        total_backups = sum(len(backups) for backups in self._backup_index.values()) if self.backup_enabled else 0
         
         return {
             'base_path': str(self.base_path),
@@ -502,12 +949,10 @@ class JSONSaveTool:
             return False
 
     def _calculate_storage_usage(self) -> float:
-        """Calculate storage usage percentage (simplified)"""
+        """Calculate usage percentage of the filesystem holding base_path (one statvfs call)"""
         try:
-            # This is a simplified calculation
-            # In production, you might want to check actual disk usage
-            total_size = sum(f.stat().st_size for f in self.base_path.rglob("*"))
-            return min(100.0, total_size / (1024 * 1024))  # Assume 1MB = 100% for demo
+            usage = shutil.disk_usage(self.base_path)
+            return usage.used / usage.total * 100.0 if usage.total else 0.0
         except Exception:
             return 0.0
 
@@ -1,12 +1,182 @@
 import os
+import asyncio
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, NamedTuple, Optional, Tuple
 from loguru import logger
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 import hashlib
-import json
+import orjson
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from threading import Event, Lock, Thread
+from collections import OrderedDict
+from functools import lru_cache
+
+# Domain sets are matched against a result's host and its parent domains
+_TRUSTED_DOMAINS = frozenset({
+    'khanacademy.org', 'coursera.org', 'edx.org', 'youtube.com',
+    'mit.edu', 'stanford.edu', 'w3schools.com', 'mdn.io',
+    'github.com', 'stackoverflow.com', 'wikipedia.org'
+})
+_QUESTIONABLE_DOMAINS = frozenset({'blogspot.com', 'wordpress.com', 'tumblr.com', 'weebly.com'})
+_BOOSTED_DOMAINS = frozenset({
+    'khanacademy.org', 'coursera.org', 'edx.org', 'mit.edu',
+    'stanford.edu', 'w3schools.com', 'mdn.io'
+})
+_EDUCATIONAL_DOMAINS = frozenset({
+    'khanacademy.org', 'coursera.org', 'edx.org', 'udemy.com',
+    'codecademy.com', 'freecodecamp.org', 'w3schools.com', 'mdn.io', 'edu'
+})
+_VIDEO_HOSTS = frozenset({'youtube.com', 'vimeo.com', 'dailymotion.com'})
+
+# File extensions are matched against the end of a URL's lowercased path
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg')
+_OFFICE_EXTENSIONS = ('.ppt', '.pptx', '.doc', '.docx')
+
+# Keywords are matched as substrings of lowercased URLs and titles
+_EDUCATIONAL_URL_KEYWORDS = ('.edu', 'academy', 'course', 'tutorial')
+_QUALITY_KEYWORDS = ('official', 'complete', 'comprehensive', 'guide', 'tutorial', 'course')
+_SPAM_KEYWORDS = ('free download', 'crack', 'hack', 'secret', 'make money fast')
+_EDUCATIONAL_KEYWORDS = (
+    'tutorial', 'course', 'learn', 'guide', 'lesson', 'explained',
+    'introduction', 'basics', 'fundamentals', 'how to'
+)
+
+# Query-independent parts of mock and fallback results, built once; each result copies
+# its template and fills in the query-dependent title, url, snippet and metadata
+_CANNED_QUALITY = {
+    'has_educational_domain': True,
+    'has_quality_keywords': True,
+    'avoids_spam_keywords': True,
+    'snippet_length_appropriate': True,
+    'source_reputation': 'high'
+}
+_MOCK_TEMPLATES = tuple(
+    {
+        'display_url': domain,
+        'source': domain.split('.')[0].title(),
+        'content_type': 'webpage',
+        'relevance_score': 0.8 - (i * 0.1)
+    }
+    for i, domain in enumerate(("khanacademy.org", "coursera.org", "youtube.com", "w3schools.com", "github.com"))
+)
+# (template, title format, url format, space replacement in the url, snippet format)
+_FALLBACK_TEMPLATES = (
+    (
+        {'display_url': 'wikipedia.org', 'source': 'Wikipedia', 'content_type': 'webpage', 'relevance_score': 0.7},
+        "Wikipedia - {query}",
+        "https://en.wikipedia.org/wiki/{query}",
+        '_',
+        "Wikipedia article about {query} - comprehensive overview and references"
+    ),
+    (
+        {'display_url': 'khanacademy.org', 'source': 'Khan Academy', 'content_type': 'webpage', 'relevance_score': 0.8},
+        "Khan Academy - {query}",
+        "https://www.khanacademy.org/search?page_search_query={query}",
+        '%20',
+        "Free online courses and tutorials for {query} from Khan Academy"
+    )
+)
+
+def _url_parts(url: str) -> Tuple[str, str]:
+    """Split a lowercased URL into its host (without www.) and path"""
+    try:
+        parts = urlparse(url)
+    except ValueError:
+        return '', ''
+    return parts.netloc.removeprefix('www.'), parts.path
+
+def _domain_in(host: str, domains: frozenset) -> bool:
+    """Check whether a host or one of its parent domains is in the set"""
+    while host:
+        if host in domains:
+            return True
+        host = host.partition('.')[2]
+    return False
+
+@lru_cache(maxsize=256)
+def _term_matcher(query_terms: Tuple[str, ...]) -> Tuple["re.Pattern[str]", Dict[str, FrozenSet[str]]]:
+    """
+    Compile query terms into a single scan that finds every term occurring in a text
+    
+    The lookahead reports the longest term starting at each position, and the
+    returned map expands a found term to the shorter terms that are its prefixes,
+    so one pass yields the same matches as a substring check per term.
+    """
+    terms = sorted(set(query_terms), key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(re.escape(term) for term in terms) + "))")
+    implied = {term: frozenset(other for other in terms if term.startswith(other)) for term in terms}
+    return pattern, implied
+
+class QueryTerms(NamedTuple):
+    """A query normalized once for scoring: its lowercased terms and, for long queries, their matcher"""
+    terms: Tuple[str, ...]
+    matcher: Optional[Tuple["re.Pattern[str]", Dict[str, FrozenSet[str]]]]
+
+@lru_cache(maxsize=256)
+def _query_terms(query: str) -> QueryTerms:
+    """Lowercase and split a query, resolving the single-scan matcher for queries of 4+ terms"""
+    terms = tuple(query.lower().split())
+    return QueryTerms(terms, _term_matcher(terms) if len(terms) >= 4 else None)
+
+def _count_terms(text: str, query_terms: QueryTerms) -> int:
+    """Count the query terms that occur in text (duplicate terms count again)"""
+    if query_terms.matcher is None:
+        return sum(1 for term in query_terms.terms if term in text)
+    
+    pattern, implied = query_terms.matcher
+    found = set()
+    for term in set(pattern.findall(text)):
+        found |= implied[term]
+    return sum(1 for term in query_terms.terms if term in found)
+
+class UrlInfo(NamedTuple):
+    """Everything the result scoring derives from a URL alone"""
+    host: str
+    source: str
+    reputation: str
+    content_hint: str
+    has_educational_domain: bool
+    is_educational_domain: bool
+    is_boosted: bool
+
+@lru_cache(maxsize=4096)
+def _classify_url(url: str) -> UrlInfo:
+    """Lowercase and parse a URL once, deriving all URL-based predicates (memoized, pure)"""
+    url = url.lower()
+    host, path = _url_parts(url)
+    
+    if path.endswith(_IMAGE_EXTENSIONS):
+        content_hint = 'image'
+    elif path.endswith('.pdf'):
+        content_hint = 'document'
+    elif _domain_in(host, _VIDEO_HOSTS):
+        content_hint = 'video'
+    elif path.endswith(_OFFICE_EXTENSIONS):
+        content_hint = 'document'
+    else:
+        content_hint = 'webpage'
+    
+    if _domain_in(host, _TRUSTED_DOMAINS):
+        reputation = 'high'
+    elif _domain_in(host, _QUESTIONABLE_DOMAINS):
+        reputation = 'medium'
+    else:
+        reputation = 'unknown'
+    
+    return UrlInfo(
+        host=host,
+        source=host.split('.')[0].title() if host else "Unknown",
+        reputation=reputation,
+        content_hint=content_hint,
+        has_educational_domain=any(keyword in url for keyword in _EDUCATIONAL_URL_KEYWORDS),
+        is_educational_domain=_domain_in(host, _EDUCATIONAL_DOMAINS),
+        is_boosted=_domain_in(host, _BOOSTED_DOMAINS)
+    )
 
 class SearchTool:
     """
@@ -20,14 +190,56 @@ class SearchTool:
         self.cache_enabled = cache_enabled
         self.cache_ttl = cache_ttl
         self.cache_dir = Path("cache/search")
+        # In-memory LRU in front of the cache files: cache_key -> (timestamp, results), least
+        # recently used first. Hits skip the file open and parse; results are shared, read-only
+        self._memory_cache: OrderedDict = OrderedDict()
+        self.max_memory_entries = 256
+        self._memory_cache_lock = Lock()
+        # Searches currently being fetched: cache_key -> Future, so concurrent callers
+        # asking for the same query wait for one API call instead of issuing their own
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = Lock()
         self.rate_limit_delay = 1.0 
-        self.last_request_time = 0
+        self.rate_limit_lock = Lock()
+        # Adaptive token bucket: the refill rate (requests/s) starts at 1/rate_limit_delay,
+        # grows additively-multiplicatively on success and halves on HTTP 429
+        self._capacity = 5
+        self._tokens = 1.0
+        self._rate = 1.0 / self.rate_limit_delay
+        self._min_rate = 0.05
+        self._max_rate = 10.0
+        self._last_refill = time.monotonic()
+        # Retries of a page answered with HTTP 429, waiting as long as Retry-After asks (capped)
+        self.max_rate_limit_retries = 3
+        self.max_retry_after = 30.0
+        self.max_batch_workers = 8
+        self.max_page_workers = 4
+        
+        # Keep-alive connections reused across pages and searches; one pool slot per batch worker
+        self.session = requests.Session()
+        # Transient connection errors and 5xx responses are retried by urllib3 with exponential
+        # backoff; 429 is left to _execute_google_search so it also throttles the token bucket
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=frozenset({'GET'}), respect_retry_after_header=True, raise_on_status=False)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=self.max_batch_workers,
+                                                   max_retries=retry))
       
         if self.cache_enabled:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        # Expired cache files are deleted by a periodic background sweep rather than on lookup
+        self.cache_sweep_interval = 300
+        self._sweep_stop = Event()
+        if self.cache_enabled:
+            Thread(target=self._sweep_cache_loop, name="search-cache-sweep", daemon=True).start()
+        
         logger.info(f"SearchTool initialized - API Key: {'Provided' if self.api_key else 'Missing'}")
     
+    def close(self):
+        """Release pooled HTTP connections and stop the cache sweep"""
+        self._sweep_stop.set()
+        self.session.close()
+    
     def search(self, query: str, num_results: int = 5, search_type: str = "web") -> List[Dict[str, Any]]:
         """
         Perform intelligent search with caching and error handling
@@ -51,18 +263,29 @@ class SearchTool:
                 logger.debug(f"Using cached results for: '{query}'")
                 return cached_results
     
-            self._enforce_rate_limit()
-            
             if not self.api_key or not self.cx:
                 logger.warning("Google Search API credentials not configured, using mock results")
                 return self._get_mock_results(query, num_results)
             
-            results = self._execute_google_search(query, num_results, search_type)
-          
-            processed_results = self._process_search_results(results, query)
-          
-            if self.cache_enabled:
-                self._cache_results(cache_key, processed_results)
+            with self._inflight_lock:
+                future = self._inflight.get(cache_key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[cache_key] = Future()
+            
+            if not leader:
+                logger.debug(f"Waiting for in-flight search: '{query}'")
+                return future.result()
+            
+            try:
+                processed_results = self._fetch_results(query, num_results, search_type, cache_key)
+                future.set_result(processed_results)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[cache_key]
             
             logger.info(f"Search completed in {time.time() - start_time:.2f}s - Found {len(processed_results)} results")
             
@@ -72,28 +295,219 @@ class SearchTool:
             logger.error(f"Search failed for '{query}': {e}")
             return self._get_fallback_results(query, num_results)
     
+    async def asearch(self, query: str, num_results: int = 5, search_type: str = "web") -> List[Dict[str, Any]]:
+        """
+        Awaitable search() for async callers, run in a worker thread so the event loop is not blocked
+        
+        Args:
+            query: Search query string
+            num_results: Number of results to return
+            search_type: Type of search (web, image, video)
+            
+        Returns:
+            List of search results with metadata
+        """
+        return await asyncio.to_thread(self.search, query, num_results, search_type)
+    
+    async def asearch_batch(self, queries: List[str], num_results: int = 5,
+                            search_type: str = "web") -> List[List[Dict[str, Any]]]:
+        """
+        Awaitable search over several queries, searched concurrently
+        
+        Args:
+            queries: Search query strings
+            num_results: Number of results to return per query
+            search_type: Type of search (web, image, video)
+            
+        Returns:
+            One result list per query, in the order given
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        fetched = await asyncio.gather(*(self.asearch(query, num_results, search_type) for query in unique_queries))
+        results = dict(zip(unique_queries, fetched))
+        return [results[query] for query in queries]
+    
+    def _fetch_results(self, query: str, num_results: int, search_type: str, cache_key: str) -> List[Dict[str, Any]]:
+        """Fetch, process and cache results for a query that missed the cache"""
+        # A search for the same key may have finished between the cache check and becoming leader
+        cached_results = self._get_cached_results(cache_key)
+        if cached_results:
+            return cached_results
+        
+        results = self._execute_google_search(query, num_results, search_type)
+        processed_results = self._process_search_results(results, query)
+        
+        if self.cache_enabled:
+            self._cache_results(cache_key, processed_results)
+        
+        return processed_results
+    
+    def search_batch(self, queries: List[str], num_results: int = 5, search_type: str = "web") -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches as one batch
+        
+        Google Custom Search has no multi-query endpoint, so the batch is
+        resolved locally: duplicate queries are searched once, cached queries
+        are answered from the cache, and the rest run concurrently.
+        
+        Args:
+            queries: Search query strings
+            num_results: Number of results to return per query
+            search_type: Type of search (web, image, video)
+            
+        Returns:
+            One result list per query, in the order given
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        pending = []
+        
+        for query in unique_queries:
+            cached_results = self._get_cached_results(self._generate_cache_key(query, num_results, search_type))
+            if cached_results:
+                results[query] = cached_results
+            else:
+                pending.append(query)
+        
+        logger.info(f"Batch search: {len(queries)} queries, {len(results)} cached, {len(pending)} to fetch")
+        
+        if len(pending) == 1:
+            results[pending[0]] = self.search(pending[0], num_results, search_type)
+        elif pending:
+            workers = min(self.max_batch_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fetched = executor.map(lambda query: self.search(query, num_results, search_type), pending)
+                results.update(zip(pending, fetched))
+        
+        return [results[query] for query in queries]
+    
+    def search_many(self, queries: List[str], num_results: int = 5, search_type: str = "web",
+                    group_size: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches with fewer API calls by OR-grouping uncached queries
+        
+        Each group of up to group_size queries is sent as one "(q1) OR (q2) OR ..."
+        request. The combined results are scored against each original query, and
+        each query keeps its best matching results. These are cached under the
+        query's own key, so later search() calls hit the cache. A query left with
+        no matching result is searched on its own.
+        
+        Args:
+            queries: Search query strings
+            num_results: Number of results to return per query
+            search_type: Type of search (web, image, video)
+            group_size: Maximum number of queries combined into one request
+            
+        Returns:
+            One result list per query, in the order given
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        pending = []
+        
+        for query in unique_queries:
+            cached_results = self._get_cached_results(self._generate_cache_key(query, num_results, search_type))
+            if cached_results:
+                results[query] = cached_results
+            else:
+                pending.append(query)
+        
+        if pending and self.api_key and self.cx:
+            groups = [pending[i:i + group_size] for i in range(0, len(pending), group_size)]
+            logger.info(f"Grouped search: {len(pending)} uncached queries in {len(groups)} requests")
+            
+            for group in groups:
+                if len(group) > 1:
+                    results.update(self._search_group(group, num_results, search_type))
+        
+        for query in unique_queries:
+            if not results.get(query):
+                results[query] = self.search(query, num_results, search_type)
+        
+        return [results[query] for query in queries]
+    
+    def _search_group(self, group: List[str], num_results: int, search_type: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch one OR-combined request and split its results back per query"""
+        combined_query = " OR ".join(f"({query})" for query in group)
+        
+        try:
+            raw_results = self._execute_google_search(combined_query, min(num_results * len(group), 100), search_type)
+        except Exception as e:
+            logger.warning(f"Grouped search failed, searching queries individually: {e}")
+            return {}
+        
+        # Enrich the combined results once; only relevance depends on the query, so each
+        # query rescores the lowercased title/snippet instead of reprocessing every result
+        processed_results = self._process_search_results(raw_results, combined_query)
+        scoring_inputs = [(result['title'].lower(), result['snippet'].lower(), _classify_url(result['url']))
+                          for result in processed_results]
+        
+        group_terms = {query: _query_terms(query) for query in group}
+        shared_terms = set.intersection(*(set(query_terms.terms) for query_terms in group_terms.values()))
+        
+        grouped_results = {}
+        for query in group:
+            query_terms = group_terms[query]
+            # A result belongs to a query only if it matches a term that sets the query apart
+            # from the rest of the group; terms every query shares (and the domain boost)
+            # would assign it to every query. A query with no such terms is searched on its own
+            distinct_terms = [term for term in query_terms.terms if term not in shared_terms]
+            if not distinct_terms:
+                continue
+            distinct_terms = _query_terms(" ".join(distinct_terms))
+            scored = [(self._calculate_relevance(title, snippet, query_terms, url_info), index)
+                      for index, (title, snippet, url_info) in enumerate(scoring_inputs)
+                      if _count_terms(title, distinct_terms) or _count_terms(snippet, distinct_terms)]
+            scored.sort(key=lambda entry: entry[0], reverse=True)
+            if not scored:
+                continue
+            
+            matching = []
+            for rank, (score, index) in enumerate(scored[:num_results], 1):
+                result = processed_results[index]
+                matching.append(dict(result, relevance_score=score, search_metadata=dict(
+                    result['search_metadata'], query=query, result_rank=rank)))
+            grouped_results[query] = matching
+            # A short list is only what this combined request happened to return; don't
+            # let it answer later search() calls for the query until the cache expires
+            if len(matching) >= num_results:
+                self._cache_results(self._generate_cache_key(query, num_results, search_type), matching)
+        
+        return grouped_results
+    
     def _generate_cache_key(self, query: str, num_results: int, search_type: str) -> str:
         """Generate cache key from search parameters"""
         key_string = f"{query.lower()}_{num_results}_{search_type}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return hashlib.blake2b(key_string.encode(), digest_size=16).hexdigest()
     
     def _get_cached_results(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
         """Get cached search results if available and fresh"""
         if not self.cache_enabled:
             return None
         
+        with self._memory_cache_lock:
+            entry = self._memory_cache.get(cache_key)
+            if entry is not None:
+                if time.time() - entry[0] < self.cache_ttl:
+                    self._memory_cache.move_to_end(cache_key)
+                    return entry[1]
+                del self._memory_cache[cache_key]
+        
         cache_file = self.cache_dir / f"{cache_key}.json"
         
         try:
-            if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-              
-                if time.time() - cache_data.get('timestamp', 0) < self.cache_ttl:
-                    return cache_data.get('results', [])
-                else:
-                    cache_file.unlink()
-                    
+            # Cache files are written once, so their mtime is the entry's age: stale
+            # entries are rejected from the stat alone and left for the background sweep
+            if time.time() - cache_file.stat().st_mtime >= self.cache_ttl:
+                return None
+            
+            cache_data = orjson.loads(cache_file.read_bytes())
+            results = cache_data.get('results', [])
+            self._remember_results(cache_key, cache_data.get('timestamp', 0), results)
+            return results
+            
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"Cache read failed: {e}")
         
@@ -104,77 +518,137 @@ class SearchTool:
         if not self.cache_enabled:
             return
         
+        timestamp = time.time()
+        self._remember_results(cache_key, timestamp, results)
+        
         try:
             cache_file = self.cache_dir / f"{cache_key}.json"
             cache_data = {
-                'timestamp': time.time(),
+                'timestamp': timestamp,
                 'query_hash': cache_key,
                 'results': results
             }
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+            cache_file.write_bytes(orjson.dumps(cache_data))
                 
         except Exception as e:
             logger.warning(f"Cache write failed: {e}")
     
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between API calls"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+    def _remember_results(self, cache_key: str, timestamp: float, results: List[Dict[str, Any]]):
+        """Keep results in the in-memory LRU, evicting the least recently used entry when full"""
+        with self._memory_cache_lock:
+            self._memory_cache[cache_key] = (timestamp, results)
+            self._memory_cache.move_to_end(cache_key)
+            if len(self._memory_cache) > self.max_memory_entries:
+                self._memory_cache.popitem(last=False)
+    
+    def _sweep_cache_loop(self):
+        """Periodically delete expired cache entries until the tool is closed"""
+        while not self._sweep_stop.wait(self.cache_sweep_interval):
+            try:
+                self._sweep_expired_cache()
+            except Exception as e:
+                logger.error(f"Search cache sweep failed: {e}")
+    
+    def _sweep_expired_cache(self) -> int:
+        """Delete cache files and in-memory entries older than the cache TTL in one directory pass"""
+        cutoff = time.time() - self.cache_ttl
+        
+        with self._memory_cache_lock:
+            for cache_key in [key for key, (timestamp, _) in self._memory_cache.items() if timestamp < cutoff]:
+                del self._memory_cache[cache_key]
         
-        if time_since_last < self.rate_limit_delay:
-            sleep_time = self.rate_limit_delay - time_since_last
+        removed = 0
+        for entry in self._cache_entries():
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        
+        if removed:
+            logger.debug(f"Search cache sweep removed {removed} expired entries")
+        return removed
+    
+    def _acquire_token(self):
+        """Take a token from the rate limit bucket, reserving one ahead so concurrent callers stay spaced"""
+        with self.rate_limit_lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+            self._last_refill = now
+            self._tokens -= 1
+            sleep_time = -self._tokens / self._rate if self._tokens < 0 else 0
+        
+        if sleep_time > 0:
             logger.debug(f"Rate limiting: sleeping {sleep_time:.2f}s")
             time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+    
+    def _on_success(self):
+        """Raise the refill rate after a successful API call"""
+        with self.rate_limit_lock:
+            self._rate = min(self._rate * 1.1 + 0.01, self._max_rate)
+    
+    def _on_failure(self):
+        """Halve the refill rate and drain the bucket after the API reports rate limiting"""
+        with self.rate_limit_lock:
+            self._rate = max(self._rate * 0.5, self._min_rate)
+            self._tokens = min(self._tokens, 0.0)
+    
+    def _retry_after(self, response) -> float:
+        """Seconds to wait before retrying a rate limited request, from its Retry-After header"""
+        try:
+            wait = float(response.headers.get('Retry-After', 2))
+        except (TypeError, ValueError):
+            wait = 2.0
+        return min(max(wait, 0.0), self.max_retry_after)
     
     def _execute_google_search(self, query: str, num_results: int, search_type: str) -> List[Dict[str, Any]]:
         """Execute Google Custom Search API request"""
         base_url = "https://www.googleapis.com/customsearch/v1"
         
-        params = {
+        base_params = {
             'key': self.api_key,
             'cx': self.cx,
-            'q': query,
-            'num': min(num_results, 10),
-            'start': 1
+            'q': query
         }
         
         if search_type != "web":
-            params['searchType'] = search_type
-        
-        all_results = []
+            base_params['searchType'] = search_type
+        
+        # The API serves at most 10 results per page and 100 in total (start <= 91)
+        starts = list(range(1, num_results + 1, 10))[:10]
+        
+        def fetch_page(start: int) -> List[Dict[str, Any]]:
+            params = dict(base_params, start=start, num=min(num_results - start + 1, 10))
+            for attempt in range(self.max_rate_limit_retries + 1):
+                self._acquire_token()
+                logger.debug(f"Making Google Search API request: {query} (start: {start})")
+                response = self.session.get(base_url, params=params, timeout=10)
+                if response.status_code != 429:
+                    break
+                self._on_failure()
+                if attempt < self.max_rate_limit_retries:
+                    wait = self._retry_after(response)
+                    logger.warning(f"Google Search API rate limited, retrying in {wait:.1f}s (start: {start})")
+                    time.sleep(wait)
+            response.raise_for_status()
+            self._on_success()
+            return response.json().get('items', [])
         
         try:
-            results_needed = num_results
-            start_index = 1
+            if len(starts) == 1:
+                pages = [fetch_page(starts[0])]
+            else:
+                workers = min(self.max_page_workers, len(starts))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    pages = list(executor.map(fetch_page, starts))
             
-            while results_needed > 0 and start_index <= 91:
-                params['start'] = start_index
-                params['num'] = min(results_needed, 10)
-                
-                logger.debug(f"Making Google Search API request: {params['q']} (start: {start_index})")
-                
-                response = requests.get(base_url, params=params, timeout=10)
-                response.raise_for_status()
-                
-                data = response.json()
-                items = data.get('items', [])
-                
+            all_results = []
+            for items in pages:
                 if not items:
-                    break 
-                
-                all_results.extend(items)
-                results_needed -= len(items)
-                start_index += 10
-              
-                if len(all_results) >= num_results:
                     break
-                    
-                
-                time.sleep(0.5)
+                all_results.extend(items)
             
             return all_results[:num_results]
             
@@ -186,28 +660,37 @@ class SearchTool:
             raise
     
     def _process_search_results(self, raw_results: List[Dict], query: str) -> List[Dict[str, Any]]:
-        """Process and enrich raw search results"""
+        """Process and enrich raw search results, deriving each result's strings once"""
         processed_results = []
+        query_terms = _query_terms(query)
+        retrieved_at = time.time()
         
         for item in raw_results:
             try:
+                title = item.get('title', '')
+                url = item.get('link', '')
+                snippet = item.get('snippet', '')
+                mime_type = item.get('mime', '')
+                title_lower = title.lower()
+                url_info = _classify_url(url)
+                
                 processed_item = {
-                    'title': item.get('title', ''),
-                    'url': item.get('link', ''),
-                    'snippet': item.get('snippet', ''),
+                    'title': title,
+                    'url': url,
+                    'snippet': snippet,
                     'display_url': item.get('displayLink', ''),
-                    'source': self._extract_source(item.get('link', '')),
+                    'source': url_info.source,
                     'search_metadata': {
                         'query': query,
-                        'retrieved_at': time.time(),
+                        'retrieved_at': retrieved_at,
                         'result_rank': len(processed_results) + 1
                     },
-                    'content_type': self._detect_content_type(item),
-                    'relevance_score': self._calculate_relevance(item, query),
-                    'quality_indicators': self._assess_quality(item)
+                    'content_type': self._detect_content_type(mime_type, url_info),
+                    'relevance_score': self._calculate_relevance(title_lower, snippet.lower(), query_terms, url_info),
+                    'quality_indicators': self._assess_quality(title_lower, snippet, url_info)
                 }
             
-                if 'image' in item.get('mime', ''):
+                if 'image' in mime_type:
                     processed_item.update({
                         'image_metadata': {
                             'thumbnail': item.get('image', {}).get('thumbnailLink'),
@@ -223,128 +706,59 @@ class SearchTool:
         
         return processed_results
     
-    def _extract_source(self, url: str) -> str:
-        """Extract source domain from URL"""
-        from urllib.parse import urlparse
-        
-        try:
-            domain = urlparse(url).netloc
-            domain = domain.replace('www.', '').split('.')[0]
-            return domain.title()
-        except Exception:
-            return "Unknown"
-    
-    def _detect_content_type(self, item: Dict) -> str:
-        """Detect the type of content from search result"""
-        mime_type = item.get('mime', '')
-        url = item.get('link', '').lower()
-        
-        if 'image' in mime_type or any(ext in url for ext in ['.jpg', '.png', '.gif', '.webp']):
+    def _detect_content_type(self, mime_type: str, url_info: UrlInfo) -> str:
+        """Detect the type of content from a result's MIME type, falling back to its URL"""
+        if 'image' in mime_type or url_info.content_hint == 'image':
             return 'image'
-        elif 'pdf' in mime_type or url.endswith('.pdf'):
-            return 'document'
-        elif any(domain in url for domain in ['youtube.com', 'vimeo.com', 'dailymotion.com']):
-            return 'video'
-        elif any(ext in url for ext in ['.ppt', '.pptx', '.doc', '.docx']):
+        elif 'pdf' in mime_type:
             return 'document'
         else:
-            return 'webpage'
+            return url_info.content_hint
     
-    def _calculate_relevance(self, item: Dict, query: str) -> float:
-        """Calculate relevance score for search result"""
-        title = item.get('title', '').lower()
-        snippet = item.get('snippet', '').lower()
-        query_terms = query.lower().split()
+    def _calculate_relevance(self, title: str, snippet: str, query_terms: QueryTerms, url_info: UrlInfo) -> float:
+        """Calculate relevance score from a result's lowercased title and snippet"""
+        term_count = len(query_terms.terms)
         
-        title_matches = sum(1 for term in query_terms if term in title)
-        title_score = (title_matches / len(query_terms)) if query_terms else 0
+        title_matches = _count_terms(title, query_terms)
+        title_score = (title_matches / term_count) if term_count else 0
         
-        snippet_matches = sum(1 for term in query_terms if term in snippet)
-        snippet_score = (snippet_matches / len(query_terms)) * 0.5 if query_terms else 0
+        snippet_matches = _count_terms(snippet, query_terms)
+        snippet_score = (snippet_matches / term_count) * 0.5 if term_count else 0
       
-        url = item.get('link', '').lower()
-        domain_boost = 0.2 if any(domain in url for domain in [
-            'khanacademy.org', 'coursera.org', 'edx.org', 'mit.edu', 
-            'stanford.edu', 'w3schools.com', 'mdn.io'
-        ]) else 0
+        domain_boost = 0.2 if url_info.is_boosted else 0
         
         total_score = min(1.0, title_score + snippet_score + domain_boost)
         return round(total_score, 2)
     
-    def _assess_quality(self, item: Dict) -> Dict[str, Any]:
-        """Assess quality of search result"""
-        title = item.get('title', '').lower()
-        url = item.get('link', '').lower()
-        snippet = item.get('snippet', '')
-        
+    def _assess_quality(self, title: str, snippet: str, url_info: UrlInfo) -> Dict[str, Any]:
+        """Assess quality of search result from its lowercased title"""
         return {
-            'has_educational_domain': any(domain in url for domain in ['.edu', 'academy', 'course', 'tutorial']),
-            'has_quality_keywords': any(keyword in title for keyword in [
-                'official', 'complete', 'comprehensive', 'guide', 'tutorial', 'course'
-            ]),
-            'avoids_spam_keywords': not any(keyword in title for keyword in [
-                'free download', 'crack', 'hack', 'secret', 'make money fast'
-            ]),
+            'has_educational_domain': url_info.has_educational_domain,
+            'has_quality_keywords': any(keyword in title for keyword in _QUALITY_KEYWORDS),
+            'avoids_spam_keywords': not any(keyword in title for keyword in _SPAM_KEYWORDS),
             'snippet_length_appropriate': 50 <= len(snippet) <= 300,
-            'source_reputation': self._assess_source_reputation(url)
+            'source_reputation': url_info.reputation
         }
     
-    def _assess_source_reputation(self, url: str) -> str:
-        """Assess reputation of the source domain"""
-        trusted_domains = [
-            'khanacademy.org', 'coursera.org', 'edx.org', 'youtube.com',
-            'mit.edu', 'stanford.edu', 'w3schools.com', 'mdn.io',
-            'github.com', 'stackoverflow.com', 'wikipedia.org'
-        ]
-        
-        questionable_domains = [
-            'blogspot.com', 'wordpress.com', 'tumblr.com', 'weebly.com'
-        ]
-        
-        domain = url.lower()
-        if any(trusted in domain for trusted in trusted_domains):
-            return 'high'
-        elif any(questionable in domain for questionable in questionable_domains):
-            return 'medium'
-        else:
-            return 'unknown'
-    
     def _get_mock_results(self, query: str, num_results: int) -> List[Dict[str, Any]]:
         """Generate mock results for testing when API is not available"""
         logger.info("Using mock search results")
         
+        retrieved_at = time.time()
+        title = query.title()
+        url_path = query.replace(' ', '-')
+        snippet = f"Learn {query} with comprehensive tutorials and examples. Perfect for beginners and advanced learners alike."
+        
         mock_results = []
-        base_domains = [
-            "khanacademy.org",
-            "coursera.org", 
-            "youtube.com",
-            "w3schools.com",
-            "github.com"
-        ]
-        
-        for i in range(min(num_results, 5)):
-            domain = base_domains[i % len(base_domains)]
-            mock_results.append({
-                'title': f"{query.title()} Tutorial - {domain}",
-                'url': f"https://{domain}/tutorials/{query.replace(' ', '-')}",
-                'snippet': f"Learn {query} with comprehensive tutorials and examples. Perfect for beginners and advanced learners alike.",
-                'display_url': domain,
-                'source': domain.split('.')[0].title(),
-                'search_metadata': {
-                    'query': query,
-                    'retrieved_at': time.time(),
-                    'result_rank': i + 1
-                },
-                'content_type': 'webpage',
-                'relevance_score': 0.8 - (i * 0.1),
-                'quality_indicators': {
-                    'has_educational_domain': True,
-                    'has_quality_keywords': True,
-                    'avoids_spam_keywords': True,
-                    'snippet_length_appropriate': True,
-                    'source_reputation': 'high'
-                }
-            })
+        for i, template in enumerate(_MOCK_TEMPLATES[:num_results]):
+            domain = template['display_url']
+            result = dict(template)
+            result['title'] = f"{title} Tutorial - {domain}"
+            result['url'] = f"https://{domain}/tutorials/{url_path}"
+            result['snippet'] = snippet
+            result['search_metadata'] = {'query': query, 'retrieved_at': retrieved_at, 'result_rank': i + 1}
+            result['quality_indicators'] = dict(_CANNED_QUALITY)
+            mock_results.append(result)
         
         return mock_results
     
@@ -352,50 +766,18 @@ class SearchTool:
         """Provide fallback results when search fails"""
         logger.warning(f"Using fallback results for: '{query}'")
         
-        return [
-            {
-                'title': f"Wikipedia - {query}",
-                'url': f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}",
-                'snippet': f"Wikipedia article about {query} - comprehensive overview and references",
-                'display_url': 'wikipedia.org',
-                'source': 'Wikipedia',
-                'search_metadata': {
-                    'query': query,
-                    'retrieved_at': time.time(),
-                    'result_rank': 1
-                },
-                'content_type': 'webpage',
-                'relevance_score': 0.7,
-                'quality_indicators': {
-                    'has_educational_domain': True,
-                    'has_quality_keywords': True,
-                    'avoids_spam_keywords': True,
-                    'snippet_length_appropriate': True,
-                    'source_reputation': 'high'
-                }
-            },
-            {
-                'title': f"Khan Academy - {query}",
-                'url': f"https://www.khanacademy.org/search?page_search_query={query.replace(' ', '%20')}",
-                'snippet': f"Free online courses and tutorials for {query} from Khan Academy",
-                'display_url': 'khanacademy.org',
-                'source': 'Khan Academy',
-                'search_metadata': {
-                    'query': query,
-                    'retrieved_at': time.time(),
-                    'result_rank': 2
-                },
-                'content_type': 'webpage',
-                'relevance_score': 0.8,
-                'quality_indicators': {
-                    'has_educational_domain': True,
-                    'has_quality_keywords': True,
-                    'avoids_spam_keywords': True,
-                    'snippet_length_appropriate': True,
-                    'source_reputation': 'high'
-                }
-            }
-        ][:num_results]
+        retrieved_at = time.time()
+        fallback_results = []
+        for i, (template, title, url, space, snippet) in enumerate(_FALLBACK_TEMPLATES[:num_results]):
+            result = dict(template)
+            result['title'] = title.format(query=query)
+            result['url'] = url.format(query=query.replace(' ', space))
+            result['snippet'] = snippet.format(query=query)
+            result['search_metadata'] = {'query': query, 'retrieved_at': retrieved_at, 'result_rank': i + 1}
+            result['quality_indicators'] = dict(_CANNED_QUALITY)
+            fallback_results.append(result)
+        
+        return fallback_results
     
     def search_educational_resources(self, topic: str, resource_type: str = "tutorial", level: str = "beginner") -> List[Dict[str, Any]]:
         """
@@ -409,6 +791,27 @@ class SearchTool:
         Returns:
             List of educational resources
         """
+        results = self.search(self._educational_query(topic, resource_type, level), num_results=8)
+        return self._filter_educational(results)
+    
+    def search_educational_resources_many(self, topics: List[str], resource_type: str = "tutorial",
+                                          level: str = "beginner") -> List[List[Dict[str, Any]]]:
+        """
+        Specialized search for educational resources on several topics, OR-grouping their requests
+        
+        Args:
+            topics: Learning topics
+            resource_type: Type of resource (tutorial, course, video, book)
+            level: Difficulty level (beginner, intermediate, advanced)
+            
+        Returns:
+            One list of educational resources per topic, in the order given
+        """
+        queries = [self._educational_query(topic, resource_type, level) for topic in topics]
+        return [self._filter_educational(results) for results in self.search_many(queries, num_results=8)]
+    
+    def _educational_query(self, topic: str, resource_type: str, level: str) -> str:
+        """Build the search query for an educational resource search"""
         query_terms = [topic]
         
         if resource_type == "tutorial":
@@ -425,10 +828,10 @@ class SearchTool:
         elif level == "advanced":
             query_terms.extend(["advanced", "expert", "deep dive"])
         
-        query = " ".join(query_terms)
-        
-        results = self.search(query, num_results=8)
+        return " ".join(query_terms)
     
+    def _filter_educational(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the first five results that look like educational resources"""
         educational_results = []
         for result in results:
             if self._is_educational_resource(result):
@@ -438,43 +841,38 @@ class SearchTool:
     
     def _is_educational_resource(self, result: Dict) -> bool:
         """Check if a search result is likely an educational resource"""
-        url = result.get('url', '').lower()
         title = result.get('title', '').lower()
-  
-        educational_domains = [
-            'khanacademy.org', 'coursera.org', 'edx.org', 'udemy.com',
-            'codecademy.com', 'freecodecamp.org', 'w3schools.com', 'mdn.io',
-            'mit.edu', 'stanford.edu', 'harvard.edu', '.edu'
-        ]
         
-        if any(domain in url for domain in educational_domains):
+        if _classify_url(result.get('url', '')).is_educational_domain:
             return True
-      
-        educational_keywords = [
-            'tutorial', 'course', 'learn', 'guide', 'lesson', 'explained',
-            'introduction', 'basics', 'fundamentals', 'how to'
-        ]
         
-        if any(keyword in title for keyword in educational_keywords):
+        if any(keyword in title for keyword in _EDUCATIONAL_KEYWORDS):
             return True
         
         return False
     
     def clear_cache(self, older_than: int = None):
         """Clear search cache"""
+        with self._memory_cache_lock:
+            if older_than:
+                cutoff = time.time() - older_than
+                for cache_key in [key for key, (timestamp, _) in self._memory_cache.items() if timestamp < cutoff]:
+                    del self._memory_cache[cache_key]
+            else:
+                self._memory_cache.clear()
+        
         try:
-            cache_files = list(self.cache_dir.glob("*.json"))
+            now = time.time()
             cleared_count = 0
             
-            for cache_file in cache_files:
-                if older_than:
-                    file_age = time.time() - cache_file.stat().st_mtime
-                    if file_age > older_than:
-                        cache_file.unlink()
-                        cleared_count += 1
-                else:
-                    cache_file.unlink()
+            for entry in self._cache_entries():
+                try:
+                    if older_than and now - entry.stat().st_mtime <= older_than:
+                        continue
+                    os.unlink(entry.path)
                     cleared_count += 1
+                except FileNotFoundError:
+                    continue
             
             logger.info(f"Cleared {cleared_count} cache files")
             return cleared_count
@@ -483,17 +881,32 @@ class SearchTool:
             logger.error(f"Cache clearance failed: {e}")
             return 0
     
+    def _cache_entries(self) -> List[os.DirEntry]:
+        """List cache files in one directory pass; DirEntry.stat() is cached per entry"""
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                return [entry for entry in entries if entry.name.endswith('.json')]
+        except FileNotFoundError:
+            return []
+    
     def get_search_statistics(self) -> Dict[str, Any]:
         """Get search tool statistics"""
-        cache_files = list(self.cache_dir.glob("*.json")) if self.cache_enabled else []
-        total_cache_size = sum(f.stat().st_size for f in cache_files)
+        cache_files = self._cache_entries() if self.cache_enabled else []
+        total_cache_size = 0
+        for entry in cache_files:
+            try:
+                total_cache_size += entry.stat().st_size
+            except FileNotFoundError:
+                continue
         
         return {
             'cache_enabled': self.cache_enabled,
             'cache_size_files': len(cache_files),
             'cache_size_bytes': total_cache_size,
+            'memory_cache_entries': len(self._memory_cache),
             'cache_ttl_seconds': self.cache_ttl,
             'rate_limit_delay': self.rate_limit_delay,
+            'rate_limit_rate': round(self._rate, 3),
             'api_configured': bool(self.api_key and self.cx)
         }
 